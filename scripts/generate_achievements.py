@@ -1,23 +1,22 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from collections.abc import Iterator
+from typing import Any, ClassVar
 
 from sr_common import (
-    LangAssets,
+    BuildContext,
+    IndexRecord,
     SRIndexGenerator,
-    get_available_languages,
     get_hash_content,
-    load_all_languages,
-    read_config,
-    save_config,
+    load_generator_context,
+    save_config_stream,
 )
 from sr_unity import strip_unity_rich_text
 
 __all__ = ("SRIndexAchivements",)
 
 
-@dataclass
-class AchievementData:
+class AchievementData(IndexRecord):
     id: str
     series_id: str
     title: str
@@ -28,52 +27,60 @@ class AchievementData:
 
 
 class SRIndexAchivements(SRIndexGenerator):
-    def __init__(self, *, lang_assets: LangAssets) -> None:
-        self._lang_assets = lang_assets
+    CONFIGS: ClassVar[tuple[str, ...]] = ("AchievementData",)
 
-    def generate(self) -> None:
-        raw_achieve_data = read_config("AchievementData")
+    def __init__(self, *, context: BuildContext) -> None:
+        self._context = context
+        self._lang_assets = context.lang_assets
+
+    def _iter_achievements(
+        self, raw_achieve_data: dict[str, Any], *, language: str
+    ) -> Iterator[tuple[str, AchievementData]]:
+        # In sorted order, for save_config_stream.
+        for key in sorted(raw_achieve_data):
+            value = raw_achieve_data[key]
+            name = get_hash_content(
+                value["AchievementTitle"],
+                language=language,
+                lang_assets=self._lang_assets,
+            )
+            desc = get_hash_content(
+                value["AchievementDesc"],
+                language=language,
+                lang_assets=self._lang_assets,
+            )
+            hidden_desc = get_hash_content(
+                value["HideAchievementDesc"],
+                language=language,
+                lang_assets=self._lang_assets,
+            )
+            playstation_desc = get_hash_content(
+                value["AchievementDescPS"],
+                language=language,
+                lang_assets=self._lang_assets,
+            )
 
-        for language in get_available_languages():
-            achieve_data = {}
-            for key, value in raw_achieve_data.items():
-                name = get_hash_content(
-                    value["AchievementTitle"],
-                    language=language,
-                    lang_assets=self._lang_assets,
-                )
-                desc = get_hash_content(
-                    value["AchievementDesc"],
-                    language=language,
-                    lang_assets=self._lang_assets,
-                )
-                hidden_desc = get_hash_content(
-                    value["HideAchievementDesc"],
-                    language=language,
-                    lang_assets=self._lang_assets,
-                )
-                playstation_desc = get_hash_content(
-                    value["AchievementDescPS"],
-                    language=language,
-                    lang_assets=self._lang_assets,
-                )
+            hide_achievement = "ShowType" in value and value["ShowType"] == "ShowAfterFinish"
+            yield key, AchievementData(
+                id=key,
+                series_id=str(value["SeriesID"]),
+                title=name,
+                desc=strip_unity_rich_text(desc, only_tags=["unbreak"]),
+                hide_desc=strip_unity_rich_text(hidden_desc, only_tags=["unbreak"]),
+                ps_desc=strip_unity_rich_text(playstation_desc, only_tags=["unbreak"]),
+                hide=hide_achievement,
+            )
 
-                hide_achievement = "ShowType" in value and value["ShowType"] == "ShowAfterFinish"
-                achieve_data[key] = AchievementData(
-                    id=key,
-                    series_id=str(value["SeriesID"]),
-                    title=name,
-                    desc=strip_unity_rich_text(desc, only_tags=["unbreak"]),
-                    hide_desc=strip_unity_rich_text(hidden_desc, only_tags=["unbreak"]),
-                    ps_desc=strip_unity_rich_text(playstation_desc, only_tags=["unbreak"]),
-                    hide=hide_achievement,
-                )
+    def generate(self) -> None:
+        raw_achieve_data = self._context.read_config("AchievementData")
 
-            save_config("achievements", achieve_data, lang=language)
+        for language in self._lang_assets:
+            achievements = self._iter_achievements(raw_achieve_data, language=language)
+            save_config_stream("achievements", achievements, lang=language)
 
 
 if __name__ == "__main__":
     print("Loading language assets...")
-    lang_assets = load_all_languages()
+    context = load_generator_context([SRIndexAchivements])
     print("Generating achievements...")
-    SRIndexAchivements(lang_assets=lang_assets).generate()
+    SRIndexAchivements(context=context).generate()
@@ -1,13 +1,48 @@
 from __future__ import annotations
 
+import gc
 import importlib
+import multiprocessing
 from argparse import ArgumentParser, Namespace
+from collections import Counter
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from contextlib import AbstractContextManager, nullcontext
 from pathlib import Path
-from typing import cast
+from typing import Any, cast
 
-from sr_common import ROOT_DIR, LangAssets, SRIndexGenerator, load_all_languages
+from sr_build import BuildLedger
+from sr_common import (
+    OUTPUT_LAYOUTS,
+    ROOT_DIR,
+    BuildContext,
+    ConfigCache,
+    IORecord,
+    LangAssets,
+    OutputWriter,
+    SRIndexGenerator,
+    collect_referenced_hashes,
+    get_generator_config_reads,
+    get_generator_configs,
+    get_output_layout,
+    get_textmap_fingerprints,
+    load_all_languages,
+    open_textmap_store,
+    pop_unhandled_paths,
+    record_io,
+    report_unhandled_paths,
+    set_output_layout,
+    write_behind,
+)
 
 SCRIPTS_DIR = ROOT_DIR / "scripts"
+# Generator -> the languages it has to run for, and why.
+BuildPlan = dict[type[SRIndexGenerator], dict[str, str]]
+# Per worker process state for the parallel mode
+_WORKER_REFERENCED: set[str] | None = None
+_WORKER_WRITERS = 0
+_WORKER_LANG_ASSETS: LangAssets = {}
+# Filled before forking so every worker shares the same parsed configs.
+_WORKER_CONFIGS = ConfigCache(maxsize=None)
 
 
 def get_all_scripts() -> list[Path]:
@@ -30,27 +65,223 @@ def get_script_generators(script: Path, skip_gen: list[str]) -> list[type[SRInde
     return generators
 
 
-def execute_script_generators(generators: list[type[SRIndexGenerator]], *, lang_assets: LangAssets) -> None:
+def plan_generators(
+    generators: list[type[SRIndexGenerator]],
+    *,
+    ledger: BuildLedger,
+    textmaps: dict[str, dict[str, Any]],
+    force: bool = False,
+) -> BuildPlan:
+    languages = list(textmaps.keys())
+    plan: BuildPlan = {}
     for gen_cls in generators:
-        generator = gen_cls(lang_assets=lang_assets)
+        if force:
+            reasons = {language: "forced" for language in languages}
+        else:
+            reasons = ledger.plan(gen_cls, languages, textmaps, declared_configs=get_generator_configs(gen_cls))
+        if not reasons:
+            print(f"{gen_cls.__name__}: up to date")
+            continue
+        by_reason: dict[str, list[str]] = {}
+        for language, reason in reasons.items():
+            by_reason.setdefault(reason, []).append(language)
+        for reason, reason_languages in by_reason.items():
+            print(f"{gen_cls.__name__}: rebuild {', '.join(reason_languages)} ({reason})")
+        plan[gen_cls] = reasons
+    return plan
+
+
+def _writing(writers: int) -> AbstractContextManager[OutputWriter | None]:
+    return write_behind(writers) if writers > 0 else nullcontext()
+
+
+def _record_written(
+    pending: list[tuple[type[SRIndexGenerator], IORecord, list[str], list[Future[None]]]],
+    *,
+    ledger: BuildLedger,
+    textmaps: dict[str, dict[str, Any]],
+    wait: bool = False,
+) -> None:
+    # A generator only goes in the ledger once its outputs are on disk, in the order they ran.
+    recorded = False
+    while pending:
+        gen_cls, io, languages, futures = pending[0]
+        if not wait and not all(future.done() for future in futures):
+            break
+        for future in futures:
+            future.result()
+        ledger.record(gen_cls, io, languages, textmaps)
+        recorded = True
+        pending.pop(0)
+    if recorded:
+        ledger.save()
+
+
+def execute_script_generators(
+    plan: BuildPlan,
+    *,
+    context: BuildContext,
+    ledger: BuildLedger,
+    textmaps: dict[str, dict[str, Any]],
+    writer: OutputWriter | None = None,
+) -> list[IORecord]:
+    records: list[IORecord] = []
+    pending: list[tuple[type[SRIndexGenerator], IORecord, list[str], list[Future[None]]]] = []
+    for gen_cls, reasons in plan.items():
+        languages = list(reasons.keys())
+        generator = gen_cls(context=context.with_languages(languages))
         print(f"Executing {gen_cls.__name__}")
-        generator.generate()
+        with record_io() as io:
+            generator.generate()
+        pending.append((gen_cls, io, languages, writer.take_pending() if writer is not None else []))
+        _record_written(pending, ledger=ledger, textmaps=textmaps)
+        records.append(io)
+    _record_written(pending, ledger=ledger, textmaps=textmaps, wait=True)
+    return records
+
+
+def _init_worker(referenced: set[str] | None, writers: int, layout: str) -> None:
+    global _WORKER_REFERENCED, _WORKER_WRITERS
+    _WORKER_REFERENCED = referenced
+    _WORKER_WRITERS = writers
+    set_output_layout(layout)
+
+
+def _run_generator_task(gen_cls: type[SRIndexGenerator], language: str) -> tuple[str, IORecord, Counter[str]]:
+    # Each worker holds the textmap of a single language, the previous one is dropped before loading the next.
+    if language not in _WORKER_LANG_ASSETS:
+        _WORKER_LANG_ASSETS.clear()
+        _WORKER_LANG_ASSETS.update(load_all_languages([language], referenced=_WORKER_REFERENCED))
+    context = BuildContext({language: _WORKER_LANG_ASSETS[language]}, configs=_WORKER_CONFIGS)
+    # Every output is written by the time the writer exits, before the task reports back.
+    with record_io() as io, _writing(_WORKER_WRITERS):
+        gen_cls(context=context).generate()
+    return language, io, pop_unhandled_paths()
+
+
+def execute_parallel_generators(
+    plan: BuildPlan,
+    *,
+    jobs: int,
+    referenced: set[str] | None,
+    config_reads: list[tuple[str, Any]],
+    writers: int,
+    ledger: BuildLedger,
+    textmaps: dict[str, dict[str, Any]],
+) -> list[IORecord]:
+    # Make sure the textmap store is built once, not raced by every worker.
+    open_textmap_store().close()
+
+    mp_context = None
+    if "fork" in multiprocessing.get_all_start_methods():
+        # Forked workers inherit the parsed configs instead of having them pickled per task.
+        mp_context = multiprocessing.get_context("fork")
+        print("Preloading configs...")
+        _WORKER_CONFIGS.preload(config_reads)
+        # Keep the GC from touching (and un-sharing) the inherited pages.
+        gc.freeze()
+
+    records: list[IORecord] = []
+    unhandled: Counter[str] = Counter()
+    total_tasks = sum(len(reasons) for reasons in plan.values())
+    print(f"Executing {total_tasks} generator tasks with {jobs} jobs")
+    with ProcessPoolExecutor(
+        max_workers=jobs,
+        mp_context=mp_context,
+        initializer=_init_worker,
+        initargs=(referenced, writers, get_output_layout()),
+    ) as executor:
+        # Submitted language by language, so the consecutive tasks of a worker reuse the textmap it holds.
+        languages = list(dict.fromkeys(language for reasons in plan.values() for language in reasons))
+        futures = {
+            executor.submit(_run_generator_task, gen_cls, language): gen_cls
+            for language in languages
+            for gen_cls, reasons in plan.items()
+            if language in reasons
+        }
+        for future in as_completed(futures):
+            gen_cls = futures[future]
+            language, io, task_unhandled = future.result()
+            unhandled.update(task_unhandled)
+            ledger.record(gen_cls, io, [language], textmaps)
+            ledger.save()
+            records.append(io)
+            print(f"Finished {gen_cls.__name__} ({language})")
+    report_unhandled_paths(unhandled)
+    return records
+
+
+def print_summary(records: list[IORecord]) -> None:
+    written = sum(record.written for record in records)
+    skipped = sum(record.skipped for record in records)
+    print(f"Saved {written + skipped} index files: {written} written, {skipped} unchanged")
 
 
 def argparser():
     parser = ArgumentParser("generate_all")
-    parser.add_argument("-s", "--skip", nargs="+", help="Skip scripts")
+    parser.add_argument("-s", "--skip", nargs="+", default=[], help="Skip scripts")
+    parser.add_argument(
+        "--full-textmaps",
+        action="store_true",
+        help="Load every textmap entry instead of only the ones referenced by the generators",
+    )
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=1, help="Split the work per generator and language over N processes"
+    )
+    parser.add_argument(
+        "-w", "--writers", type=int, default=2, help="Write the index files behind with N threads, 0 to write in place"
+    )
+    parser.add_argument(
+        "--layout",
+        choices=OUTPUT_LAYOUTS,
+        default="merged",
+        help="Save the localized outputs merged per language, split into index/base/ and text overlays, or both",
+    )
+    parser.add_argument("--plan", action="store_true", help="Only print what would be rebuilt and why")
+    parser.add_argument("--force", action="store_true", help="Rebuild everything, even if the inputs are unchanged")
     return parser.parse_args()
 
 
 def main(args: Namespace):
-    lang_data = load_all_languages()
+    set_output_layout(args.layout)
     scripts = get_all_scripts()
+    script_generators: list[list[type[SRIndexGenerator]]] = []
     for script in scripts:
         if script.stem in args.skip:
             continue
-        generators = get_script_generators(script, args.skip)
-        execute_script_generators(generators, lang_assets=lang_data)
+        script_generators.append(get_script_generators(script, args.skip))
+
+    all_generators = [gen_cls for generators in script_generators for gen_cls in generators]
+    ledger = BuildLedger()
+    textmaps = get_textmap_fingerprints()
+    plan = plan_generators(all_generators, ledger=ledger, textmaps=textmaps, force=args.force)
+    if args.plan or not plan:
+        return
+
+    config_reads = list(dict.fromkeys(read for gen_cls in plan for read in get_generator_config_reads(gen_cls)))
+    config_names = list(dict.fromkeys(name for name, _ in config_reads))
+    referenced = None if args.full_textmaps else collect_referenced_hashes(config_names)
+
+    if args.jobs > 1:
+        records = execute_parallel_generators(
+            plan,
+            jobs=args.jobs,
+            referenced=referenced,
+            config_reads=config_reads,
+            writers=args.writers,
+            ledger=ledger,
+            textmaps=textmaps,
+        )
+        print_summary(records)
+        return
+
+    print("Loading language assets...")
+    languages = list(dict.fromkeys(language for reasons in plan.values() for language in reasons))
+    with BuildContext.load(languages, referenced=referenced) as context, _writing(args.writers) as writer:
+        records = execute_script_generators(plan, context=context, ledger=ledger, textmaps=textmaps, writer=writer)
+        print(f"Config cache: {context.configs.stats()}")
+    report_unhandled_paths()
+    print_summary(records)
 
 
 if __name__ == "__main__":
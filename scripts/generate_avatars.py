@@ -1,31 +1,34 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from typing import ClassVar
 
 from sr_common import (
-    LangAssets,
+    BuildContext,
+    IndexRecord,
     SRIndexGenerator,
-    get_available_languages,
+    canonical_asset,
     get_hash_content,
-    load_all_languages,
-    read_config,
+    load_generator_context,
     remap_icon_or_image,
+    report_unhandled_paths,
     save_config,
 )
 
 __all__ = ("SRIndexAvatars",)
 
 
-@dataclass
-class AvatarData:
+class AvatarData(IndexRecord):
     id: str
     name: str
     icon: str
 
 
 class SRIndexAvatars(SRIndexGenerator):
-    def __init__(self, *, lang_assets: LangAssets) -> None:
-        self._lang_assets = lang_assets
+    CONFIGS: ClassVar[tuple[str, ...]] = ("ItemConfigAvatarPlayerIcon", "MessageContactsConfig")
+
+    def __init__(self, *, context: BuildContext) -> None:
+        self._context = context
+        self._lang_assets = context.lang_assets
 
     def _append_trailblazer(self, avatar_icon: dict[str, AvatarData]) -> None:
         missing_keys: list[str] = []
@@ -38,14 +41,14 @@ class SRIndexAvatars(SRIndexGenerator):
             avatar_icon[key] = AvatarData(
                 id=key,
                 name="{NICKNAME}",
-                icon=f"icon/avatar/{key}.png",
+                icon=canonical_asset(f"icon/avatar/{key}.png"),
             )
 
     def generate(self) -> None:
-        raw_avatar_player_icon = read_config("ItemConfigAvatarPlayerIcon")
-        raw_msg_contacts = read_config("MessageContactsConfig")
+        raw_avatar_player_icon = self._context.read_config("ItemConfigAvatarPlayerIcon")
+        raw_msg_contacts = self._context.read_config("MessageContactsConfig")
 
-        for language in get_available_languages():
+        for language in self._lang_assets:
             avatar_icon = {}
 
             for key, value in raw_msg_contacts.items():
@@ -80,6 +83,7 @@ class SRIndexAvatars(SRIndexGenerator):
 
 if __name__ == "__main__":
     print("Loading language assets...")
-    lang_assets = load_all_languages()
+    context = load_generator_context([SRIndexAvatars])
     print("Generating avatars...")
-    SRIndexAvatars(lang_assets=lang_assets).generate()
+    SRIndexAvatars(context=context).generate()
+    report_unhandled_paths()
@@ -1,20 +1,21 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
 from typing import ClassVar
 
+from msgspec import Struct
 from sr_common import (
-    LangAssets,
+    BuildContext,
+    Hashable,
+    IndexRecord,
     SRIndexGenerator,
-    format_with_params,
-    get_available_languages,
-    get_hash_content,
-    load_all_languages,
-    read_config,
+    canonical_asset,
+    load_generator_context,
     remap_icon_or_image,
+    report_unhandled_paths,
     save_config,
+    save_shared_config,
 )
-from sr_unity import strip_unity_rich_text
+from sr_textref import LocalizedOutput, TextBatch, TextRef
 
 __all__ = (
     "SRIndexCharacterBase",
@@ -24,72 +25,64 @@ __all__ = (
 )
 
 
-@dataclass
-class AvatarPromoValue:
+class AvatarPromoValue(IndexRecord):
     base: float
     step: float
 
 
-@dataclass
-class AvatarIDNum:
+class AvatarIDNum(IndexRecord):
     id: str
     num: int
 
 
-@dataclass
-class AvatarPromoData:
+class AvatarPromoData(IndexRecord):
     id: str
     values: list[dict[str, AvatarPromoValue]]
     materials: list[list[AvatarIDNum]]
 
 
-@dataclass
-class AvatarRankData:
+class AvatarRankData(IndexRecord):
     id: str
-    name: str
+    name: TextRef
     rank: int
-    desc: str
+    desc: TextRef
     icon: str
     materials: list[AvatarIDNum]
     level_up_skills: list[AvatarIDNum]
     icon: str
 
 
-@dataclass
-class AvatarSkillData:
+class AvatarSkillData(IndexRecord):
     id: str
-    name: str
+    name: TextRef
     max_level: int
     element: str
     type: str
-    type_text: str
+    type_text: TextRef
     effect: str
-    effect_text: str
-    simple_desc: str
-    desc: str
+    effect_text: TextRef
+    simple_desc: TextRef
+    desc: TextRef
     params: list[list[float]]
     icon: str
 
 
-@dataclass
-class AvatarPropertyData:
+class AvatarPropertyData(IndexRecord):
     type: str  # IceAddedRatio, etc
     value: float
 
 
-@dataclass
-class AvatarSkillTreeLevelData:
+class AvatarSkillTreeLevelData(IndexRecord):
     promotion: int
     properties: list[AvatarPropertyData]
     materials: list[AvatarIDNum]
 
 
-@dataclass
-class AvatarSkillTreeData:
+class AvatarSkillTreeData(IndexRecord):
     id: str
-    name: str
+    name: TextRef | str
     max_level: int
-    desc: str
+    desc: TextRef | str
     params: list[list[float]]
     anchor: str
     icon: str
@@ -98,10 +91,9 @@ class AvatarSkillTreeData:
     levels: list[AvatarSkillTreeLevelData]
 
 
-@dataclass
-class AvatarData:
+class AvatarData(IndexRecord):
     id: str
-    name: str
+    name: TextRef
     tag: str
     rarity: int
     path: str
@@ -115,271 +107,263 @@ class AvatarData:
     portrait: str
 
 
-class SRIndexCharacterPromotion(SRIndexGenerator):
-    def __init__(self, *, lang_assets: LangAssets) -> None:
-        self._lang_assets = lang_assets
+class _ConfigValue(Struct):
+    Value: int | float
 
-    def generate(self) -> None:
-        raw_avatar_config = read_config("AvatarPromotionConfig")
-
-        for language in get_available_languages():
-            avatar_config = {}
-
-            for key, value_base in raw_avatar_config.items():
-                all_promo_keys: list[dict[str, AvatarPromoValue]] = []
-                materials_comp: list[list[AvatarIDNum]] = []
-                for value in value_base.values():
-                    materials: list[AvatarIDNum] = []
-                    for mat in value["PromotionCostList"]:
-                        materials.append(
-                            AvatarIDNum(
-                                id=str(mat["ItemID"]),
-                                num=mat["ItemNum"],
-                            )
-                        )
-                    materials_comp.append(materials)
-
-                    promo_keys: dict[str, AvatarPromoValue] = {
-                        "hp": AvatarPromoValue(
-                            base=value["HPBase"]["Value"],
-                            step=round(value["HPAdd"]["Value"], 2),
-                        ),
-                        "atk": AvatarPromoValue(
-                            base=round(value["AttackBase"]["Value"], 2),
-                            step=round(value["AttackAdd"]["Value"], 2),
-                        ),
-                        "def": AvatarPromoValue(
-                            base=round(value["DefenceBase"]["Value"], 2),
-                            step=round(value["DefenceAdd"]["Value"], 2),
-                        ),
-                        "spd": AvatarPromoValue(
-                            base=round(value["SpeedBase"]["Value"], 2),
-                            step=round(value["SpeedBase"]["Value"], 2),
-                        ),
-                        "crit_rate": AvatarPromoValue(
-                            base=round(value["CriticalChance"]["Value"], 2),
-                            step=0,
-                        ),
-                        "crit_dmg": AvatarPromoValue(
-                            base=round(value["CriticalDamage"]["Value"], 2),
-                            step=0,
-                        ),
-                    }
-                    all_promo_keys.append(promo_keys)
-                avatar_config[key] = AvatarPromoData(
-                    id=key,
-                    values=all_promo_keys,
-                    materials=materials_comp,
-                )
 
-            save_config("character_promotions", avatar_config, lang=language)
+class _SkillTreePropertyConfig(Struct):
+    PropertyType: str
+    Value: _ConfigValue
 
 
-class SRIndexCharacterRank(SRIndexGenerator):
-    def __init__(self, *, lang_assets: LangAssets) -> None:
-        self._lang_assets = lang_assets
+class _SkillTreeMaterialConfig(Struct):
+    ItemID: int
+    ItemNum: int
 
-    def generate(self) -> None:
-        raw_avatar_config = read_config("AvatarRankConfig")
 
-        for language in get_available_languages():
-            avatar_config = {}
+class _AvatarSkillTreeConfig(Struct):
+    PointName: Hashable | str
+    AbilityName: Hashable | str
+    PointDesc: Hashable | str
+    ParamList: list[_ConfigValue]
+    StatusAddList: list[_SkillTreePropertyConfig]
+    MaterialList: list[_SkillTreeMaterialConfig]
+    MaxLevel: int
+    Anchor: str
+    IconPath: str
+    LevelUpSkillID: list[int] = []
+    PrePoint: list[int] | None = None
 
-            for _key, value in raw_avatar_config.items():
-                name = get_hash_content(
-                    value["Name"],
-                    language=language,
-                    lang_assets=self._lang_assets,
-                )
-                desc = get_hash_content(
-                    value["Desc"],
-                    language=language,
-                    lang_assets=self._lang_assets,
-                )
 
-                skill_up = []
-                for key, count in value["SkillAddLevelList"].items():
-                    skill_up.append(
-                        AvatarIDNum(
-                            id=key,
-                            num=count,
-                        )
-                    )
-                materials = []
-                for material in value["UnlockCost"]:
+class SRIndexCharacterPromotion(SRIndexGenerator):
+    CONFIGS: ClassVar[tuple[str, ...]] = ("AvatarPromotionConfig",)
+
+    def __init__(self, *, context: BuildContext) -> None:
+        self._context = context
+        self._lang_assets = context.lang_assets
+
+    def generate(self) -> None:
+        raw_avatar_config = self._context.read_config("AvatarPromotionConfig")
+
+        # Nothing in here is translated, build it once and share it with every language.
+        avatar_config = {}
+        for key, value_base in raw_avatar_config.items():
+            all_promo_keys: list[dict[str, AvatarPromoValue]] = []
+            materials_comp: list[list[AvatarIDNum]] = []
+            for value in value_base.values():
+                materials: list[AvatarIDNum] = []
+                for mat in value["PromotionCostList"]:
                     materials.append(
                         AvatarIDNum(
-                            id=str(material["ItemID"]),
-                            num=material["ItemNum"],
+                            id=str(mat["ItemID"]),
+                            num=mat["ItemNum"],
                         )
                     )
+                materials_comp.append(materials)
+
+                promo_keys: dict[str, AvatarPromoValue] = {
+                    "hp": AvatarPromoValue(
+                        base=value["HPBase"]["Value"],
+                        step=round(value["HPAdd"]["Value"], 2),
+                    ),
+                    "atk": AvatarPromoValue(
+                        base=round(value["AttackBase"]["Value"], 2),
+                        step=round(value["AttackAdd"]["Value"], 2),
+                    ),
+                    "def": AvatarPromoValue(
+                        base=round(value["DefenceBase"]["Value"], 2),
+                        step=round(value["DefenceAdd"]["Value"], 2),
+                    ),
+                    "spd": AvatarPromoValue(
+                        base=round(value["SpeedBase"]["Value"], 2),
+                        step=round(value["SpeedBase"]["Value"], 2),
+                    ),
+                    "crit_rate": AvatarPromoValue(
+                        base=round(value["CriticalChance"]["Value"], 2),
+                        step=0,
+                    ),
+                    "crit_dmg": AvatarPromoValue(
+                        base=round(value["CriticalDamage"]["Value"], 2),
+                        step=0,
+                    ),
+                }
+                all_promo_keys.append(promo_keys)
+            avatar_config[key] = AvatarPromoData(
+                id=key,
+                values=all_promo_keys,
+                materials=materials_comp,
+            )
+
+        save_shared_config("character_promotions", avatar_config, langs=self._lang_assets)
 
-                params_flatten = []
-                for params in value["Param"]:
-                    params_flatten.append(params["Value"])
-
-                avatar_config[_key] = AvatarRankData(
-                    id=_key,
-                    name=name,
-                    rank=value["Rank"],
-                    desc=strip_unity_rich_text(format_with_params(desc, params_flatten), only_tags=["unbreak"]),
-                    materials=materials,
-                    level_up_skills=skill_up,
-                    icon=remap_icon_or_image(value["IconPath"]),
-                )
 
-            save_config("character_ranks", avatar_config, lang=language)
-
-
-class SRIndexCharacterSkills(SRIndexGenerator):
-    UNUSED_SKILLS_TAG: ClassVar[list[int]] = [1323314283]
+class SRIndexCharacterRank(SRIndexGenerator):
+    CONFIGS: ClassVar[tuple[str, ...]] = ("AvatarRankConfig",)
 
-    def __init__(self, *, lang_assets: LangAssets) -> None:
-        self._lang_assets = lang_assets
+    def __init__(self, *, context: BuildContext) -> None:
+        self._context = context
+        self._lang_assets = context.lang_assets
 
     def generate(self) -> None:
-        raw_avatar_skill_config = read_config("AvatarSkillConfig")
-        raw_avatar_skill_trees_config = read_config("AvatarSkillTreeConfig")
-
-        for language in get_available_languages():
-            avatar_skill_config = {}
-
-            for _key, value in raw_avatar_skill_config.items():
-                val_first = value["1"]
-                sk_tag = val_first["SkillTag"]
-                if sk_tag["Hash"] in self.UNUSED_SKILLS_TAG:
-                    continue
-                name = get_hash_content(
-                    val_first["SkillName"],
-                    language=language,
-                    lang_assets=self._lang_assets,
-                )
-                desc = get_hash_content(
-                    val_first["SkillDesc"],
-                    language=language,
-                    lang_assets=self._lang_assets,
-                )
-                simple_desc = get_hash_content(
-                    val_first["SimpleSkillDesc"],
-                    language=language,
-                    lang_assets=self._lang_assets,
-                )
-                type_desc = get_hash_content(
-                    val_first["SkillTypeDesc"],
-                    language=language,
-                    lang_assets=self._lang_assets,
+        raw_avatar_config = self._context.read_config("AvatarRankConfig")
+
+        text_batch = TextBatch()
+        avatar_config = {}
+        for rank_id, value in raw_avatar_config.items():
+            skill_up = []
+            for key, count in value["SkillAddLevelList"].items():
+                skill_up.append(
+                    AvatarIDNum(
+                        id=key,
+                        num=count,
+                    )
                 )
-                effect_desc = get_hash_content(
-                    sk_tag,
-                    language=language,
-                    lang_assets=self._lang_assets,
+            materials = []
+            for material in value["UnlockCost"]:
+                materials.append(
+                    AvatarIDNum(
+                        id=str(material["ItemID"]),
+                        num=material["ItemNum"],
+                    )
                 )
 
-                params = []
-                for level_val in value.values():
-                    params.append([round(p_lvl["Value"], 3) for p_lvl in level_val["ParamList"]])
-                if "AttackType" not in val_first:
-                    val_first["AttackType"] = "Talent"
-                if "StanceDamageType" not in val_first:
-                    val_first["StanceDamageType"] = ""
-
-                avatar_skill_config[_key] = AvatarSkillData(
-                    id=_key,
-                    name=name,
-                    max_level=val_first["MaxLevel"],
-                    element=val_first["StanceDamageType"],
-                    type=val_first["AttackType"],
-                    type_text=type_desc,
-                    effect=val_first["SkillEffect"],
-                    effect_text=effect_desc,
-                    params=params,
-                    simple_desc=strip_unity_rich_text(simple_desc, only_tags=["unbreak"]),
-                    desc=strip_unity_rich_text(desc, only_tags=["unbreak"]),
-                    icon=remap_icon_or_image(val_first["SkillIcon"]),
-                )
+            params_flatten = []
+            for params in value["Param"]:
+                params_flatten.append(params["Value"])
 
-            save_config("character_skills", avatar_skill_config, lang=language)
-
-            avatar_skill_tress_config = {}
-            for _key, value in raw_avatar_skill_trees_config.items():
-                first_val = value["1"]
-                name = ""
-                if first_val["PointName"] != "":
-                    name = get_hash_content(
-                        first_val["PointName"],
-                        language=language,
-                        lang_assets=self._lang_assets,
-                    )
-                elif first_val["AbilityName"] != "":
-                    name = get_hash_content(
-                        first_val["AbilityName"],
-                        language=language,
-                        lang_assets=self._lang_assets,
-                    )
+            avatar_config[rank_id] = AvatarRankData(
+                id=rank_id,
+                name=text_batch.ref(value["Name"]),
+                rank=value["Rank"],
+                desc=text_batch.ref(value["Desc"], params=params_flatten, strip=True, only_tags=["unbreak"]),
+                materials=materials,
+                level_up_skills=skill_up,
+                icon=remap_icon_or_image(value["IconPath"]),
+            )
 
-                desc = ""
-                if first_val["PointDesc"] != "":
-                    desc = get_hash_content(
-                        first_val["PointDesc"],
-                        language=language,
-                        lang_assets=self._lang_assets,
-                    )
+        for language, resolver in self._lang_assets.items():
+            texts = text_batch.resolve(resolver)
+            save_config("character_ranks", avatar_config, lang=language, default=texts.default)
 
-                params = []
-                levels_data: list[AvatarSkillTreeLevelData] = []
-                for idx, level_val in enumerate(value.values()):
-                    params.append([round(p_lvl["Value"], 3) for p_lvl in level_val["ParamList"]])
-                    promo_properties = [
-                        AvatarPropertyData(type=prop["PropertyType"], value=round(prop["Value"]["Value"], 3))
-                        for prop in level_val["StatusAddList"]
-                    ]
-                    promo_mats = [
-                        AvatarIDNum(
-                            id=str(mat["ItemID"]),
-                            num=mat["ItemNum"],
-                        )
-                        for mat in level_val["MaterialList"]
-                    ]
-                    levels_data.append(
-                        AvatarSkillTreeLevelData(
-                            promotion=idx,
-                            properties=promo_properties,
-                            materials=promo_mats,
-                        )
+
+class SRIndexCharacterSkills(SRIndexGenerator):
+    CONFIGS: ClassVar[tuple[str, ...]] = ("AvatarSkillConfig", "AvatarSkillTreeConfig")
+    UNUSED_SKILLS_TAG: ClassVar[list[int]] = [1323314283]
+
+    def __init__(self, *, context: BuildContext) -> None:
+        self._context = context
+        self._lang_assets = context.lang_assets
+
+    def generate(self) -> None:
+        raw_avatar_skill_config = self._context.read_config("AvatarSkillConfig")
+        # Keyed by point ID, then by level.
+        raw_avatar_skill_trees_config = self._context.read_config(
+            "AvatarSkillTreeConfig", type=dict[str, _AvatarSkillTreeConfig]
+        )
+
+        text_batch = TextBatch()
+        avatar_skill_config = {}
+        for key, value in raw_avatar_skill_config.items():
+            val_first = value["1"]
+            sk_tag = val_first["SkillTag"]
+            if sk_tag["Hash"] in self.UNUSED_SKILLS_TAG:
+                continue
+
+            params = []
+            for level_val in value.values():
+                params.append([round(p_lvl["Value"], 3) for p_lvl in level_val["ParamList"]])
+            avatar_skill_config[key] = AvatarSkillData(
+                id=key,
+                name=text_batch.ref(val_first["SkillName"]),
+                max_level=val_first["MaxLevel"],
+                element=val_first.get("StanceDamageType", ""),
+                type=val_first.get("AttackType", "Talent"),
+                type_text=text_batch.ref(val_first["SkillTypeDesc"]),
+                effect=val_first["SkillEffect"],
+                effect_text=text_batch.ref(sk_tag),
+                params=params,
+                simple_desc=text_batch.ref(val_first["SimpleSkillDesc"], strip=True, only_tags=["unbreak"]),
+                desc=text_batch.ref(val_first["SkillDesc"], strip=True, only_tags=["unbreak"]),
+                icon=remap_icon_or_image(val_first["SkillIcon"]),
+            )
+
+        missing_pre_points: list[tuple[str, TextRef | str]] = []
+        avatar_skill_tress_config = {}
+        for key, value in raw_avatar_skill_trees_config.items():
+            first_val = value["1"]
+            name: TextRef | str = ""
+            if first_val.PointName != "":
+                name = text_batch.ref(first_val.PointName)
+            elif first_val.AbilityName != "":
+                name = text_batch.ref(first_val.AbilityName)
+
+            desc: TextRef | str = ""
+            if first_val.PointDesc != "":
+                desc = text_batch.ref(first_val.PointDesc, strip=True, only_tags=["unbreak"])
+
+            params = []
+            levels_data: list[AvatarSkillTreeLevelData] = []
+            for idx, level_val in enumerate(value.values()):
+                params.append([round(p_lvl.Value, 3) for p_lvl in level_val.ParamList])
+                promo_properties = [
+                    AvatarPropertyData(type=prop.PropertyType, value=round(prop.Value.Value, 3))
+                    for prop in level_val.StatusAddList
+                ]
+                promo_mats = [
+                    AvatarIDNum(
+                        id=str(mat.ItemID),
+                        num=mat.ItemNum,
+                    )
+                    for mat in level_val.MaterialList
+                ]
+                levels_data.append(
+                    AvatarSkillTreeLevelData(
+                        promotion=idx,
+                        properties=promo_properties,
+                        materials=promo_mats,
                     )
-                level_up_skills = []
-                if "LevelUpSkillID" in first_val:
-                    level_up_skills = [
-                        AvatarIDNum(
-                            id=str(skill_id),
-                            num=1,
-                        )
-                        for skill_id in first_val["LevelUpSkillID"]
-                    ]
-
-                if "PrePoint" not in first_val:
-                    print(f"-- Missing PrePoint for {_key} ({name})")
-                    first_val["PrePoint"] = []
-
-                avatar_skill_tress_config[_key] = AvatarSkillTreeData(
-                    id=_key,
-                    name=name,
-                    max_level=first_val["MaxLevel"],
-                    desc=strip_unity_rich_text(desc, only_tags=["unbreak"]),
-                    params=params,
-                    anchor=first_val["Anchor"],
-                    icon=remap_icon_or_image(first_val["IconPath"]),
-                    pre_points=list(map(str, first_val["PrePoint"])),
-                    level_up_skills=level_up_skills,
-                    levels=levels_data,
                 )
-
-            save_config("character_skill_trees", avatar_skill_tress_config, lang=language)
+            level_up_skills = [
+                AvatarIDNum(
+                    id=str(skill_id),
+                    num=1,
+                )
+                for skill_id in first_val.LevelUpSkillID
+            ]
+
+            if first_val.PrePoint is None:
+                missing_pre_points.append((key, name))
+
+            avatar_skill_tress_config[key] = AvatarSkillTreeData(
+                id=key,
+                name=name,
+                max_level=first_val.MaxLevel,
+                desc=desc,
+                params=params,
+                anchor=first_val.Anchor,
+                icon=remap_icon_or_image(first_val.IconPath),
+                pre_points=list(map(str, first_val.PrePoint or [])),
+                level_up_skills=level_up_skills,
+                levels=levels_data,
+            )
+
+        # The records are shared by every language, only stream their encoding.
+        skill_trees_output = LocalizedOutput("character_skill_trees", avatar_skill_tress_config, stream=True)
+        for language, resolver in self._lang_assets.items():
+            texts = text_batch.resolve(resolver)
+            for key, name in missing_pre_points:
+                print(f"-- Missing PrePoint for {key} ({texts[name]})")
+            missing_pre_points.clear()
+            save_config("character_skills", avatar_skill_config, lang=language, default=texts.default)
+            skill_trees_output.save(texts)
 
 
 class SRIndexCharacterBase(SRIndexGenerator):
-    def __init__(self, *, lang_assets: LangAssets) -> None:
-        self._lang_assets = lang_assets
+    CONFIGS: ClassVar[tuple[str, ...]] = ("AvatarConfig", "AvatarSkillTreeConfig")
+
+    def __init__(self, *, context: BuildContext) -> None:
+        self._context = context
+        self._lang_assets = context.lang_assets
 
     @staticmethod
     def _get_skill_trees(chara_id: str, skill_trees: list[str]) -> list[str]:
@@ -390,55 +374,59 @@ class SRIndexCharacterBase(SRIndexGenerator):
         return skill_trees_comp
 
     def generate(self) -> None:
-        raw_avatar_config = read_config("AvatarConfig")
-        raw_avatar_trees_config = read_config("AvatarSkillTreeConfig")
+        raw_avatar_config = self._context.read_config("AvatarConfig")
+        raw_avatar_trees_config = self._context.read_config(
+            "AvatarSkillTreeConfig", type=dict[str, _AvatarSkillTreeConfig]
+        )
 
         all_avatar_trees_keys = list(raw_avatar_trees_config.keys())
 
-        for language in get_available_languages():
-            avatar_config = {}
-
-            for _key, value_base in raw_avatar_config.items():
-                name = get_hash_content(
-                    value_base["AvatarName"],
-                    language=language,
-                    lang_assets=self._lang_assets,
-                )
-                desc = get_hash_content(
-                    value_base["AvatarDesc"],
-                    language=language,
-                    lang_assets=self._lang_assets,
-                )
-                if desc != "":
-                    print(f"Character {_key} ({name}) has a description, but it's not used")
-
-                avatar_config[_key] = AvatarData(
-                    id=_key,
-                    name=name,
-                    tag=value_base["AvatarVOTag"],
-                    rarity=int(value_base["Rarity"].replace("CombatPowerAvatarRarityType", "")),
-                    path=value_base["AvatarBaseType"],
-                    element=value_base["DamageType"],
-                    max_sp=value_base["SPNeed"]["Value"],
-                    ranks=list(map(str, value_base["RankIDList"])),
-                    skills=list(map(str, value_base["SkillList"])),
-                    skill_trees=self._get_skill_trees(_key, all_avatar_trees_keys),
-                    icon=f"icon/character/{_key}.png",
-                    preview=f"image/character_preview/{_key}.png",
-                    portrait=f"image/character_portrait/{_key}.png",
-                )
-
-            save_config("characters", avatar_config, lang=language)
+        text_batch = TextBatch()
+        descriptions: list[tuple[str, TextRef, TextRef]] = []
+        avatar_config = {}
+        for key, value_base in raw_avatar_config.items():
+            name = text_batch.ref(value_base["AvatarName"])
+            descriptions.append((key, name, text_batch.ref(value_base["AvatarDesc"])))
+
+            avatar_config[key] = AvatarData(
+                id=key,
+                name=name,
+                tag=value_base["AvatarVOTag"],
+                rarity=int(value_base["Rarity"].replace("CombatPowerAvatarRarityType", "")),
+                path=value_base["AvatarBaseType"],
+                element=value_base["DamageType"],
+                max_sp=value_base["SPNeed"]["Value"],
+                ranks=list(map(str, value_base["RankIDList"])),
+                skills=list(map(str, value_base["SkillList"])),
+                skill_trees=self._get_skill_trees(key, all_avatar_trees_keys),
+                icon=canonical_asset(f"icon/character/{key}.png"),
+                preview=canonical_asset(f"image/character_preview/{key}.png"),
+                portrait=canonical_asset(f"image/character_portrait/{key}.png"),
+            )
+
+        output = LocalizedOutput("characters", avatar_config)
+        for resolver in self._lang_assets.values():
+            texts = text_batch.resolve(resolver)
+            for key, name, desc in descriptions:
+                if texts[desc] != "":
+                    print(f"Character {key} ({texts[name]}) has a description, but it's not used")
+            output.save(texts)
 
 
 if __name__ == "__main__":
     print("Loading language assets...")
-    lang_assets = load_all_languages()
+    context = load_generator_context([
+        SRIndexCharacterBase,
+        SRIndexCharacterSkills,
+        SRIndexCharacterPromotion,
+        SRIndexCharacterRank,
+    ])
     print("Generating characters...")
-    SRIndexCharacterBase(lang_assets=lang_assets).generate()
+    SRIndexCharacterBase(context=context).generate()
     print(" Generating character skills...")
-    SRIndexCharacterSkills(lang_assets=lang_assets).generate()
+    SRIndexCharacterSkills(context=context).generate()
     print(" Generating character promotions/ascensions...")
-    SRIndexCharacterPromotion(lang_assets=lang_assets).generate()
+    SRIndexCharacterPromotion(context=context).generate()
     print(" Generating character ranks/eidolons...")
-    SRIndexCharacterRank(lang_assets=lang_assets).generate()
+    SRIndexCharacterRank(context=context).generate()
+    report_unhandled_paths()
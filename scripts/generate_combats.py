@@ -1,17 +1,18 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from typing import ClassVar
 
 from sr_common import (
-    LangAssets,
+    BuildContext,
+    IndexRecord,
     SRIndexGenerator,
-    get_available_languages,
+    canonical_asset,
     get_hash_content,
-    load_all_languages,
-    read_config,
+    load_generator_context,
     remap_element_name,
     remap_icon_or_image,
     remap_path_name,
+    report_unhandled_paths,
     save_config,
 )
 from sr_unity import strip_unity_rich_text
@@ -19,8 +20,7 @@ from sr_unity import strip_unity_rich_text
 __all__ = ("SRIndexElements",)
 
 
-@dataclass
-class ElementData:
+class ElementData(IndexRecord):
     id: str
     name: str
     desc: str
@@ -28,8 +28,7 @@ class ElementData:
     icon: str
 
 
-@dataclass
-class PathData:
+class PathData(IndexRecord):
     id: str
     text: str
     name: str
@@ -37,8 +36,7 @@ class PathData:
     icon: str
 
 
-@dataclass
-class PropertyData:
+class PropertyData(IndexRecord):
     type: str
     name: str
     field: str
@@ -50,13 +48,16 @@ class PropertyData:
 
 
 class SRIndexElements(SRIndexGenerator):
-    def __init__(self, *, lang_assets: LangAssets) -> None:
-        self._lang_assets = lang_assets
+    CONFIGS: ClassVar[tuple[str, ...]] = ("DamageType",)
+
+    def __init__(self, *, context: BuildContext) -> None:
+        self._context = context
+        self._lang_assets = context.lang_assets
 
     def generate(self) -> None:
-        raw_data = read_config("DamageType")
+        raw_data = self._context.read_config("DamageType")
 
-        for language in get_available_languages():
+        for language in self._lang_assets:
             parsed_data = {}
             for key, value in raw_data.items():
                 title = get_hash_content(
@@ -74,7 +75,7 @@ class SRIndexElements(SRIndexGenerator):
                     name=title,
                     desc=strip_unity_rich_text(desc, only_tags=["unbreak"]),
                     color=value["Color"],
-                    icon=f"icon/element/{remap_element_name(key)}.png",
+                    icon=canonical_asset(f"icon/element/{remap_element_name(key)}.png"),
                 )
                 parsed_data[remap_element_name(key)] = elem_data
                 if key == "Thunder":
@@ -84,13 +85,16 @@ class SRIndexElements(SRIndexGenerator):
 
 
 class SRIndexPaths(SRIndexGenerator):
-    def __init__(self, *, lang_assets: LangAssets) -> None:
-        self._lang_assets = lang_assets
+    CONFIGS: ClassVar[tuple[str, ...]] = ("AvatarBaseType",)
+
+    def __init__(self, *, context: BuildContext) -> None:
+        self._context = context
+        self._lang_assets = context.lang_assets
 
     def generate(self) -> None:
-        raw_data = read_config("AvatarBaseType")
+        raw_data = self._context.read_config("AvatarBaseType")
 
-        for language in get_available_languages():
+        for language in self._lang_assets:
             parsed_data = {}
             for key, value in raw_data.items():
                 title = get_hash_content(
@@ -111,20 +115,23 @@ class SRIndexPaths(SRIndexGenerator):
                     text=value["FirstWordText"],
                     name=title,
                     desc=strip_unity_rich_text(desc, only_tags=["unbreak"]),
-                    icon=icon_path,
+                    icon=canonical_asset(icon_path),
                 )
 
             save_config("paths", parsed_data, lang=language)
 
 
 class SRIndexProperties(SRIndexGenerator):
-    def __init__(self, *, lang_assets: LangAssets) -> None:
-        self._lang_assets = lang_assets
+    CONFIGS: ClassVar[tuple[str, ...]] = ("AvatarPropertyConfig",)
+
+    def __init__(self, *, context: BuildContext) -> None:
+        self._context = context
+        self._lang_assets = context.lang_assets
 
     def generate(self) -> None:
-        raw_data = read_config("AvatarPropertyConfig")
+        raw_data = self._context.read_config("AvatarPropertyConfig")
 
-        for language in get_available_languages():
+        for language in self._lang_assets:
             parsed_data = {}
             for key, value in raw_data.items():
                 title = get_hash_content(
@@ -151,10 +158,11 @@ class SRIndexProperties(SRIndexGenerator):
 
 if __name__ == "__main__":
     print("Loading language assets...")
-    lang_assets = load_all_languages()
+    context = load_generator_context([SRIndexElements, SRIndexPaths, SRIndexProperties])
     print("Generating elements...")
-    SRIndexElements(lang_assets=lang_assets).generate()
+    SRIndexElements(context=context).generate()
     print("Generating paths...")
-    SRIndexPaths(lang_assets=lang_assets).generate()
+    SRIndexPaths(context=context).generate()
     print("Generating properties...")
-    SRIndexProperties(lang_assets=lang_assets).generate()
+    SRIndexProperties(context=context).generate()
+    report_unhandled_paths()
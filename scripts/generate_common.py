@@ -1,14 +1,13 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from typing import ClassVar
 
 from sr_common import (
-    LangAssets,
+    BuildContext,
+    IndexRecord,
     SRIndexGenerator,
-    get_available_languages,
     get_hash_content,
-    load_all_languages,
-    read_config,
+    load_generator_context,
     save_config,
 )
 from sr_unity import strip_unity_rich_text
@@ -19,21 +18,23 @@ __all__ = (
 )
 
 
-@dataclass
-class LoadingDescData:
+class LoadingDescData(IndexRecord):
     id: str
     title: str
     desc: str
 
 
 class SRIndexDescription(SRIndexGenerator):
-    def __init__(self, *, lang_assets: LangAssets) -> None:
-        self._lang_assets = lang_assets
+    CONFIGS: ClassVar[tuple[str, ...]] = ("LoadingDesc",)
+
+    def __init__(self, *, context: BuildContext) -> None:
+        self._context = context
+        self._lang_assets = context.lang_assets
 
     def generate(self) -> None:
-        raw_desc_data = read_config("LoadingDesc")
+        raw_desc_data = self._context.read_config("LoadingDesc")
 
-        for language in get_available_languages():
+        for language in self._lang_assets:
             desc_load_data = {}
             for key, value in raw_desc_data.items():
                 title = get_hash_content(
@@ -56,15 +57,18 @@ class SRIndexDescription(SRIndexGenerator):
 
 
 class SRIndexNickname(SRIndexGenerator):
-    def __init__(self, *, lang_assets: LangAssets) -> None:
-        self._lang_assets = lang_assets
+    CONFIGS: ClassVar[tuple[str, ...]] = ("AvatarConfig", "EquipmentConfig", "RelicSetConfig")
+
+    def __init__(self, *, context: BuildContext) -> None:
+        self._context = context
+        self._lang_assets = context.lang_assets
 
     def generate(self) -> None:
-        raw_avatar_data = read_config("AvatarConfig")
-        raw_weapon_data = read_config("EquipmentConfig")
-        raw_relics_data = read_config("RelicSetConfig")
+        raw_avatar_data = self._context.read_config("AvatarConfig")
+        raw_weapon_data = self._context.read_config("EquipmentConfig")
+        raw_relics_data = self._context.read_config("RelicSetConfig")
 
-        for language in get_available_languages():
+        for language in self._lang_assets:
             avatar_nick = {}
             for key, value in raw_avatar_data.items():
                 name = get_hash_content(
@@ -103,8 +107,8 @@ class SRIndexNickname(SRIndexGenerator):
 
 if __name__ == "__main__":
     print("Loading language assets...")
-    lang_assets = load_all_languages()
+    context = load_generator_context([SRIndexDescription, SRIndexNickname])
     print("Generating descriptions...")
-    SRIndexDescription(lang_assets=lang_assets).generate()
+    SRIndexDescription(context=context).generate()
     print("Generating nicknames...")
-    SRIndexNickname(lang_assets=lang_assets).generate()
+    SRIndexNickname(context=context).generate()
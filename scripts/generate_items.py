@@ -1,25 +1,27 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Any
+from collections.abc import Iterator
+from typing import ClassVar
 
+from msgspec import Struct
 from sr_common import (
-    LangAssets,
+    BuildContext,
+    Hashable,
+    IndexRecord,
     SRIndexGenerator,
-    get_available_languages,
-    get_hash_content,
-    load_all_languages,
-    read_config,
+    TextResolver,
+    canonical_asset,
+    load_generator_context,
     remap_icon_or_image,
-    save_config,
+    report_unhandled_paths,
+    save_config_stream,
 )
 from sr_unity import strip_unity_rich_text
 
 __all__ = ("SRIndexInventoryItems",)
 
 
-@dataclass
-class ItemData:
+class ItemData(IndexRecord):
     id: str
     name: str
     type: str
@@ -31,9 +33,26 @@ class ItemData:
     come_from: list[str]
 
 
+class _ItemConfig(Struct):
+    ItemName: Hashable
+    ItemDesc: Hashable
+    ItemBGDesc: Hashable
+    ItemMainType: str
+    ItemSubType: str
+    Rarity: str
+    ItemIconPath: str
+
+
+class _ItemComeFromConfig(Struct):
+    Desc: Hashable
+
+
 class SRIndexInventoryItems(SRIndexGenerator):
-    def __init__(self, *, lang_assets: LangAssets) -> None:
-        self._lang_assets = lang_assets
+    CONFIGS: ClassVar[tuple[str, ...]] = ("ItemConfig", "ItemComeFrom")
+
+    def __init__(self, *, context: BuildContext) -> None:
+        self._context = context
+        self._lang_assets = context.lang_assets
 
     def _map_rarity(self, rarity: str) -> int:
         maps = {
@@ -45,19 +64,12 @@ class SRIndexInventoryItems(SRIndexGenerator):
         }
         return maps[rarity]
 
-    def _generate_come_from(self, come_from_raw: dict[str, Any] | None, *, lang: str) -> list[str]:
+    def _generate_come_from(
+        self, come_from_raw: dict[str, _ItemComeFromConfig] | None, *, resolve_text: TextResolver
+    ) -> list[str]:
         if come_from_raw is None:
             return []
-        comes_from = []
-        for value in come_from_raw.values():
-            comes_from.append(
-                get_hash_content(
-                    value["Desc"],
-                    language=lang,
-                    lang_assets=self._lang_assets,
-                )
-            )
-        return comes_from
+        return [resolve_text(value.Desc) for value in come_from_raw.values()]
 
     def _handle_icon_path(self, item_id: str, path: str, sub_type: str):
         if "Testmaterial" in path:
@@ -89,54 +101,52 @@ class SRIndexInventoryItems(SRIndexGenerator):
         disallowed = [str(i) for i in dis_range] + ["149990"]
         return item_id in disallowed
 
+    def _iter_items(
+        self,
+        raw_items_data: dict[str, _ItemConfig],
+        raw_items_come_from: dict[str, dict[str, _ItemComeFromConfig]],
+        *,
+        resolve_text: TextResolver,
+    ) -> Iterator[tuple[str, ItemData]]:
+        # In sorted order, for save_config_stream.
+        for key in sorted(raw_items_data):
+            value = raw_items_data[key]
+            if self._should_skip_item_id(key):
+                continue
+
+            name = resolve_text(value.ItemName)
+            desc = resolve_text(value.ItemDesc)
+            story_desc = resolve_text(value.ItemBGDesc)
+
+            if self._should_ignore_subtype(value.ItemSubType):
+                continue
+
+            yield key, ItemData(
+                id=key,
+                name=name,
+                type=value.ItemMainType,
+                sub_type=value.ItemSubType,
+                rarity=self._map_rarity(value.Rarity),
+                desc=strip_unity_rich_text(desc, only_tags=["unbreak"]),
+                story_desc=strip_unity_rich_text(story_desc, only_tags=["unbreak"]),
+                icon=canonical_asset(self._handle_icon_path(key, value.ItemIconPath, value.ItemSubType)),
+                come_from=self._generate_come_from(raw_items_come_from.get(key), resolve_text=resolve_text),
+            )
+
     def generate(self) -> None:
-        raw_items_data = read_config("ItemConfig")
-        raw_items_come_from = read_config("ItemComeFrom")
-
-        for language in get_available_languages():
-            items_data = {}
-            for key, value in raw_items_data.items():
-                if self._should_skip_item_id(key):
-                    continue
-
-                name = get_hash_content(
-                    value["ItemName"],
-                    language=language,
-                    lang_assets=self._lang_assets,
-                )
-                desc = get_hash_content(
-                    value["ItemDesc"],
-                    language=language,
-                    lang_assets=self._lang_assets,
-                )
-                story_desc = get_hash_content(
-                    value["ItemBGDesc"],
-                    language=language,
-                    lang_assets=self._lang_assets,
-                )
-
-                if self._should_ignore_subtype(value["ItemSubType"]):
-                    continue
-
-                items_data[key] = ItemData(
-                    id=key,
-                    name=name,
-                    type=value["ItemMainType"],
-                    sub_type=value["ItemSubType"],
-                    rarity=self._map_rarity(value["Rarity"]),
-                    desc=strip_unity_rich_text(desc, only_tags=["unbreak"]),
-                    story_desc=strip_unity_rich_text(story_desc, only_tags=["unbreak"]),
-                    icon=self._handle_icon_path(key, value["ItemIconPath"], value["ItemSubType"]),
-                    come_from=self._generate_come_from(raw_items_come_from.get(key), lang=language),
-                )
-
-            print("Saving", len(items_data), "items for language", language, "...")
-
-            save_config("items", items_data, lang=language)
+        raw_items_data = self._context.read_config("ItemConfig", type=_ItemConfig)
+        # Keyed by item ID, then by source.
+        raw_items_come_from = self._context.read_config("ItemComeFrom", type=dict[str, _ItemComeFromConfig])
+
+        for language in self._lang_assets:
+            items = self._iter_items(raw_items_data, raw_items_come_from, resolve_text=self._lang_assets[language])
+            count = save_config_stream("items", items, lang=language)
+            print("Saved", count, "items for language", language)
 
 
 if __name__ == "__main__":
     print("Loading language assets...")
-    lang_assets = load_all_languages()
+    context = load_generator_context([SRIndexInventoryItems])
     print("Generating items...")
-    SRIndexInventoryItems(lang_assets=lang_assets).generate()
+    SRIndexInventoryItems(context=context).generate()
+    report_unhandled_paths()
@@ -1,33 +1,32 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Any
+from typing import Any, ClassVar
 
 from sr_common import (
-    LangAssets,
+    BuildContext,
+    IndexRecord,
     SRIndexGenerator,
-    get_available_languages,
+    canonical_asset,
     get_hash_content,
-    load_all_languages,
-    read_config,
+    load_generator_context,
     save_config,
+    save_shared_config,
 )
+from sr_textref import LocalizedOutput, TextBatch, TextRef
 from sr_unity import strip_unity_rich_text
 
 __all__ = ("SRIndexRelics",)
 
 
-@dataclass
-class RelicPropData:
+class RelicPropData(IndexRecord):
     type: str  # IceAddedRatio, etc
     value: float
 
 
-@dataclass
-class RelicData:
+class RelicData(IndexRecord):
     id: str
     set_id: str
-    name: str
+    name: TextRef
     rarity: int
     type: str
     max_level: int
@@ -36,8 +35,7 @@ class RelicData:
     icon: str
 
 
-@dataclass
-class RelicSetData:
+class RelicSetData(IndexRecord):
     id: str
     name: str
     desc: list[str]
@@ -45,34 +43,33 @@ class RelicSetData:
     icon: str
 
 
-@dataclass
-class RelicAffixPropertyData:
+class RelicAffixPropertyData(IndexRecord):
     affix_id: str
     property: str
     base: float
     step: float
 
 
-@dataclass
 class RelicSubAffixPropertyData(RelicAffixPropertyData):
     step_num: float
 
 
-@dataclass
-class RelicAffixData:
+class RelicAffixData(IndexRecord):
     id: str
     affixes: dict[str, RelicAffixPropertyData]
 
 
-@dataclass
-class RelicSubAffixData:
+class RelicSubAffixData(IndexRecord):
     id: str
     affixes: dict[str, RelicSubAffixPropertyData]
 
 
 class SRIndexRelics(SRIndexGenerator):
-    def __init__(self, *, lang_assets: LangAssets) -> None:
-        self._lang_assets = lang_assets
+    CONFIGS: ClassVar[tuple[str, ...]] = ("RelicConfig", "RelicDataInfo")
+
+    def __init__(self, *, context: BuildContext) -> None:
+        self._context = context
+        self._lang_assets = context.lang_assets
 
     def _do_relic_icon(self, set_id: str | int, type: str):
         type_to_num = {
@@ -86,38 +83,37 @@ class SRIndexRelics(SRIndexGenerator):
         return f"icon/relic/{set_id}_{type_to_num[type]}.png"
 
     def generate(self) -> None:
-        raw_relics_data = read_config("RelicConfig")
-        raw_relics_data_data = read_config("RelicDataInfo")
-
-        for language in get_available_languages():
-            relics_data = {}
-            for key, value in raw_relics_data.items():
-                relic_info = raw_relics_data_data[str(value["SetID"])][value["Type"]]
-
-                name = get_hash_content(
-                    relic_info["RelicName"],
-                    language=language,
-                    lang_assets=self._lang_assets,
-                )
-
-                relics_data[key] = RelicData(
-                    id=key,
-                    set_id=str(value["SetID"]),
-                    name=name,
-                    rarity=int(value["Rarity"].replace("CombatPowerRelicRarity", "")),
-                    type=value["Type"],
-                    max_level=value["MaxLevel"],
-                    main_affix_id=str(value["MainAffixGroup"]),
-                    sub_affix_id=str(value["SubAffixGroup"]),
-                    icon=self._do_relic_icon(value["SetID"], value["Type"]),
-                )
-
-            save_config("relics", relics_data, lang=language)
+        raw_relics_data = self._context.read_config("RelicConfig")
+        raw_relics_data_data = self._context.read_config("RelicDataInfo")
+
+        text_batch = TextBatch()
+        relics_data = {}
+        for key, value in raw_relics_data.items():
+            relic_info = raw_relics_data_data[str(value["SetID"])][value["Type"]]
+
+            relics_data[key] = RelicData(
+                id=key,
+                set_id=str(value["SetID"]),
+                name=text_batch.ref(relic_info["RelicName"]),
+                rarity=int(value["Rarity"].replace("CombatPowerRelicRarity", "")),
+                type=value["Type"],
+                max_level=value["MaxLevel"],
+                main_affix_id=str(value["MainAffixGroup"]),
+                sub_affix_id=str(value["SubAffixGroup"]),
+                icon=canonical_asset(self._do_relic_icon(value["SetID"], value["Type"])),
+            )
+
+        output = LocalizedOutput("relics", relics_data)
+        for resolver in self._lang_assets.values():
+            output.save(text_batch.resolve(resolver))
 
 
 class SRIndexRelicSets(SRIndexGenerator):
-    def __init__(self, *, lang_assets: LangAssets) -> None:
-        self._lang_assets = lang_assets
+    CONFIGS: ClassVar[tuple[str, ...]] = ("RelicSetConfig", "RelicSetSkillConfig")
+
+    def __init__(self, *, context: BuildContext) -> None:
+        self._context = context
+        self._lang_assets = context.lang_assets
 
     def _find_prop_name(self, relic_data: dict[str, Any]) -> tuple[str, str]:
         item_101_2_props = relic_data["101"]["2"]["PropertyList"][0]
@@ -135,12 +131,12 @@ class SRIndexRelicSets(SRIndexGenerator):
         return relic_prop_name, relic_prop_value
 
     def generate(self) -> None:
-        raw_relics_data = read_config("RelicSetConfig")
-        raw_relic_skills_data = read_config("RelicSetSkillConfig")
+        raw_relics_data = self._context.read_config("RelicSetConfig")
+        raw_relic_skills_data = self._context.read_config("RelicSetSkillConfig")
 
         rprop_name, rprop_value = self._find_prop_name(raw_relic_skills_data)
 
-        for language in get_available_languages():
+        for language in self._lang_assets:
             relics_data = {}
             for key, value in raw_relics_data.items():
                 name = get_hash_content(
@@ -178,75 +174,84 @@ class SRIndexRelicSets(SRIndexGenerator):
                     name=name,
                     desc=desc_flatten,
                     properties=properties_flatten,
-                    icon=f"icon/relic/{key}.png",
+                    icon=canonical_asset(f"icon/relic/{key}.png"),
                 )
 
             save_config("relic_sets", relics_data, lang=language)
 
 
 class SRIndexRelicMainStats(SRIndexGenerator):
-    def __init__(self, *, lang_assets: LangAssets) -> None:
-        self._lang_assets = lang_assets
+    CONFIGS: ClassVar[tuple[str, ...]] = ("RelicMainAffixConfig",)
 
-    def generate(self) -> None:
-        raw_relics_data = read_config("RelicMainAffixConfig")
-
-        for language in get_available_languages():
-            relics_data = {}
-            for key, value in raw_relics_data.items():
-                affix_data = {}
-                for kaffix, vaffix in value.items():
-                    affix_data[kaffix] = RelicAffixPropertyData(
-                        affix_id=str(vaffix["AffixID"]),
-                        property=vaffix["Property"],
-                        base=vaffix["BaseValue"]["Value"],
-                        step=vaffix["LevelAdd"]["Value"],
-                    )
+    def __init__(self, *, context: BuildContext) -> None:
+        self._context = context
+        self._lang_assets = context.lang_assets
 
-                relics_data[key] = RelicAffixData(
-                    id=key,
-                    affixes=affix_data,
+    def generate(self) -> None:
+        raw_relics_data = self._context.read_config("RelicMainAffixConfig")
+
+        relics_data = {}
+        for key, value in raw_relics_data.items():
+            affix_data = {}
+            for kaffix, vaffix in value.items():
+                affix_data[kaffix] = RelicAffixPropertyData(
+                    affix_id=str(vaffix["AffixID"]),
+                    property=vaffix["Property"],
+                    base=vaffix["BaseValue"]["Value"],
+                    step=vaffix["LevelAdd"]["Value"],
                 )
 
-            save_config("relic_main_affixes", relics_data, lang=language)
+            relics_data[key] = RelicAffixData(
+                id=key,
+                affixes=affix_data,
+            )
 
+        save_shared_config("relic_main_affixes", relics_data, langs=self._lang_assets)
 
-class SRIndexRelicSubStats(SRIndexGenerator):
-    def __init__(self, *, lang_assets: LangAssets) -> None:
-        self._lang_assets = lang_assets
 
-    def generate(self) -> None:
-        raw_relics_data = read_config("RelicSubAffixConfig")
+class SRIndexRelicSubStats(SRIndexGenerator):
+    CONFIGS: ClassVar[tuple[str, ...]] = ("RelicSubAffixConfig",)
 
-        for language in get_available_languages():
-            relics_data = {}
-            for key, value in raw_relics_data.items():
-                affix_data = {}
-                for kaffix, vaffix in value.items():
-                    affix_data[kaffix] = RelicSubAffixPropertyData(
-                        affix_id=str(vaffix["AffixID"]),
-                        property=vaffix["Property"],
-                        base=vaffix["BaseValue"]["Value"],
-                        step=vaffix["StepValue"]["Value"],
-                        step_num=vaffix["StepNum"],
-                    )
+    def __init__(self, *, context: BuildContext) -> None:
+        self._context = context
+        self._lang_assets = context.lang_assets
 
-                relics_data[key] = RelicSubAffixData(
-                    id=key,
-                    affixes=affix_data,
+    def generate(self) -> None:
+        raw_relics_data = self._context.read_config("RelicSubAffixConfig")
+
+        relics_data = {}
+        for key, value in raw_relics_data.items():
+            affix_data = {}
+            for kaffix, vaffix in value.items():
+                affix_data[kaffix] = RelicSubAffixPropertyData(
+                    affix_id=str(vaffix["AffixID"]),
+                    property=vaffix["Property"],
+                    base=vaffix["BaseValue"]["Value"],
+                    step=vaffix["StepValue"]["Value"],
+                    step_num=vaffix["StepNum"],
                 )
 
-            save_config("relic_sub_affixes", relics_data, lang=language)
+            relics_data[key] = RelicSubAffixData(
+                id=key,
+                affixes=affix_data,
+            )
+
+        save_shared_config("relic_sub_affixes", relics_data, langs=self._lang_assets)
 
 
 if __name__ == "__main__":
     print("Loading language assets...")
-    lang_assets = load_all_languages()
+    context = load_generator_context([
+        SRIndexRelics,
+        SRIndexRelicSets,
+        SRIndexRelicMainStats,
+        SRIndexRelicSubStats,
+    ])
     print("Generating relics...")
-    SRIndexRelics(lang_assets=lang_assets).generate()
+    SRIndexRelics(context=context).generate()
     print(" Generating sets...")
-    SRIndexRelicSets(lang_assets=lang_assets).generate()
+    SRIndexRelicSets(context=context).generate()
     print(" Generating main stats groups...")
-    SRIndexRelicMainStats(lang_assets=lang_assets).generate()
+    SRIndexRelicMainStats(context=context).generate()
     print(" Generating sub stats groups...")
-    SRIndexRelicSubStats(lang_assets=lang_assets).generate()
+    SRIndexRelicSubStats(context=context).generate()
@@ -1,17 +1,17 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from typing import ClassVar
 
 from sr_common import (
-    LangAssets,
+    BuildContext,
+    IndexRecord,
     SRIndexGenerator,
-    get_available_languages,
-    get_hash_content,
-    load_all_languages,
-    read_config,
+    canonical_asset,
+    load_generator_context,
     save_config,
+    save_shared_config,
 )
-from sr_unity import strip_unity_rich_text
+from sr_textref import LocalizedOutput, TextBatch, TextRef
 
 __all__ = (
     "SRIndexLightCones",
@@ -20,42 +20,36 @@ __all__ = (
 )
 
 
-@dataclass
-class WeaponPromoValue:
+class WeaponPromoValue(IndexRecord):
     base: float
     step: float
 
 
-@dataclass
-class WeaponIDNum:
+class WeaponIDNum(IndexRecord):
     id: str
     num: int
 
 
-@dataclass
-class WeaponPropertyData:
+class WeaponPropertyData(IndexRecord):
     type: str  # IceAddedRatio, etc
     value: float
 
 
-@dataclass
-class WeaponPromoData:
+class WeaponPromoData(IndexRecord):
     id: str
     values: list[dict[str, WeaponPromoValue]]
     materials: list[list[WeaponIDNum]]
 
 
-@dataclass
-class WeaponRankData:
+class WeaponRankData(IndexRecord):
     id: str
-    skill: str
-    desc: str
+    skill: TextRef
+    desc: TextRef
     params: list[list[float]]
     properties: list[list[WeaponPropertyData]]
 
 
-@dataclass
-class AvatarSkillData:
+class AvatarSkillData(IndexRecord):
     id: str
     name: str
     max_level: int
@@ -70,15 +64,13 @@ class AvatarSkillData:
     icon: str
 
 
-@dataclass
-class AvatarSkillTreeLevelData:
+class AvatarSkillTreeLevelData(IndexRecord):
     promotion: int
     properties: list[WeaponPropertyData]
     materials: list[WeaponIDNum]
 
 
-@dataclass
-class AvatarSkillTreeData:
+class AvatarSkillTreeData(IndexRecord):
     id: str
     name: str
     max_level: int
@@ -90,113 +82,111 @@ class AvatarSkillTreeData:
     levels: list[AvatarSkillTreeLevelData]
 
 
-@dataclass
-class WeaponData:
+class WeaponData(IndexRecord):
     id: str
-    name: str
+    name: TextRef
     rarity: int
     path: str
-    desc: str
+    desc: TextRef
     icon: str
     preview: str
     portrait: str
 
 
 class SRIndexLightConePromotion(SRIndexGenerator):
-    def __init__(self, *, lang_assets: LangAssets) -> None:
-        self._lang_assets = lang_assets
+    CONFIGS: ClassVar[tuple[str, ...]] = ("EquipmentPromotionConfig",)
+
+    def __init__(self, *, context: BuildContext) -> None:
+        self._context = context
+        self._lang_assets = context.lang_assets
 
     def generate(self) -> None:
-        raw_weapon_config = read_config("EquipmentPromotionConfig")
-
-        for language in get_available_languages():
-            weapon_config = {}
-
-            for key, value_base in raw_weapon_config.items():
-                all_promo_keys: list[dict[str, WeaponPromoValue]] = []
-                materials_comp: list[list[WeaponIDNum]] = []
-                for value in value_base.values():
-                    materials: list[WeaponIDNum] = []
-                    for mat in value["PromotionCostList"]:
-                        materials.append(
-                            WeaponIDNum(
-                                id=str(mat["ItemID"]),
-                                num=mat["ItemNum"],
-                            )
+        raw_weapon_config = self._context.read_config("EquipmentPromotionConfig")
+
+        # Nothing in here is translated, build it once and share it with every language.
+        weapon_config = {}
+        for key, value_base in raw_weapon_config.items():
+            all_promo_keys: list[dict[str, WeaponPromoValue]] = []
+            materials_comp: list[list[WeaponIDNum]] = []
+            for value in value_base.values():
+                materials: list[WeaponIDNum] = []
+                for mat in value["PromotionCostList"]:
+                    materials.append(
+                        WeaponIDNum(
+                            id=str(mat["ItemID"]),
+                            num=mat["ItemNum"],
                         )
-                    materials_comp.append(materials)
-
-                    promo_keys: dict[str, WeaponPromoValue] = {
-                        "hp": WeaponPromoValue(
-                            base=value["BaseHP"]["Value"],
-                            step=round(value["BaseHPAdd"]["Value"], 2),
-                        ),
-                        "atk": WeaponPromoValue(
-                            base=round(value["BaseAttack"]["Value"], 2),
-                            step=round(value["BaseAttackAdd"]["Value"], 2),
-                        ),
-                        "def": WeaponPromoValue(
-                            base=round(value["BaseDefence"]["Value"], 2),
-                            step=round(value["BaseDefenceAdd"]["Value"], 2),
-                        ),
-                    }
-                    all_promo_keys.append(promo_keys)
-                weapon_config[key] = WeaponPromoData(
-                    id=key,
-                    values=all_promo_keys,
-                    materials=materials_comp,
-                )
-
-            save_config("light_cone_promotions", weapon_config, lang=language)
+                    )
+                materials_comp.append(materials)
+
+                promo_keys: dict[str, WeaponPromoValue] = {
+                    "hp": WeaponPromoValue(
+                        base=value["BaseHP"]["Value"],
+                        step=round(value["BaseHPAdd"]["Value"], 2),
+                    ),
+                    "atk": WeaponPromoValue(
+                        base=round(value["BaseAttack"]["Value"], 2),
+                        step=round(value["BaseAttackAdd"]["Value"], 2),
+                    ),
+                    "def": WeaponPromoValue(
+                        base=round(value["BaseDefence"]["Value"], 2),
+                        step=round(value["BaseDefenceAdd"]["Value"], 2),
+                    ),
+                }
+                all_promo_keys.append(promo_keys)
+            weapon_config[key] = WeaponPromoData(
+                id=key,
+                values=all_promo_keys,
+                materials=materials_comp,
+            )
+
+        save_shared_config("light_cone_promotions", weapon_config, langs=self._lang_assets)
 
 
 class SRIndexLightConeRank(SRIndexGenerator):
-    def __init__(self, *, lang_assets: LangAssets) -> None:
-        self._lang_assets = lang_assets
+    CONFIGS: ClassVar[tuple[str, ...]] = ("EquipmentSkillConfig",)
+
+    def __init__(self, *, context: BuildContext) -> None:
+        self._context = context
+        self._lang_assets = context.lang_assets
 
     def generate(self) -> None:
-        raw_weapon_config = read_config("EquipmentSkillConfig")
-
-        for language in get_available_languages():
-            weapon_config = {}
-
-            for _key, value in raw_weapon_config.items():
-                first_val = value["1"]
-                name = get_hash_content(
-                    first_val["SkillName"],
-                    language=language,
-                    lang_assets=self._lang_assets,
-                )
-                desc = get_hash_content(
-                    first_val["SkillDesc"],
-                    language=language,
-                    lang_assets=self._lang_assets,
-                )
-
-                params_flatten = []
-                properties_flatten = []
-                for level_val in value.values():
-                    params_flatten.append([round(param["Value"], 3) for param in level_val["ParamList"]])
-                    prop_ads = [
-                        WeaponPropertyData(type=prop["PropertyType"], value=round(prop["Value"]["Value"], 3))
-                        for prop in level_val["AbilityProperty"]
-                    ] or []
-                    properties_flatten.append(prop_ads)
-
-                weapon_config[_key] = WeaponRankData(
-                    id=_key,
-                    skill=name,
-                    desc=strip_unity_rich_text(desc, only_tags=["unbreak"]),
-                    params=params_flatten,
-                    properties=properties_flatten,
-                )
-
-            save_config("light_cone_ranks", weapon_config, lang=language)
+        raw_weapon_config = self._context.read_config("EquipmentSkillConfig")
+
+        text_batch = TextBatch()
+        weapon_config = {}
+        for key, value in raw_weapon_config.items():
+            first_val = value["1"]
+
+            params_flatten = []
+            properties_flatten = []
+            for level_val in value.values():
+                params_flatten.append([round(param["Value"], 3) for param in level_val["ParamList"]])
+                prop_ads = [
+                    WeaponPropertyData(type=prop["PropertyType"], value=round(prop["Value"]["Value"], 3))
+                    for prop in level_val["AbilityProperty"]
+                ] or []
+                properties_flatten.append(prop_ads)
+
+            weapon_config[key] = WeaponRankData(
+                id=key,
+                skill=text_batch.ref(first_val["SkillName"]),
+                desc=text_batch.ref(first_val["SkillDesc"], strip=True, only_tags=["unbreak"]),
+                params=params_flatten,
+                properties=properties_flatten,
+            )
+
+        for language, resolver in self._lang_assets.items():
+            texts = text_batch.resolve(resolver)
+            save_config("light_cone_ranks", weapon_config, lang=language, default=texts.default)
 
 
 class SRIndexLightCones(SRIndexGenerator):
-    def __init__(self, *, lang_assets: LangAssets) -> None:
-        self._lang_assets = lang_assets
+    CONFIGS: ClassVar[tuple[str, ...]] = ("EquipmentConfig",)
+
+    def __init__(self, *, context: BuildContext) -> None:
+        self._context = context
+        self._lang_assets = context.lang_assets
 
     @staticmethod
     def _get_skill_trees(chara_id: str, skill_trees: list[str]) -> list[str]:
@@ -207,45 +197,41 @@ class SRIndexLightCones(SRIndexGenerator):
         return skill_trees_comp
 
     def generate(self) -> None:
-        raw_weapon_config = read_config("EquipmentConfig")
-
-        for language in get_available_languages():
-            weapon_config = {}
-
-            for _key, value_base in raw_weapon_config.items():
-                name = get_hash_content(
-                    value_base["EquipmentName"],
-                    language=language,
-                    lang_assets=self._lang_assets,
-                )
-                desc = get_hash_content(
-                    value_base["EquipmentDesc"],
-                    language=language,
-                    lang_assets=self._lang_assets,
-                )
-                if desc != "":
-                    print(f"Character {_key} ({name}) has a description, but it's not used")
-
-                weapon_config[_key] = WeaponData(
-                    id=_key,
-                    name=name,
-                    desc=strip_unity_rich_text(desc, only_tags=["unbreak"]),
-                    rarity=int(value_base["Rarity"].replace("CombatPowerLightconeRarity", "")),
-                    path=value_base["AvatarBaseType"],
-                    icon=f"icon/light_cone/{_key}.png",
-                    preview=f"image/light_cone_preview/{_key}.png",
-                    portrait=f"image/light_cone_portrait/{_key}.png",
-                )
-
-            save_config("light_cones", weapon_config, lang=language)
+        raw_weapon_config = self._context.read_config("EquipmentConfig")
+
+        text_batch = TextBatch()
+        descriptions: list[tuple[str, TextRef, TextRef]] = []
+        weapon_config = {}
+        for key, value_base in raw_weapon_config.items():
+            name = text_batch.ref(value_base["EquipmentName"])
+            descriptions.append((key, name, text_batch.ref(value_base["EquipmentDesc"])))
+
+            weapon_config[key] = WeaponData(
+                id=key,
+                name=name,
+                desc=text_batch.ref(value_base["EquipmentDesc"], strip=True, only_tags=["unbreak"]),
+                rarity=int(value_base["Rarity"].replace("CombatPowerLightconeRarity", "")),
+                path=value_base["AvatarBaseType"],
+                icon=canonical_asset(f"icon/light_cone/{key}.png"),
+                preview=canonical_asset(f"image/light_cone_preview/{key}.png"),
+                portrait=canonical_asset(f"image/light_cone_portrait/{key}.png"),
+            )
+
+        output = LocalizedOutput("light_cones", weapon_config)
+        for resolver in self._lang_assets.values():
+            texts = text_batch.resolve(resolver)
+            for key, name, desc in descriptions:
+                if texts[desc] != "":
+                    print(f"Character {key} ({texts[name]}) has a description, but it's not used")
+            output.save(texts)
 
 
 if __name__ == "__main__":
     print("Loading language assets...")
-    lang_assets = load_all_languages()
+    context = load_generator_context([SRIndexLightCones, SRIndexLightConePromotion, SRIndexLightConeRank])
     print("Generating light cones...")
-    SRIndexLightCones(lang_assets=lang_assets).generate()
+    SRIndexLightCones(context=context).generate()
     print(" Generating promotions/ascensions...")
-    SRIndexLightConePromotion(lang_assets=lang_assets).generate()
+    SRIndexLightConePromotion(context=context).generate()
     print(" Generating ranks/superimpose...")
-    SRIndexLightConeRank(lang_assets=lang_assets).generate()
+    SRIndexLightConeRank(context=context).generate()
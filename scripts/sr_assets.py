@@ -0,0 +1,210 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import struct
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, TypeVar
+
+import msgspec
+from sr_cache import file_digest
+from sr_common import CACHE_DIR, INDEX_DIR, ROOT_DIR
+
+__all__ = (
+    "ASSETS_MANIFEST_PATH",
+    "ASSET_ROOTS",
+    "AssetEntry",
+    "PngHeader",
+    "build_asset_manifest",
+    "digest_assets",
+    "iter_asset_files",
+    "load_asset_manifest",
+    "read_manifest",
+    "read_png_header",
+    "save_asset_manifest",
+    "scan_assets",
+    "write_manifest",
+)
+
+# The asset folders, every string starting with one of them in an index file is an asset reference.
+ASSET_ROOTS = ("icon", "image")
+ASSETS_MANIFEST_PATH = INDEX_DIR / "assets_manifest.json"
+# path -> (size, mtime_ns) of every asset when the manifest was built, kept out of the manifest
+# so it stays the same on every checkout.
+_ASSET_STAMPS_PATH = CACHE_DIR / "asset_stamps.json"
+# Bump this whenever the manifest layout changes, every asset is read again once.
+_MANIFEST_VERSION = 1
+_T = TypeVar("_T")
+
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+# signature | chunk length | chunk type | width | height | bit depth | color type
+_PNG_IHDR = struct.Struct(">8sI4sIIBB")
+# (bit depth, color type) -> Pillow mode
+_PNG_MODES = {
+    (1, 0): "1",
+    (2, 0): "L",
+    (4, 0): "L",
+    (8, 0): "L",
+    (16, 0): "I;16",
+    (8, 2): "RGB",
+    (16, 2): "RGB",
+    (1, 3): "P",
+    (2, 3): "P",
+    (4, 3): "P",
+    (8, 3): "P",
+    (8, 4): "LA",
+    (16, 4): "RGBA",
+    (8, 6): "RGBA",
+    (16, 6): "RGBA",
+}
+
+
+@dataclass
+class PngHeader:
+    width: int
+    height: int
+    bit_depth: int
+    color_type: int
+    mode: str
+
+
+@dataclass
+class AssetEntry:
+    size: int
+    digest: str
+    width: int | None = None
+    height: int | None = None
+    mode: str | None = None
+
+
+class _AssetManifest(msgspec.Struct):
+    version: int
+    algorithm: str
+    assets: dict[str, AssetEntry]
+
+
+def read_png_header(path: Path) -> PngHeader | None:
+    """Read the size and mode of a PNG from its IHDR chunk, without decoding anything."""
+    with path.open("rb") as fp:
+        head = fp.read(_PNG_IHDR.size)
+    if len(head) < _PNG_IHDR.size:
+        return None
+    signature, _, chunk_type, width, height, bit_depth, color_type = _PNG_IHDR.unpack(head)
+    if signature != _PNG_SIGNATURE or chunk_type != b"IHDR":
+        return None
+    return PngHeader(width, height, bit_depth, color_type, _PNG_MODES.get((bit_depth, color_type), "unknown"))
+
+
+def iter_asset_files(root: Path = ROOT_DIR, asset_roots: tuple[str, ...] = ASSET_ROOTS) -> Iterator[os.DirEntry]:
+    """Walk the asset folders with ``os.scandir``, yielding every file."""
+    pending = [root / asset_root for asset_root in asset_roots]
+    while pending:
+        folder = pending.pop()
+        try:
+            entries = os.scandir(folder)
+        except FileNotFoundError:
+            continue
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append(Path(entry.path))
+                else:
+                    yield entry
+
+
+def _asset_key(entry: os.DirEntry, root: Path) -> str:
+    # The same relative paths the index files use, e.g. icon/character/1001.png
+    return Path(entry.path).relative_to(root).as_posix()
+
+
+def scan_assets(root: Path = ROOT_DIR, asset_roots: tuple[str, ...] = ASSET_ROOTS) -> set[str]:
+    """Return the path, relative to ``root``, of every file in the asset folders."""
+    return {_asset_key(entry, root) for entry in iter_asset_files(root, asset_roots)}
+
+
+def digest_assets(assets: dict[str, AssetEntry], *settings: object) -> str:
+    """A single digest of a set of assets and the settings of what is built from them."""
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(repr(settings).encode("utf-8"))
+    for key in sorted(assets):
+        digest.update(f"{key}={assets[key].digest};".encode())
+    return digest.hexdigest()
+
+
+def _read_asset(path: Path, size: int) -> AssetEntry:
+    entry = AssetEntry(size=size, digest=file_digest(path))
+    if path.suffix.lower() == ".png":
+        header = read_png_header(path)
+        if header is not None:
+            entry.width, entry.height, entry.mode = header.width, header.height, header.mode
+    return entry
+
+
+def read_manifest(path: Path, type: type[_T]) -> _T | None:
+    """Read a manifest or ledger, ``None`` when it is missing or has another layout."""
+    try:
+        return msgspec.json.decode(path.read_bytes(), type=type)
+    except (OSError, msgspec.ValidationError, msgspec.DecodeError):
+        return None
+
+
+def write_manifest(path: Path, data: Any) -> None:
+    """Atomically write a manifest or ledger, with sorted keys so the same data gives the same bytes."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_name(f"{path.name}.tmp")
+    temp_path.write_bytes(msgspec.json.Encoder(order="sorted").encode(data))
+    temp_path.replace(path)
+
+
+def load_asset_manifest(path: Path = ASSETS_MANIFEST_PATH) -> dict[str, AssetEntry]:
+    manifest = read_manifest(path, _AssetManifest)
+    if manifest is None or manifest.version != _MANIFEST_VERSION:
+        return {}
+    return manifest.assets
+
+
+def build_asset_manifest(
+    previous: dict[str, AssetEntry] | None = None,
+    *,
+    root: Path = ROOT_DIR,
+    asset_roots: Iterable[str] = ASSET_ROOTS,
+    workers: int | None = None,
+) -> tuple[dict[str, AssetEntry], dict[str, tuple[int, int]], int]:
+    """Describe every asset, return the manifest, the stamps to save with it and how many assets were read again.
+
+    An asset whose size and mtime did not change since ``previous`` was built keeps its
+    entry, the other ones are hashed and have their PNG header read over a thread pool
+    (both mostly wait on the disk or run in hashlib, which releases the GIL).
+    """
+
+    previous = previous or {}
+    stamps = (read_manifest(_ASSET_STAMPS_PATH, dict[str, tuple[int, int]]) or {}) if previous else {}
+    manifest: dict[str, AssetEntry] = {}
+    new_stamps: dict[str, tuple[int, int]] = {}
+    stale: list[tuple[str, Path, int]] = []
+    for entry in iter_asset_files(root, tuple(asset_roots)):
+        key = _asset_key(entry, root)
+        stat = entry.stat()
+        new_stamps[key] = (stat.st_size, stat.st_mtime_ns)
+        known = previous.get(key)
+        if known is not None and stamps.get(key) == new_stamps[key]:
+            manifest[key] = known
+        else:
+            stale.append((key, Path(entry.path), stat.st_size))
+
+    if stale:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = executor.map(lambda item: _read_asset(item[1], item[2]), stale)
+            for (key, _, _), asset in zip(stale, results, strict=True):
+                manifest[key] = asset
+    return dict(sorted(manifest.items())), new_stamps, len(stale)
+
+
+def save_asset_manifest(
+    assets: dict[str, AssetEntry], stamps: dict[str, tuple[int, int]], path: Path = ASSETS_MANIFEST_PATH
+) -> None:
+    write_manifest(path, _AssetManifest(version=_MANIFEST_VERSION, algorithm="blake2b-160", assets=assets))
+    write_manifest(_ASSET_STAMPS_PATH, stamps)
@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import hashlib
+import inspect
+from pathlib import Path
+from typing import Any
+
+import orjson
+from sr_cache import fingerprint
+from sr_common import (
+    ASSET_ALIASES_PATH,
+    BASE_INDEX_DIR,
+    CACHE_DIR,
+    CONFIG_DIR,
+    INDEX_DIR,
+    IORecord,
+    SRIndexGenerator,
+    get_output_layout,
+)
+
+__all__ = (
+    "LEDGER_PATH",
+    "BuildLedger",
+    "generator_key",
+)
+
+LEDGER_PATH = CACHE_DIR / "build_ledger.json"
+# Bump this whenever the ledger layout changes, every generator is rebuilt once.
+_LEDGER_VERSION = 1
+_SCRIPTS_DIR = Path(__file__).absolute().parent
+
+
+def generator_key(generator: type[SRIndexGenerator]) -> str:
+    return f"{generator.__module__}.{generator.__qualname__}"
+
+
+class BuildLedger:
+    """Content hashes of what each generator read and wrote on its last run.
+
+    A generator only has to run again for a language when its code, one of its
+    configs or the textmap of that language changed, or when one of its outputs
+    went missing or was modified by hand.
+    """
+
+    def __init__(self, path: Path = LEDGER_PATH) -> None:
+        self.path = path
+        data: dict[str, Any] = {}
+        if path.exists():
+            try:
+                data = orjson.loads(path.read_bytes())
+            except orjson.JSONDecodeError:
+                data = {}
+        if data.get("version") != _LEDGER_VERSION:
+            data = {}
+        self._generators: dict[str, dict[str, Any]] = data.get("generators", {})
+        self._files: dict[str, dict[str, Any]] = data.get("files", {})
+        self._code_digests: dict[str, str] = {}
+
+    def _file_digest(self, path: Path) -> str | None:
+        if not path.exists():
+            self._files.pop(str(path), None)
+            return None
+        stamp = fingerprint(path, self._files.get(str(path)))
+        self._files[str(path)] = stamp
+        return stamp["digest"]
+
+    def _code_digest(self, generator: type[SRIndexGenerator]) -> str:
+        # The generator module itself, every shared sr_* helper module it may rely on and the
+        # asset aliases the emitted asset paths go through.
+        module_path = Path(inspect.getfile(generator)).absolute()
+        cached = self._code_digests.get(str(module_path))
+        if cached is not None:
+            return cached
+        digest = hashlib.blake2b(digest_size=20)
+        for path in [module_path, *sorted(_SCRIPTS_DIR.glob("sr_*.py")), ASSET_ALIASES_PATH]:
+            digest.update(path.name.encode("utf-8"))
+            digest.update((self._file_digest(path) or "").encode("utf-8"))
+        self._code_digests[str(module_path)] = digest.hexdigest()
+        return self._code_digests[str(module_path)]
+
+    def plan(
+        self,
+        generator: type[SRIndexGenerator],
+        languages: list[str],
+        textmaps: dict[str, dict[str, Any]],
+        *,
+        declared_configs: list[str] | None = None,
+    ) -> dict[str, str]:
+        """Return the languages the generator has to be run for, and why."""
+        entry = self._generators.get(generator_key(generator))
+        if entry is None:
+            return {language: "never built" for language in languages}
+        if entry["code"] != self._code_digest(generator):
+            return {language: "code or asset aliases changed" for language in languages}
+        if entry.get("layout", "merged") != get_output_layout():
+            return {language: "output layout changed" for language in languages}
+        for name, digest in entry.get("base_outputs", {}).items():
+            output_digest = self._file_digest(BASE_INDEX_DIR / name)
+            if output_digest != digest:
+                state = "missing" if output_digest is None else "modified"
+                return {language: f"{BASE_INDEX_DIR.name}/{name} {state}" for language in languages}
+
+        configs: dict[str, str | None] = entry["configs"]
+        changed = [name for name in declared_configs or [] if name.removesuffix(".json") not in configs]
+        for name, digest in configs.items():
+            if self._file_digest(CONFIG_DIR / f"{name}.json") != digest:
+                changed.append(name)
+        if changed:
+            return {language: f"config {', '.join(changed)} changed" for language in languages}
+
+        reasons: dict[str, str] = {}
+        for language in languages:
+            built = entry["languages"].get(language)
+            if built is None:
+                reasons[language] = "never built for this language"
+                continue
+            if built["textmap"] != textmaps[language]["digest"]:
+                reasons[language] = "textmap changed"
+                continue
+            for name, digest in built["outputs"].items():
+                output_digest = self._file_digest(INDEX_DIR / language / name)
+                if output_digest != digest:
+                    reasons[language] = f"{name} {'missing' if output_digest is None else 'modified'}"
+                    break
+        return reasons
+
+    def record(
+        self,
+        generator: type[SRIndexGenerator],
+        io: IORecord,
+        languages: list[str],
+        textmaps: dict[str, dict[str, Any]],
+    ) -> None:
+        """Store what a successful run of the generator for ``languages`` read and wrote."""
+        entry = self._generators.setdefault(generator_key(generator), {"languages": {}})
+        entry["code"] = self._code_digest(generator)
+        entry["configs"] = {name: self._file_digest(CONFIG_DIR / f"{name}.json") for name in io.configs}
+        entry["layout"] = get_output_layout()
+        entry["base_outputs"] = {
+            name: self._file_digest(BASE_INDEX_DIR / name) for name in io.outputs.get(BASE_INDEX_DIR.name, [])
+        }
+        for language in languages:
+            entry["languages"][language] = {
+                "textmap": textmaps[language]["digest"],
+                "outputs": {
+                    name: self._file_digest(INDEX_DIR / language / name) for name in io.outputs.get(language, [])
+                },
+            }
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.path.with_name(f"{self.path.name}.tmp")
+        data = {"version": _LEDGER_VERSION, "generators": self._generators, "files": self._files}
+        temp_path.write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+        temp_path.replace(self.path)
@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import mmap
+import struct
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import msgspec
+from sr_common import ROOT_DIR
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+if TYPE_CHECKING:
+    from PIL.Image import Image as PILImage
+
+__all__ = (
+    "ICON_BUNDLE_PATH",
+    "BundleEntry",
+    "IconBundle",
+    "write_icon_bundle",
+)
+
+ICON_BUNDLE_PATH = ROOT_DIR / "bundle" / "icons.rgba"
+# File layout (little-endian):
+#   header | index (JSON) | pad to 64 | pixels, every image starting on a 64 bytes boundary
+# The pixels are 8-bit premultiplied RGBA, row after row with no stride padding.
+_MAGIC = b"QQRB"
+_VERSION = 1
+_HEADER = struct.Struct("<4sHHQQ")  # magic, version, reserved, index size, pixels size
+_ALIGN = 64
+
+
+def _align(position: int, size: int = _ALIGN) -> int:
+    return (position + size - 1) // size * size
+
+
+@dataclass
+class BundleEntry:
+    size: int
+    width: int
+    height: int
+    offset: int
+
+
+class _BundleIndex(msgspec.Struct):
+    source_digest: str
+    entries: dict[str, list[BundleEntry]]
+
+
+def write_icon_bundle(
+    images: Iterable[tuple[str, int, int, int, bytes]], *, source_digest: str, output: Path = ICON_BUNDLE_PATH
+) -> None:
+    """Write the ``(path, size, width, height, premultiplied RGBA)`` images into a bundle.
+
+    ``size`` is the render size the image was decoded for, an icon can be bundled at several.
+    """
+
+    entries: dict[str, list[BundleEntry]] = {}
+    pixels = bytearray()
+    for key, size, width, height, data in images:
+        if len(data) != width * height * 4:
+            raise ValueError(f"{key} at {size}px is not {width}x{height} RGBA")
+        offset = _align(len(pixels))
+        pixels.extend(b"\0" * (offset - len(pixels)))
+        pixels.extend(data)
+        entries.setdefault(key, []).append(BundleEntry(size, width, height, offset))
+
+    index = msgspec.json.encode(_BundleIndex(source_digest=source_digest, entries=entries))
+    header = _HEADER.pack(_MAGIC, _VERSION, 0, len(index), len(pixels))
+    padding = _align(len(header) + len(index)) - len(header) - len(index)
+
+    output.parent.mkdir(parents=True, exist_ok=True)
+    # Replaced, not rewritten in place, so the processes still mapping the old bundle keep a valid view.
+    temp_output = output.with_name(output.name + ".tmp")
+    with temp_output.open("wb") as fp:
+        fp.write(header)
+        fp.write(index)
+        fp.write(b"\0" * padding)
+        fp.write(pixels)
+    temp_output.replace(output)
+
+
+class IconBundle:
+    """A read-only, memory-mapped view of the pre-decoded icons.
+
+    :meth:`buffer` slices the mapping without copying, so every process mapping the bundle
+    shares the same page cache. :meth:`image` copies the pixels into a Pillow image, which
+    cannot map ``RGBa`` pixels in place.
+    """
+
+    def __init__(self, path: Path = ICON_BUNDLE_PATH) -> None:
+        self.path = path
+        with path.open("rb") as fp:
+            self._mmap = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, version, _, index_size, pixels_size = _HEADER.unpack_from(self._mmap, 0)
+        except struct.error as exc:
+            self._mmap.close()
+            raise ValueError(f"{path} is not an icon bundle") from exc
+        if magic != _MAGIC or version != _VERSION:
+            self._mmap.close()
+            raise ValueError(f"{path} is not an icon bundle (or was built by an older version)")
+
+        index = msgspec.json.decode(self._mmap[_HEADER.size : _HEADER.size + index_size], type=_BundleIndex)
+        self.source_digest = index.source_digest
+        self._entries = {(key, entry.size): entry for key, entries in index.entries.items() for entry in entries}
+        position = _align(_HEADER.size + index_size)
+        self._pixels = memoryview(self._mmap)[position : position + pixels_size]
+
+    def __enter__(self) -> IconBundle:
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._entries
+
+    def __iter__(self) -> Iterator[tuple[str, int]]:
+        return iter(self._entries)
+
+    def close(self) -> None:
+        # Any buffer still referencing the mapping must be gone by now.
+        self._pixels.release()
+        self._mmap.close()
+
+    def sizes(self, key: str) -> list[int]:
+        return sorted(size for entry_key, size in self._entries if entry_key == key)
+
+    def entry(self, key: str, size: int) -> BundleEntry:
+        try:
+            return self._entries[key, size]
+        except KeyError:
+            raise KeyError(f"{key} is not bundled at {size}px") from None
+
+    def buffer(self, key: str, size: int) -> memoryview:
+        """The premultiplied RGBA pixels of ``key`` at ``size``, as a zero-copy view."""
+        entry = self.entry(key, size)
+        return self._pixels[entry.offset : entry.offset + entry.width * entry.height * 4]
+
+    def image(self, key: str, size: int, *, premultiplied: bool = True) -> PILImage:
+        """Load the pixels of ``key`` at ``size`` into a Pillow image, without decoding any PNG.
+
+        The image has the premultiplied ``RGBa`` mode, ``premultiplied=False`` converts it to straight ``RGBA``.
+        """
+
+        if Image is None:
+            raise RuntimeError("Pillow is required to wrap the bundled icons in images")
+        entry = self.entry(key, size)
+        buffer = self.buffer(key, size)
+        image = Image.frombuffer("RGBa", (entry.width, entry.height), buffer, "raw", "RGBa", 0, 1)
+        return image if premultiplied else image.convert("RGBA")
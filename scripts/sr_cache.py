@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import gc
+import hashlib
+import struct
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any
+
+import msgspec
+import orjson
+
+__all__ = (
+    "file_digest",
+    "fingerprint",
+    "load_cached",
+    "paused_gc",
+)
+
+# Cache file layout: magic | stamp size (uint32) | stamp (JSON) | payload (msgpack)
+_MAGIC = b"QQPC"
+_HEADER = struct.Struct("<4sI")
+# Bump this whenever the meaning of a cached payload changes.
+_CACHE_VERSION = 1
+
+
+@contextmanager
+def paused_gc() -> Iterator[None]:
+    """Pause the cyclic GC while decoding, it would otherwise rescan every container we just allocated."""
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def file_digest(path: Path) -> str:
+    digest = hashlib.blake2b(digest_size=20)
+    with path.open("rb") as fp:
+        while chunk := fp.read(1 << 20):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def fingerprint(path: Path, previous: dict[str, Any] | None = None) -> dict[str, Any]:
+    """Return the size, mtime and content digest of a file.
+
+    The content is only hashed again when the size or mtime differs from ``previous``.
+    """
+
+    stat = path.stat()
+    if previous and previous.get("size") == stat.st_size and previous.get("mtime_ns") == stat.st_mtime_ns:
+        return previous
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "digest": file_digest(path)}
+
+
+def _read_cache(cache_path: Path) -> tuple[dict[str, Any] | None, memoryview]:
+    try:
+        data = memoryview(cache_path.read_bytes())
+        magic, stamp_size = _HEADER.unpack_from(data, 0)
+        if magic != _MAGIC:
+            return None, data
+        stamp = orjson.loads(data[_HEADER.size : _HEADER.size + stamp_size])
+    except (OSError, struct.error, orjson.JSONDecodeError):
+        return None, memoryview(b"")
+    if stamp.get("version") != _CACHE_VERSION:
+        return None, data
+    return stamp, data[_HEADER.size + stamp_size :]
+
+
+def _write_cache(cache_path: Path, stamp: dict[str, Any], payload: bytes | memoryview) -> None:
+    stamp_data = orjson.dumps(stamp)
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = cache_path.with_name(f"{cache_path.name}.tmp")
+    with temp_path.open("wb") as fp:
+        fp.write(_HEADER.pack(_MAGIC, len(stamp_data)))
+        fp.write(stamp_data)
+        fp.write(payload)
+    temp_path.replace(cache_path)
+
+
+def load_cached(source: Path, cache_path: Path, parse: Callable[[bytes], Any], *, type: Any = Any) -> Any:
+    """Parse ``source`` with ``parse``, or load the previous result from ``cache_path``.
+
+    The cache is keyed by the size, mtime and content digest of the source: an unchanged
+    size and mtime is trusted directly, otherwise the content is hashed and only a different
+    digest triggers a reparse.
+
+    The cached payload is always the plain parsed data, ``type`` is the msgspec type it is
+    decoded into, so the same cache serves every schema a source is read with.
+    Raises :class:`msgspec.ValidationError` if the data does not match ``type``.
+    """
+
+    stamp, payload = _read_cache(cache_path)
+    stat = source.stat()
+    if stamp is not None and stamp["size"] == stat.st_size and stamp["mtime_ns"] == stat.st_mtime_ns:
+        with paused_gc():
+            return msgspec.msgpack.decode(payload, type=type)
+
+    data = source.read_bytes()
+    new_stamp = {
+        "version": _CACHE_VERSION,
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "digest": hashlib.blake2b(data, digest_size=20).hexdigest(),
+    }
+    if stamp is not None and stamp["digest"] == new_stamp["digest"]:
+        # Touched but not modified, refresh the stamp so the next run takes the fast path.
+        _write_cache(cache_path, new_stamp, payload)
+        with paused_gc():
+            return msgspec.msgpack.decode(payload, type=type)
+
+    with paused_gc():
+        parsed = parse(data)
+    payload = msgspec.msgpack.encode(parsed)
+    _write_cache(cache_path, new_stamp, payload)
+    if type is Any:
+        return parsed
+    with paused_gc():
+        return msgspec.msgpack.decode(payload, type=type)
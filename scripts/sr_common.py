@@ -1,111 +1,517 @@
 from __future__ import annotations
 
+import ast
+import builtins
+import functools
+import hashlib
+import inspect
+import os
 import re
+import threading
+from collections import Counter, OrderedDict
+from collections.abc import Callable, Iterable, Iterator, Mapping, Sequence
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Any, Final, Protocol, TypeAlias, TypedDict, TypeVar, overload, runtime_checkable
+from typing import Any, ClassVar, Final, Protocol, TypeAlias, TypedDict, TypeVar, overload, runtime_checkable
 
+import msgspec
 import orjson
+from sr_cache import file_digest, fingerprint, load_cached
+from sr_textmap import TextMapStore, build_textmap_store
 
 __all__ = (
     "ROOT_DIR",
     "CONFIG_DIR",
     "TEXTMAPS_DIR",
+    "CACHE_DIR",
+    "BASE_INDEX_DIR",
+    "OUTPUT_LAYOUTS",
     "HASH_NO_OPTION",
     "LangAssets",
+    "TextResolver",
     "SRIndexGenerator",
+    "IndexRecord",
+    "BuildContext",
+    "ConfigCache",
+    "IORecord",
+    "record_io",
+    "OutputWriter",
+    "write_behind",
+    "set_output_layout",
+    "get_output_layout",
     "format_language",
+    "get_textmap_sources",
+    "get_textmap_fingerprints",
+    "open_textmap_store",
     "load_all_languages",
+    "load_generator_context",
+    "get_generator_config_reads",
+    "get_generator_configs",
+    "collect_referenced_hashes",
     "get_available_languages",
     "get_stable_hash",
+    "get_stable_hashes",
     "get_hash_content",
     "remap_path_name",
     "remap_element_name",
     "remap_icon_or_image",
+    "canonical_asset",
+    "get_asset_aliases",
+    "pop_unhandled_paths",
+    "report_unhandled_paths",
     "format_with_params",
+    "format_levels_with_params",
     "read_config",
     "save_config",
+    "save_config_stream",
+    "save_shared_config",
 )
 ROOT_DIR = Path(__file__).absolute().parent.parent
 CONFIG_DIR = ROOT_DIR / "exceloutput"
 TEXTMAPS_DIR = ROOT_DIR / "textmaps"
 INDEX_DIR = ROOT_DIR / "index"
+CACHE_DIR = ROOT_DIR / ".cache"
+TEXTMAP_STORE_PATH = CACHE_DIR / "textmaps.qqtm"
+TEXTMAP_STAMPS_PATH = CACHE_DIR / "textmaps.sources.json"
+CONFIG_CACHE_DIR = CACHE_DIR / "exceloutput"
+# Duplicate asset -> the canonical copy with the same content, written by xdedupe_assets.py
+ASSET_ALIASES_PATH = INDEX_DIR / "asset_aliases.json"
+# The language-neutral half of the outputs saved in the split layout, see sr_textref.LocalizedOutput.
+BASE_INDEX_DIR = INDEX_DIR / "base"
+# merged: index/<lang>/<name>.json only, split: index/base/<name>.json and index/<lang>/<name>.text.json only.
+OUTPUT_LAYOUTS = ("merged", "split", "both")
+_OUTPUT_LAYOUT = "merged"
+_IO_RECORDS: list[IORecord] = []
+# The outputs may be saved by the write-behind threads, after the recording they belong to was popped.
+_IO_LOCK = threading.Lock()
+_OUTPUT_WRITERS: list[OutputWriter] = []
+# The encoded records are written out by chunks of this size by save_config_stream.
+_STREAM_CHUNK_SIZE = 1 << 16
 HASH_NO_OPTION: Final[int] = 371857150
-_TDict = TypeVar("_TDict", bound=TypedDict)  # type: ignore
+_TEXTMAP_ID_KEY = re.compile(r"(?:TextmapID|TextMapID|NameID)$")
+# Part of the referenced hashes cache path, bump it whenever _collect_hashes finds different hashes.
+_HASHES_EXTRACTOR_VERSION = 1
+_TRecord = TypeVar("_TRecord")
 _Lang: TypeAlias = str
-LangAssets: TypeAlias = dict[_Lang, dict[str, str]]
+LangAssets: TypeAlias = dict[_Lang, "TextResolver"]
 
 
 class Hashable(TypedDict):
     Hash: int
 
 
+class IndexRecord(msgspec.Struct, gc=False):
+    """Base of the records the generators save: slotted, never tracked by the cyclic GC, encoded by msgspec directly.
+
+    A record must never end up in a reference cycle.
+    """
+
+
 @runtime_checkable
 class SRIndexGenerator(Protocol):
-    def __init__(self, *, lang_assets: LangAssets) -> None:
+    # The exceloutput configs the generator reads, their textmap hashes are the only ones loaded for it.
+    CONFIGS: ClassVar[tuple[str, ...]] = ()
+
+    def __init__(self, *, context: BuildContext) -> None:
         ...
 
     def generate(self) -> None:
         ...
 
 
+class IORecord:
+    """The exceloutput configs read and the index files saved while recording.
+
+    ``written`` and ``skipped`` count the saved files that changed and the ones left untouched.
+    """
+
+    def __init__(self) -> None:
+        self.configs: list[str] = []
+        self.outputs: dict[str, list[str]] = {}
+        self.written = 0
+        self.skipped = 0
+
+    def add_config(self, config_name: str) -> None:
+        if config_name not in self.configs:
+            self.configs.append(config_name)
+
+    def add_output(self, lang: str, config_name: str, *, written: bool = True) -> None:
+        outputs = self.outputs.setdefault(lang, [])
+        if config_name not in outputs:
+            outputs.append(config_name)
+        if written:
+            self.written += 1
+        else:
+            self.skipped += 1
+
+
+def _record_config_read(config_name: str) -> None:
+    for record in _IO_RECORDS:
+        record.add_config(config_name)
+
+
+@contextmanager
+def record_io() -> Iterator[IORecord]:
+    """Record every read_config and save_config call made inside the block."""
+    record = IORecord()
+    _IO_RECORDS.append(record)
+    try:
+        yield record
+    finally:
+        _IO_RECORDS.remove(record)
+
+
+class OutputWriter:
+    """Write-behind for the index files, see :func:`write_behind`.
+
+    A small thread pool encodes, writes and renames the queued outputs into place. At most ``max_pending``
+    outputs are queued at once, queuing one more blocks until a writer is done with one.
+    """
+
+    def __init__(self, workers: int = 2, max_pending: int = 8) -> None:
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="output-writer")
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._pending: list[Future[None]] = []
+
+    def submit(self, fn: Callable[..., None], *args: Any) -> None:
+        self._slots.acquire()
+        try:
+            future = self._executor.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        self._pending.append(future)
+
+    def take_pending(self) -> list[Future[None]]:
+        """The outputs queued since the last call, so the caller can wait for them itself."""
+        pending, self._pending = self._pending, []
+        return pending
+
+    def flush(self) -> None:
+        """Wait for every queued output, in the order they were queued, and raise the first error."""
+        for future in self.take_pending():
+            future.result()
+
+    def close(self) -> None:
+        try:
+            self.flush()
+        finally:
+            self._executor.shutdown()
+
+
+@contextmanager
+def write_behind(workers: int = 2, max_pending: int = 8) -> Iterator[OutputWriter]:
+    """Hand every save_config and save_shared_config made inside the block to an :class:`OutputWriter`.
+
+    The data must not be modified once saved. Every output is written when the block exits.
+    """
+    writer = OutputWriter(workers, max_pending)
+    _OUTPUT_WRITERS.append(writer)
+    try:
+        yield writer
+    finally:
+        _OUTPUT_WRITERS.remove(writer)
+        writer.close()
+
+
+def set_output_layout(layout: str) -> None:
+    """Set how the outputs with localized texts are laid out, one of :data:`OUTPUT_LAYOUTS`."""
+    global _OUTPUT_LAYOUT
+    if layout not in OUTPUT_LAYOUTS:
+        raise ValueError(f"Unknown output layout {layout!r}, expected one of {', '.join(OUTPUT_LAYOUTS)}")
+    _OUTPUT_LAYOUT = layout
+
+
+def get_output_layout() -> str:
+    return _OUTPUT_LAYOUT
+
+
 def format_language(language_fn: str) -> str:
     la = language_fn.replace("TextMap", "").lower()
     return "cn" if la == "chs" else la
 
 
-def load_all_languages(specific_lang: list[str] | None = None) -> LangAssets:
-    LANGUAGES_ASSETS: LangAssets = {}
+def get_textmap_sources() -> dict[str, Path]:
     languages = list(TEXTMAPS_DIR.glob("*.json"))
+    return {format_language(language.stem): language for language in languages if "TextMapMain" not in language.stem}
+
+
+def _read_textmap_stamps() -> dict[str, dict[str, Any]]:
+    if TEXTMAP_STAMPS_PATH.exists():
+        return orjson.loads(TEXTMAP_STAMPS_PATH.read_bytes())
+    return {}
+
+
+def get_textmap_fingerprints() -> dict[str, dict[str, Any]]:
+    """The size, mtime and content digest of every textmap language."""
+    previous = _read_textmap_stamps()
+    return {lang: fingerprint(source, previous.get(lang)) for lang, source in get_textmap_sources().items()}
+
+
+def open_textmap_store(*, rebuild: bool = False) -> TextMapStore:
+    """Open the binary textmap store, (re)building it if the content of the textmaps has changed."""
+    sources = get_textmap_sources()
+    previous = _read_textmap_stamps()
+    stamps = {lang: fingerprint(source, previous.get(lang)) for lang, source in sources.items()}
+
+    is_fresh = stamps.keys() == previous.keys() and all(
+        stamp["digest"] == previous[lang]["digest"] for lang, stamp in stamps.items()
+    )
+    if not rebuild and is_fresh and TEXTMAP_STORE_PATH.exists():
+        try:
+            store = TextMapStore(TEXTMAP_STORE_PATH)
+        except ValueError:
+            pass
+        else:
+            if stamps != previous:
+                TEXTMAP_STAMPS_PATH.write_bytes(orjson.dumps(stamps))
+            return store
+
+    print("Building textmap store...")
+    build_textmap_store(sources, TEXTMAP_STORE_PATH)
+    TEXTMAP_STAMPS_PATH.write_bytes(orjson.dumps(stamps))
+    return TextMapStore(TEXTMAP_STORE_PATH)
+
+
+def load_all_languages(
+    specific_lang: list[str] | None = None,
+    *,
+    referenced: Iterable[str] | None = None,
+    store: TextMapStore | None = None,
+) -> LangAssets:
+    store = store or open_textmap_store()
+    languages = store.languages
+    if specific_lang is not None and len(specific_lang) > 0:
+        languages = [fmt_lang for fmt_lang in languages if fmt_lang in specific_lang]
+
+    if referenced is None:
+        return {fmt_lang: TextResolver(store.view(fmt_lang), fmt_lang) for fmt_lang in languages}
+
+    referenced = list(referenced)
+    LANGUAGES_ASSETS: LangAssets = {}
+    for fmt_lang, textmap in store.extract(referenced, languages).items():
+        total = len(store.view(fmt_lang))
+        print(f" Loaded {len(textmap)}/{total} textmap entries for {fmt_lang} ({len(textmap) / max(total, 1):.1%})")
+        LANGUAGES_ASSETS[fmt_lang] = TextResolver(
+            textmap, fmt_lang, referenced=referenced, fallback=store.view(fmt_lang)
+        )
+    return LANGUAGES_ASSETS
+
+
+def _resolve_type_expr(node: ast.expr, namespace: Mapping[str, Any]) -> Any:
+    # Only what a read_config type is made of: names, attributes and subscripts like dict[str, Record].
+    if isinstance(node, ast.Name):
+        return namespace[node.id] if node.id in namespace else getattr(builtins, node.id)
+    if isinstance(node, ast.Attribute):
+        return getattr(_resolve_type_expr(node.value, namespace), node.attr)
+    if isinstance(node, ast.Tuple):
+        return tuple(_resolve_type_expr(element, namespace) for element in node.elts)
+    if isinstance(node, ast.Subscript):
+        return _resolve_type_expr(node.value, namespace)[_resolve_type_expr(node.slice, namespace)]
+    raise ValueError(f"Unsupported type expression: {ast.unparse(node)}")
+
+
+def get_generator_config_reads(generator: type[SRIndexGenerator]) -> list[tuple[str, Any]]:
+    """Find the ``read_config("...", type=...)`` calls of a generator, as ``(config name, type)`` pairs.
 
-    for language in languages:
-        if "TextMapMain" in language.stem:
+    The type is ``None`` for a plain read, or when its expression cannot be resolved from the module globals.
+    Declared configs that no call reads by name are listed untyped.
+    """
+    namespace = vars(inspect.getmodule(generator))
+    reads: list[tuple[str, Any]] = []
+    for node in ast.walk(ast.parse(inspect.getsource(generator))):
+        if not isinstance(node, ast.Call) or not node.args:
             continue
-        fmt_lang = format_language(language.stem)
-        if specific_lang is not None and len(specific_lang) > 0 and fmt_lang not in specific_lang:
+        func_name = getattr(node.func, "id", getattr(node.func, "attr", None))
+        config_name = node.args[0]
+        if func_name != "read_config" or not isinstance(config_name, ast.Constant):
             continue
-        with language.open("rb") as f:
-            LANGUAGES_ASSETS[format_language(language.stem)] = orjson.loads(f.read())
-    return LANGUAGES_ASSETS
+        if not isinstance(config_name.value, str):
+            continue
+        config_type = None
+        for keyword in node.keywords:
+            if keyword.arg == "type":
+                try:
+                    config_type = _resolve_type_expr(keyword.value, namespace)
+                except (AttributeError, ValueError):
+                    config_type = None
+        if (config_name.value, config_type) not in reads:
+            reads.append((config_name.value, config_type))
+    read_names = {config_name for config_name, _ in reads}
+    reads.extend((config_name, None) for config_name in generator.CONFIGS if config_name not in read_names)
+    return reads
 
 
-def get_available_languages() -> list[str]:
-    languages = list(TEXTMAPS_DIR.glob("*.json"))
-    ALL_LANGUAGES = [format_language(language.stem) for language in languages if "TextMapMain" not in language.stem]
-    return ALL_LANGUAGES
+def get_generator_configs(generator: type[SRIndexGenerator]) -> list[str]:
+    """The exceloutput configs a generator declares in ``CONFIGS``.
+
+    Raises ``ValueError`` when one of its ``read_config("...")`` calls reads a config it does not declare.
+    """
+    undeclared = [
+        config_name
+        for config_name, _ in get_generator_config_reads(generator)
+        if config_name not in generator.CONFIGS
+    ]
+    if undeclared:
+        raise ValueError(f"{generator.__name__} reads undeclared configs: {', '.join(undeclared)}")
+    return list(dict.fromkeys(generator.CONFIGS))
+
+
+def _collect_hashes(node: Any, hashes: set[str]) -> None:
+    if isinstance(node, dict):
+        hash_value = node.get("Hash")
+        if isinstance(hash_value, int):
+            hashes.add(str(hash_value))
+        for key, value in node.items():
+            if isinstance(value, (dict, list)):
+                _collect_hashes(value, hashes)
+            elif isinstance(value, int) and not isinstance(value, bool) and _TEXTMAP_ID_KEY.search(key):
+                hashes.add(str(value))
+    elif isinstance(node, list):
+        for value in node:
+            if isinstance(value, (dict, list)):
+                _collect_hashes(value, hashes)
+
 
+def _parse_referenced_hashes(data: bytes) -> list[str]:
+    hashes: set[str] = set()
+    _collect_hashes(orjson.loads(data), hashes)
+    return sorted(hashes)
 
+
+def collect_referenced_hashes(config_names: Iterable[str]) -> set[str]:
+    """Collect every textmap hash referenced by the configs, including the stable hash fallback key."""
+    hashes: set[str] = set()
+    for config_name in config_names:
+        conf_path = _config_path(config_name)
+        cache_path = CONFIG_CACHE_DIR / f"hashes-v{_HASHES_EXTRACTOR_VERSION}" / f"{conf_path.stem}.msgpack"
+        hashes.update(load_cached(conf_path, cache_path, _parse_referenced_hashes))
+    hashes.update(get_stable_hashes(hashes).values())
+    return hashes
+
+
+def load_generator_context(
+    generators: Iterable[type[SRIndexGenerator]], specific_lang: list[str] | None = None
+) -> BuildContext:
+    """Load a context with only the textmap entries that the generators can possibly look up."""
+    config_names: list[str] = []
+    for generator in generators:
+        config_names.extend(get_generator_configs(generator))
+    referenced = collect_referenced_hashes(dict.fromkeys(config_names))
+    return BuildContext.load(specific_lang, referenced=referenced)
+
+
+@functools.cache
+def get_available_languages() -> tuple[str, ...]:
+    return tuple(get_textmap_sources().keys())
+
+
+@functools.lru_cache(maxsize=1 << 18)
 def get_stable_hash(s: int | str) -> str:
     s = str(s)
+    # hash1 consumes the even characters and hash2 the odd ones
     hash1 = 5381
+    for char in s[0::2]:
+        hash1 = ((hash1 << 5) + hash1) ^ ord(char)
     hash2 = 5381
-
-    i = 0
-    while i < len(s):
-        char_code = ord(s[i])
-        hash1 = ((hash1 << 5) + hash1) ^ char_code
-        if i + 1 < len(s):
-            char_code = ord(s[i + 1])
-            hash2 = ((hash2 << 5) + hash2) ^ char_code
-        i += 2
+    for char in s[1::2]:
+        hash2 = ((hash2 << 5) + hash2) ^ ord(char)
 
     combined_hash = (hash1 + (hash2 * 1566083941)) & 0xFFFFFFFF
     combined_hash = combined_hash if combined_hash <= 0x7FFFFFFF else combined_hash - 0x100000000
     return str(combined_hash)
 
 
+def get_stable_hashes(keys: Iterable[int | str]) -> dict[str, str]:
+    """Compute the stable hash of many keys at once, each unique key is only hashed once."""
+    return {key: get_stable_hash(key) for key in dict.fromkeys(map(str, keys))}
+
+
+class TextResolver:
+    """Resolve textmap hashes of a single language.
+
+    Every hash is resolved once (direct key first, then the stable hash fallback) and
+    memoized under both its ``int`` and ``str`` form, so repeated lookups are a single dict probe.
+
+    A resolver over the ``referenced`` hashes only looks the other ones up in ``fallback``, warning once for each.
+    """
+
+    __slots__ = ("_aliases", "_fallback", "_textmap", "language")
+
+    def __init__(
+        self,
+        textmap: Mapping[str, str],
+        language: str,
+        *,
+        referenced: Iterable[str] = (),
+        fallback: Mapping[str, str] | None = None,
+    ) -> None:
+        self.language = language
+        self._textmap = textmap
+        self._fallback = None
+        self._aliases: dict[int | str, str] = {HASH_NO_OPTION: "", str(HASH_NO_OPTION): ""}
+        for hash_str in referenced:
+            self._add_alias(hash_str)
+        self._fallback = fallback
+
+    def _store_alias(self, hash_str: str, text: str) -> None:
+        self._aliases[hash_str] = text
+        if hash_str.isascii() and hash_str.lstrip("-").isdigit() and str(int(hash_str)) == hash_str:
+            self._aliases[int(hash_str)] = text
+
+    def _add_alias(self, hash_str: str) -> str:
+        text = self._textmap.get(hash_str)
+        if text is None:
+            text = self._textmap.get(get_stable_hash(hash_str))
+        if text is None:
+            text = self._resolve_unreferenced(hash_str)
+        self._store_alias(hash_str, text)
+        return text
+
+    def _resolve_unreferenced(self, hash_str: str) -> str:
+        if self._fallback is None:
+            return ""
+        print(f"-- Textmap hash {hash_str} ({self.language}) is not in the declared configs, loading it anyway")
+        text = self._fallback.get(hash_str)
+        if text is None:
+            text = self._fallback.get(get_stable_hash(hash_str), "")
+        return text
+
+    def _get_many(self, keys: list[str]) -> list[str | None]:
+        get_many = getattr(self._textmap, "get_many", None)
+        if get_many is not None:
+            return get_many(keys)
+        return [self._textmap.get(key) for key in keys]
+
+    def resolve_many(self, keys: Sequence[str]) -> list[str]:
+        """Resolve many hashes, the ones not seen before are looked up together in one batch."""
+        missing = [key for key in dict.fromkeys(keys) if key not in self._aliases]
+        if missing:
+            fallback: list[str] = []
+            for key, text in zip(missing, self._get_many(missing), strict=True):
+                if text is None:
+                    fallback.append(key)
+                else:
+                    self._store_alias(key, text)
+            stable_hashes = get_stable_hashes(fallback)
+            for key, text in zip(fallback, self._get_many([stable_hashes[key] for key in fallback]), strict=True):
+                self._store_alias(key, self._resolve_unreferenced(key) if text is None else text)
+        aliases = self._aliases
+        return [aliases[key] for key in keys]
+
+    def __call__(self, hash_int_str: int | str | Hashable) -> str:
+        if type(hash_int_str) is dict:
+            hash_int_str = hash_int_str["Hash"]
+        text = self._aliases.get(hash_int_str)  # type: ignore
+        if text is None:
+            text = self._add_alias(str(hash_int_str))
+        return text
+
+
 def get_hash_content(hash_int_str: int | str | Hashable, language: str = "en", *, lang_assets: LangAssets) -> str:
-    if isinstance(hash_int_str, dict):
-        hash_int_str = hash_int_str["Hash"]
-    hash_str = str(hash_int_str)
-    if str(HASH_NO_OPTION) == hash_str:
-        return ""
-    return lang_assets[language].get(
-        hash_str,
-        lang_assets[language].get(
-            get_stable_hash(hash_str),
-            "",
-        ),
-    )
+    return lang_assets[language](hash_int_str)
 
 
 def remap_path_name(path_name: str):
@@ -152,100 +558,237 @@ def remap_element_name(elem_name: str):
     return elem_name
 
 
-def _warn_unhandled_path(path: str):
-    if path.lower().startswith("spriteoutput/"):
-        print(f">> Unhandled path: {path}")
+# Called with the path, force_initial and item_id once a rule prefix matched.
+_Remapper: TypeAlias = Callable[[str, "str | None", "str | None"], str]
+
+
+def _replacing(*replacements: tuple[str, str], post: Callable[[str], str] | None = None) -> _Remapper:
+    def remap(path: str, force_initial: str | None, item_id: str | None) -> str:
+        for old, new in replacements:
+            path = path.replace(old, new)
+        return path if post is None else post(path)
+
+    return remap
+
+
+def _remap_item_icon(path: str, force_initial: str | None, item_id: str | None) -> str:
+    if force_initial is not None:
+        return path.replace("SpriteOutput/ItemIcon/", f"icon/{force_initial}/")
+    return path.replace("SpriteOutput/ItemIcon/", "icon/item/")
+
+
+def _remap_rogue_map(path: str, force_initial: str | None, item_id: str | None) -> str:
+    path = path.replace("SpriteOutput/Rogue/Map/", "icon/rogue/room/")
+    if "RandomIcon" in path and "RogueDlc" in path:
+        path = path.replace("RandomIcon", "RandomSwarmIcon")
+    if "BossIcon" in path and "RogueDlc" in path:
+        path = path.replace("BossIcon", "BossSwarmIcon")
+    return path.replace("/RogueDlc", "/").replace("/Rogue", "/")
+
+
+def _remap_message_contact(path: str, force_initial: str | None, item_id: str | None) -> str:
+    # Get everything after ui_message_contacts
+    path = path.split("UI_Message_Contacts")[1][1:]
+    return f"icon/avatar/{path}"
+
+
+def _remap_avatar_round_icon(path: str, force_initial: str | None, item_id: str | None) -> str:
+    # Remove the first part
+    path = path.split("AvatarRoundIcon")[1][1:]
+    path = path.replace("UI_Message_Group_", "Group")
+    if path.startswith("UI_Message_"):
+        path = path.split("UI_Message_")[1]
+    return f"icon/avatar/{path}"
+
+
+def _remap_mission_emoji(path: str, force_initial: str | None, item_id: str | None) -> str:
+    if item_id is not None:
+        return f"icon/emoji/{item_id}.png"
+    return path.replace("SpriteOutput/Emoji/Mission/", "icon/emoji/Mission")
+
+
+def _remap_skill_icon(path: str, force_initial: str | None, item_id: str | None) -> str:
+    # Get the last part
+    path = path.split("/")[-1].replace("SkillIcon_", "").lower()
+    return f"icon/skill/{remap_skill_name(path)}"
+
+
+# prefix -> remapper, the most specific prefix wins.
+_REMAP_RULES: tuple[tuple[str, _Remapper], ...] = (
+    # Simulated Universe
+    ("SpriteOutput/Rogue/Buff/", _replacing(("SpriteOutput/Rogue/Buff/", "icon/rogue/blessings/"))),
+    ("SpriteOutput/ItemIcon/", _remap_item_icon),
+    (
+        "SpriteOutput/AvatarProfessionTattoo/Profession/",
+        _replacing(
+            ("SpriteOutput/AvatarProfessionTattoo/Profession/BgPathsn", "icon/rogue/blessings/RogueIntervene"),
+            ("SpriteOutput/AvatarProfessionTattoo/Profession/BgPaths", "icon/rogue/blessings/RogueIntervene"),
+        ),
+    ),
+    (
+        "SpriteOutput/ProfessionIconMiddle/IconProfession",
+        _replacing(
+            ("SpriteOutput/ProfessionIconMiddle/IconProfession", "icon/path/"),
+            ("Middle", ""),
+            post=lambda path: remap_path_name(path),
+        ),
+    ),
+    ("SpriteOutput/Rogue/MiracleIcon/", _replacing(("SpriteOutput/Rogue/MiracleIcon/", "icon/rogue/curios/"))),
+    ("SpriteOutput/Rogue/Map/", _remap_rogue_map),
+    # Messages
+    ("SpriteOutput/AvatarRoundIcon/UI_Message_Contacts", _remap_message_contact),
+    ("SpriteOutput/AvatarRoundIcon/Series/", _replacing(("SpriteOutput/AvatarRoundIcon/Series/", "icon/avatar/"))),
+    ("SpriteOutput/AvatarRoundIcon", _remap_avatar_round_icon),
+    ("SpriteOutput/MonsterRoundIcon/", _replacing(("SpriteOutput/MonsterRoundIcon/", "icon/avatar/"))),
+    ("SpriteOutput/Emoji/Mission/", _remap_mission_emoji),
+    ("SpriteOutput/Emoji/", _replacing(("SpriteOutput/Emoji/", "icon/emoji/"))),
+    (
+        "SpriteOutput/PhoneMessagePic/",
+        _replacing(
+            ("SpriteOutput/PhoneMessagePic/PhoneMessagePic_", "image/messages/"),
+            ("SpriteOutput/PhoneMessagePic/PhoneMessagePic", "image/messages/E"),
+        ),
+    ),
+    (
+        "SpriteOutput/PhoneMessageChallenge/PhoneMessageChallenge_",
+        _replacing(("SpriteOutput/PhoneMessageChallenge/PhoneMessageChallenge_", "image/messages/Raid")),
+    ),
+    (
+        "SpriteOutput/Quest/GuessTheSilhouette/",
+        _replacing(("SpriteOutput/Quest/GuessTheSilhouette/", "image/messages/March")),
+    ),
+    (
+        "SpriteOutput/Quest/Heliobus/PhoneMessageHeliobus",
+        _replacing(("SpriteOutput/Quest/Heliobus/PhoneMessageHeliobus/", "image/messages/Link_")),
+    ),
+    # Characters
+    ("SpriteOutput/SkillIcons/", _remap_skill_icon),
+    # Properties
+    ("SpriteOutput/UI/Avatar/Icon/", _replacing(("SpriteOutput/UI/Avatar/Icon/", "icon/property/"))),
+    # Aetherium Wars
+    (
+        "SpriteOutput/Quest/AetherDivide",
+        _replacing(
+            (
+                "SpriteOutput/Quest/AetherDivide/AssembleSkill/Icon/IconAetherDivideAssembleSkill",
+                "icon/aether/assemble_skills/AssembleSkill",
+            )
+        ),
+    ),
+)
+
+
+class _PrefixTrie:
+    """A radix trie of the rule prefixes, a lookup returns the rule of the longest matching prefix."""
+
+    __slots__ = ("edges", "value")
+
+    def __init__(self) -> None:
+        # First character of the edge label -> (label, child)
+        self.edges: dict[str, tuple[str, _PrefixTrie]] = {}
+        self.value: _Remapper | None = None
+
+    def insert(self, key: str, value: _Remapper) -> None:
+        node = self
+        while key:
+            edge = node.edges.get(key[0])
+            if edge is None:
+                child = _PrefixTrie()
+                node.edges[key[0]] = (key, child)
+                node, key = child, ""
+                break
+            label, child = edge
+            common = 0
+            while common < min(len(label), len(key)) and label[common] == key[common]:
+                common += 1
+            if common < len(label):
+                # Split the edge at the end of the common part.
+                middle = _PrefixTrie()
+                middle.edges[label[common]] = (label[common:], child)
+                node.edges[key[0]] = (label[:common], middle)
+                child = middle
+            node, key = child, key[common:]
+        node.value = value
+
+    def longest_prefix(self, text: str) -> _Remapper | None:
+        node, position, found = self, 0, self.value
+        while position < len(text):
+            edge = node.edges.get(text[position])
+            if edge is None or not text.startswith(edge[0], position):
+                break
+            position += len(edge[0])
+            node = edge[1]
+            if node.value is not None:
+                found = node.value
+        return found
+
+
+def _compile_remap_rules(rules: Iterable[tuple[str, _Remapper]]) -> _PrefixTrie:
+    trie = _PrefixTrie()
+    seen: list[str] = []
+    for prefix, remapper in rules:
+        # The table is matched by longest prefix, a rule shadowing a later and longer one would change that.
+        shadowing = [previous for previous in seen if prefix.startswith(previous)]
+        if shadowing:
+            raise ValueError(f"Remap rule {prefix!r} is shadowed by {shadowing[0]!r}")
+        seen.append(prefix)
+        trie.insert(prefix, remapper)
+    return trie
+
+
+_REMAP_TRIE = _compile_remap_rules(_REMAP_RULES)
+_UNHANDLED_PATHS: Counter[str] = Counter()
+
+
+@functools.lru_cache(maxsize=8192)
+def _remap_path(path: str, force_initial: str | None, item_id: str | None) -> tuple[str, bool]:
+    remapper = _REMAP_TRIE.longest_prefix(path)
+    if remapper is None:
+        return path, not path.lower().startswith("spriteoutput/")
+    return remapper(path, force_initial, item_id), True
 
 
 def remap_icon_or_image(path: str, *, force_initial: str | None = None, item_id: str | None = None):
     if not path:
         return path
-    # Simulated Universe
-    if path.startswith("SpriteOutput/Rogue/Buff/"):
-        return path.replace("SpriteOutput/Rogue/Buff/", "icon/rogue/blessings/")
-    if path.startswith("SpriteOutput/ItemIcon/"):
-        if force_initial is not None:
-            return path.replace("SpriteOutput/ItemIcon/", f"icon/{force_initial}/")
-        return path.replace("SpriteOutput/ItemIcon/", "icon/item/")
-    if path.startswith("SpriteOutput/AvatarProfessionTattoo/Profession/"):
-        path = path.replace(
-            "SpriteOutput/AvatarProfessionTattoo/Profession/BgPathsn", "icon/rogue/blessings/RogueIntervene"
-        )
-        path = path.replace(
-            "SpriteOutput/AvatarProfessionTattoo/Profession/BgPaths", "icon/rogue/blessings/RogueIntervene"
-        )
-        return path
-    if path.startswith("SpriteOutput/ProfessionIconMiddle/IconProfession"):
-        path = path.replace("SpriteOutput/ProfessionIconMiddle/IconProfession", "icon/path/")
-        path = path.replace("Middle", "")
-        return remap_path_name(path)
-    if path.startswith("SpriteOutput/Rogue/MiracleIcon/"):
-        return path.replace("SpriteOutput/Rogue/MiracleIcon/", "icon/rogue/curios/")
-    if path.startswith("SpriteOutput/Rogue/Map/"):
-        path = path.replace("SpriteOutput/Rogue/Map/", "icon/rogue/room/")
-        if "RandomIcon" in path and "RogueDlc" in path:
-            path = path.replace("RandomIcon", "RandomSwarmIcon")
-        if "BossIcon" in path and "RogueDlc" in path:
-            path = path.replace("BossIcon", "BossSwarmIcon")
-        return path.replace("/RogueDlc", "/").replace("/Rogue", "/")
+    remapped, handled = _remap_path(path, force_initial, item_id)
+    if not handled:
+        _UNHANDLED_PATHS[path] += 1
+    return canonical_asset(remapped)
 
-    # Messages
-    if path.startswith("SpriteOutput/AvatarRoundIcon/UI_Message_Contacts"):
-        # Get everything after ui_message_contacts
-        path = path.split("UI_Message_Contacts")[1][1:]
-        return f"icon/avatar/{path}"
-    if path.startswith("SpriteOutput/AvatarRoundIcon/Series/"):
-        path = path.replace("SpriteOutput/AvatarRoundIcon/Series/", "icon/avatar/")
-        return path
-    if path.startswith("SpriteOutput/AvatarRoundIcon"):
-        # Remove the first part
-        path = path.split("AvatarRoundIcon")[1][1:]
-        path = path.replace("UI_Message_Group_", "Group")
-        if path.startswith("UI_Message_"):
-            path = path.split("UI_Message_")[1]
-        return f"icon/avatar/{path}"
-    if path.startswith("SpriteOutput/MonsterRoundIcon/"):
-        path = path.replace("SpriteOutput/MonsterRoundIcon/", "icon/avatar/")
-        return path
-    if path.startswith("SpriteOutput/Emoji/"):
-        if path.startswith("SpriteOutput/Emoji/Mission/"):
-            if item_id is not None:
-                return f"icon/emoji/{item_id}.png"
-            return path.replace("SpriteOutput/Emoji/Mission/", "icon/emoji/Mission")
-        return path.replace("SpriteOutput/Emoji/", "icon/emoji/")
-    if path.startswith("SpriteOutput/PhoneMessagePic/"):
-        path = path.replace("SpriteOutput/PhoneMessagePic/PhoneMessagePic_", "image/messages/")
-        return path.replace("SpriteOutput/PhoneMessagePic/PhoneMessagePic", "image/messages/E")
-    if path.startswith("SpriteOutput/PhoneMessageChallenge/PhoneMessageChallenge_"):
-        return path.replace("SpriteOutput/PhoneMessageChallenge/PhoneMessageChallenge_", "image/messages/Raid")
-    if path.startswith("SpriteOutput/Quest/GuessTheSilhouette/"):
-        return path.replace("SpriteOutput/Quest/GuessTheSilhouette/", "image/messages/March")
-    if path.startswith("SpriteOutput/Quest/Heliobus/PhoneMessageHeliobus"):
-        return path.replace("SpriteOutput/Quest/Heliobus/PhoneMessageHeliobus/", "image/messages/Link_")
 
-    # Characters
-    if path.startswith("SpriteOutput/SkillIcons/"):
-        # Get the last part
-        path = path.split("/")[-1].replace("SkillIcon_", "").lower()
-        # Replacer
-        path = remap_skill_name(path)
-        return f"icon/skill/{path}"
+@functools.cache
+def get_asset_aliases() -> dict[str, str]:
+    try:
+        with ASSET_ALIASES_PATH.open("rb") as fp:
+            return orjson.loads(fp.read())["aliases"]
+    except (OSError, orjson.JSONDecodeError, KeyError):
+        return {}
 
-    # Properties
-    if path.startswith("SpriteOutput/UI/Avatar/Icon/"):
-        path = path.replace("SpriteOutput/UI/Avatar/Icon/", "icon/property/")
-        return path
 
-    # Aetherium Wars
-    if path.startswith("SpriteOutput/Quest/AetherDivide"):
-        path = path.replace(
-            "SpriteOutput/Quest/AetherDivide/AssembleSkill/Icon/IconAetherDivideAssembleSkill",
-            "icon/aether/assemble_skills/AssembleSkill",
-        )
-        return path
+def canonical_asset(path: str) -> str:
+    """Return the canonical path of an asset byte-identical to other ones, so clients cache it once."""
+    return get_asset_aliases().get(path, path)
+
+
+def pop_unhandled_paths() -> Counter[str]:
+    """Return and reset the game paths remap_icon_or_image did not know how to remap."""
+    unhandled = _UNHANDLED_PATHS.copy()
+    _UNHANDLED_PATHS.clear()
+    return unhandled
+
 
-    _warn_unhandled_path(path)
-    return path
+def report_unhandled_paths(unhandled: Counter[str] | None = None) -> None:
+    unhandled = pop_unhandled_paths() if unhandled is None else unhandled
+    if not unhandled:
+        return
+    print(f">> {len(unhandled)} unhandled paths ({sum(unhandled.values())} uses)")
+    for path, count in unhandled.most_common():
+        print(f">>  {path} (x{count})")
+
+
+# Parameter like: #1[i] #2[f1] #3[f2]%
+_PARAM_PLACEHOLDER = re.compile(r"#([1-9]\d*)\[(?:i|f(\d+))\](%?)")
 
 
 def _int_formatter_param(text_data: str, pos: int, param: int | float):
@@ -275,6 +818,70 @@ def _int_formatter_param(text_data: str, pos: int, param: int | float):
     return text_data
 
 
+class _ParamTemplate:
+    """A text tokenized around its ``#N[...]`` placeholders.
+
+    Per position only a single kind of placeholder is replaced, picked in the order
+    ``[i]%``, ``[i]``, ``[fX]%`` then ``[fX]``, and every ``[fX]`` of that kind uses the
+    decimals of its first occurrence. The other kinds are kept as-is.
+    """
+
+    __slots__ = ("parts", "slots")
+
+    def __init__(self, text_data: str) -> None:
+        self.parts: list[str] = []
+        # (index in parts, position, is percent, decimals or None for [i])
+        self.slots: list[tuple[int, int, bool, int | None]] = []
+
+        tokens: list[tuple[re.Match[str], int, bool, int | None]] = []
+        kinds: dict[int, tuple[bool, int | None]] = {}
+        for match in _PARAM_PLACEHOLDER.finditer(text_data):
+            pos, decimals, percent = int(match.group(1)), match.group(2), match.group(3) == "%"
+            token = (match, pos, percent, None if decimals is None else int(decimals))
+            tokens.append(token)
+            # Lower rank wins: [i]%, [i], [fX]%, [fX]
+            rank = (decimals is not None) * 2 + (not percent)
+            current = kinds.get(pos)
+            if current is None or rank < (current[1] is not None) * 2 + (not current[0]):
+                kinds[pos] = (percent, token[3])
+
+        last = 0
+        for match, pos, percent, decimals in tokens:
+            kind_percent, kind_decimals = kinds[pos]
+            if percent != kind_percent or (decimals is None) != (kind_decimals is None):
+                continue
+            self.parts.append(text_data[last : match.start()])
+            self.slots.append((len(self.parts), pos, percent, kind_decimals))
+            self.parts.append(match.group(0))
+            last = match.end()
+        self.parts.append(text_data[last:])
+
+    def render(self, parameters: list[int | float]) -> str:
+        if not self.slots:
+            return self.parts[0]
+        parts = self.parts.copy()
+        total = len(parameters)
+        for index, pos, percent, decimals in self.slots:
+            if pos > total:
+                continue
+            param = parameters[pos - 1]
+            if percent:
+                parts[index] = f"{round(param * 100) if decimals is None else round(param * 100, decimals)}%"
+            else:
+                parts[index] = str(round(param) if decimals is None else round(param, decimals))
+        return "".join(parts)
+
+
+@functools.lru_cache(maxsize=4096)
+def _compile_param_template(text_data: str) -> _ParamTemplate | None:
+    # A "#" right before a placeholder could form a new placeholder once the previous one
+    # is replaced, only the position by position replacement handles that.
+    for match in _PARAM_PLACEHOLDER.finditer(text_data):
+        if match.start() > 0 and text_data[match.start() - 1] == "#":
+            return None
+    return _ParamTemplate(text_data)
+
+
 def format_with_params(text_data: str, parameters: list[int | float]) -> str:
     # Parameter like: #1[i] #2[f1] #3[f2]
     # [i] would be format as int, rounded
@@ -282,11 +889,22 @@ def format_with_params(text_data: str, parameters: list[int | float]) -> str:
     if not parameters:
         return text_data
 
+    template = _compile_param_template(text_data)
+    if template is not None:
+        return template.render(parameters)
     for pos, param in enumerate(parameters, 1):
         text_data = _int_formatter_param(text_data, pos, param)
     return text_data
 
 
+def format_levels_with_params(text_data: str, levels: Iterable[list[int | float]]) -> list[str]:
+    """Render the same text with the parameters of every level, the text is only tokenized once."""
+    template = _compile_param_template(text_data)
+    if template is None:
+        return [format_with_params(text_data, parameters) for parameters in levels]
+    return [template.render(parameters) for parameters in levels]
+
+
 @overload
 def read_config(config_name: str) -> dict[str, Any]:
     ...
@@ -298,21 +916,351 @@ def read_config(config_name: str, *, type: None) -> dict[str, Any]:
 
 
 @overload
-def read_config(config_name: str, *, type: type[_TDict]) -> dict[str, _TDict]:
+def read_config(config_name: str, *, type: type[_TRecord]) -> dict[str, _TRecord]:
     ...
 
 
-def read_config(config_name: str, *, type: type[_TDict] | None = None) -> dict[str, _TDict | Any]:
+@overload
+def read_config(config_name: str, *, type: Any) -> dict[str, Any]:
+    ...
+
+
+def _config_path(config_name: str) -> Path:
     if not config_name.endswith(".json"):
         config_name += ".json"
-    conf_path = CONFIG_DIR / config_name
-    with conf_path.open("rb") as fp:
-        return orjson.loads(fp.read())
+    return CONFIG_DIR / config_name
+
+
+def read_config(config_name: str, *, type: Any = None) -> dict[str, Any]:
+    """Read an exceloutput config, a mapping of ID to record.
+
+    With ``type``, every record is decoded into it instead of a plain dict: a :class:`msgspec.Struct`
+    or a :class:`TypedDict`, or any msgspec type (``dict[str, Record]`` for the configs nested by level).
+    Only the declared fields are decoded, and a record that does not match raises a :class:`ValueError`
+    naming the config and the offending field.
+    """
+
+    conf_path = _config_path(config_name)
+    _record_config_read(conf_path.stem)
+    cache_path = CONFIG_CACHE_DIR / f"{conf_path.stem}.msgpack"
+    if type is None:
+        return load_cached(conf_path, cache_path, orjson.loads)
+    try:
+        return load_cached(conf_path, cache_path, orjson.loads, type=dict[str, type])
+    except msgspec.ValidationError as exc:
+        type_name = getattr(type, "__name__", repr(type))
+        reason = _find_invalid_record(conf_path.stem, type) or exc
+        raise ValueError(f"{conf_path.name} does not match the {type_name} schema: {reason}") from None
+
+
+def _find_invalid_record(config_name: str, record_type: Any) -> str | None:
+    # msgspec only reports "$[...]" for a mapping key, find which record it was.
+    for key, record in read_config(config_name).items():
+        try:
+            msgspec.convert(record, record_type)
+        except msgspec.ValidationError as exc:
+            return f"{exc} in record {key}"
+    return None
+
+
+def _payload_digest(payload: bytes | bytearray) -> str:
+    return hashlib.blake2b(payload, digest_size=20).hexdigest()
+
+
+def _is_unchanged(conf_path: Path, size: int, digest: str) -> bool:
+    try:
+        if conf_path.stat().st_size != size:
+            return False
+    except FileNotFoundError:
+        return False
+    return file_digest(conf_path) == digest
+
+
+def _find_identical_output(conf_path: Path, size: int, digest: str) -> Path | None:
+    # Language independent outputs are byte-identical in every index/<lang>/, share a single inode for them.
+    for sibling in INDEX_DIR.glob(f"*/{conf_path.name}"):
+        if sibling.parent == conf_path.parent or sibling.stat().st_size != size:
+            continue
+        if file_digest(sibling) == digest:
+            return sibling
+    return None
+
+
+def _temp_output(conf_path: Path, kind: str = "tmp") -> Path:
+    # Per process: the -j workers all save the same index/base/ files.
+    return conf_path.with_name(f"{conf_path.name}.{os.getpid()}.{kind}")
+
+
+def _link_output(source: Path, conf_path: Path) -> bool:
+    temp_path = _temp_output(conf_path)
+    try:
+        temp_path.unlink(missing_ok=True)
+        os.link(source, temp_path)
+    except OSError:
+        return False
+    temp_path.replace(conf_path)
+    return True
 
 
-def save_config(config_name: str, data: dict[str, Any], *, lang: str, options: int | None = None):
+def _write_output(
+    config_name: str,
+    payload: bytes,
+    *,
+    lang: str,
+    io_records: Sequence[IORecord],
+    shared_with: Path | None = None,
+) -> Path:
+    conf_path = INDEX_DIR / lang / config_name
+    if shared_with is None:
+        digest = _payload_digest(payload)
+        unchanged = _is_unchanged(conf_path, len(payload), digest)
+        source = None if unchanged else _find_identical_output(conf_path, len(payload), digest)
+    else:
+        unchanged = conf_path.exists() and conf_path.samefile(shared_with)
+        source = shared_with
+
+    if not unchanged and (source is None or not _link_output(source, conf_path)):
+        # Never write into the file in place: a reader could see it half-written,
+        # and it might be a hard link shared with the other languages.
+        temp_path = _temp_output(conf_path)
+        with temp_path.open("wb") as fp:
+            fp.write(payload)
+        temp_path.replace(conf_path)
+
+    with _IO_LOCK:
+        for record in io_records:
+            record.add_output(lang, config_name, written=not unchanged)
+    return conf_path
+
+
+def _encode_output(data: Any, default: Callable[[Any], Any] | None = None) -> bytes:
+    # Sorted keys (dataclass fields included) so the same data always gives the same bytes.
+    return msgspec.json.Encoder(enc_hook=default, order="sorted").encode(data)
+
+
+def _save_output(
+    config_name: str, data: Any, lang: str, default: Callable[[Any], Any] | None, io_records: Sequence[IORecord]
+) -> None:
+    _write_output(config_name, _encode_output(data, default), lang=lang, io_records=io_records)
+
+
+def _save_shared_output(config_name: str, data: Any, langs: list[str], io_records: Sequence[IORecord]) -> None:
+    payload = _encode_output(data)
+    shared_with: Path | None = None
+    for lang in langs:
+        shared_with = _write_output(config_name, payload, lang=lang, io_records=io_records, shared_with=shared_with)
+
+
+def _dispatch_output(fn: Callable[..., None], *args: Any) -> None:
+    if _OUTPUT_WRITERS:
+        _OUTPUT_WRITERS[-1].submit(fn, *args)
+    else:
+        fn(*args)
+
+
+def save_config(
+    config_name: str,
+    data: dict[str, Any],
+    *,
+    lang: str,
+    default: Callable[[Any], Any] | None = None,
+):
+    """Save an index file, the file is left untouched when its content did not change.
+
+    Inside :func:`write_behind`, the file is only queued to be written.
+    """
+    if not config_name.endswith(".json"):
+        config_name += ".json"
+    _dispatch_output(_save_output, config_name, data, lang, default, tuple(_IO_RECORDS))
+
+
+def save_config_stream(
+    config_name: str,
+    records: Iterable[tuple[str, Any]],
+    *,
+    lang: str,
+    default: Callable[[Any], Any] | None = None,
+) -> int:
+    """Save an index file from ``(key, record)`` pairs, encoded and flushed as they come, return how many were saved.
+
+    Only a chunk of the encoded output is held at once, however many records there are. The pairs must
+    come in sorted key order: the file is then byte-identical to what :func:`save_config` writes for the
+    same data, and left untouched the same way when its content did not change.
+    The records are produced as the file is written, so it is never deferred by :func:`write_behind`.
+    """
+
     if not config_name.endswith(".json"):
         config_name += ".json"
     conf_path = INDEX_DIR / lang / config_name
-    with conf_path.open("wb") as fp:
-        fp.write(orjson.dumps(data, option=options))
+    encoder = msgspec.json.Encoder(enc_hook=default, order="sorted")
+    digest = hashlib.blake2b(digest_size=20)
+    chunk = bytearray(b"{")
+    size = count = 0
+    previous_key: str | None = None
+    # Not the name _link_output uses, it would clobber the file being streamed.
+    temp_path = _temp_output(conf_path, "stream.tmp")
+    try:
+        with temp_path.open("wb") as fp:
+            for key, record in records:
+                if previous_key is not None and key <= previous_key:
+                    raise ValueError(f"{config_name}: {key!r} after {previous_key!r}, the keys must be sorted")
+                previous_key = key
+                if count:
+                    chunk += b","
+                encoder.encode_into(key, chunk, -1)
+                chunk += b":"
+                encoder.encode_into(record, chunk, -1)
+                count += 1
+                if len(chunk) >= _STREAM_CHUNK_SIZE:
+                    digest.update(chunk)
+                    fp.write(chunk)
+                    size += len(chunk)
+                    chunk.clear()
+            chunk += b"}"
+            digest.update(chunk)
+            fp.write(chunk)
+            size += len(chunk)
+    except BaseException:
+        temp_path.unlink(missing_ok=True)
+        raise
+
+    unchanged = _is_unchanged(conf_path, size, digest.hexdigest())
+    source = None if unchanged else _find_identical_output(conf_path, size, digest.hexdigest())
+    if unchanged or (source is not None and _link_output(source, conf_path)):
+        temp_path.unlink()
+    else:
+        temp_path.replace(conf_path)
+
+    with _IO_LOCK:
+        for io_record in _IO_RECORDS:
+            io_record.add_output(lang, config_name, written=not unchanged)
+    return count
+
+
+def save_shared_config(config_name: str, data: dict[str, Any], *, langs: Iterable[str]):
+    """Save a language independent output, serialized once and hard linked into every language."""
+    if not config_name.endswith(".json"):
+        config_name += ".json"
+    _dispatch_output(_save_shared_output, config_name, data, list(langs), tuple(_IO_RECORDS))
+
+
+class ConfigCache:
+    """An LRU bounded cache of the parsed exceloutput configs.
+
+    A config read with several schemas is cached once per schema.
+    ``hits`` and ``misses`` count the lookups, ``evictions`` the configs dropped to stay under ``maxsize``.
+    """
+
+    def __init__(self, maxsize: int | None = 128) -> None:
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._configs: OrderedDict[tuple[str, Any], Any] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._configs)
+
+    def __contains__(self, config_name: str) -> bool:
+        return (_config_path(config_name).stem, None) in self._configs
+
+    @overload
+    def get(self, config_name: str, *, type: None = None) -> dict[str, Any]:
+        ...
+
+    @overload
+    def get(self, config_name: str, *, type: type[_TRecord]) -> dict[str, _TRecord]:
+        ...
+
+    def get(self, config_name: str, *, type: Any = None) -> dict[str, Any]:
+        key = (_config_path(config_name).stem, type)
+        config = self._configs.get(key)
+        if config is not None:
+            self.hits += 1
+            self._configs.move_to_end(key)
+            _record_config_read(key[0])
+            return config
+
+        self.misses += 1
+        config = read_config(key[0], type=type)
+        self._configs[key] = config
+        while self.maxsize is not None and len(self._configs) > self.maxsize:
+            self._configs.popitem(last=False)
+            self.evictions += 1
+        return config
+
+    def preload(self, reads: Iterable[tuple[str, Any]]) -> None:
+        """Read the ``(config name, type)`` pairs ahead, see :func:`get_generator_config_reads`."""
+        for config_name, config_type in reads:
+            self.get(config_name, type=config_type)
+
+    def clear(self) -> None:
+        self._configs.clear()
+
+    def stats(self) -> str:
+        return f"{self.hits} hits, {self.misses} misses, {self.evictions} evictions"
+
+
+class BuildContext:
+    """Everything the generators of a single run share.
+
+    The context owns the textmap store and the language assets loaded from it,
+    a :class:`ConfigCache` so each config is only parsed once per run, and the
+    list of languages to generate.
+    """
+
+    def __init__(
+        self,
+        lang_assets: LangAssets,
+        *,
+        configs: ConfigCache | None = None,
+        store: TextMapStore | None = None,
+    ) -> None:
+        self.lang_assets = lang_assets
+        self.configs = configs if configs is not None else ConfigCache()
+        self.store = store
+
+    @classmethod
+    def load(
+        cls,
+        specific_lang: list[str] | None = None,
+        *,
+        referenced: Iterable[str] | None = None,
+        configs: ConfigCache | None = None,
+    ) -> BuildContext:
+        store = open_textmap_store()
+        lang_assets = load_all_languages(specific_lang, referenced=referenced, store=store)
+        return cls(lang_assets, configs=configs, store=store)
+
+    def __enter__(self) -> BuildContext:
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        self.close()
+
+    @property
+    def languages(self) -> list[str]:
+        return list(self.lang_assets.keys())
+
+    @overload
+    def read_config(self, config_name: str, *, type: None = None) -> dict[str, Any]:
+        ...
+
+    @overload
+    def read_config(self, config_name: str, *, type: type[_TRecord]) -> dict[str, _TRecord]:
+        ...
+
+    def read_config(self, config_name: str, *, type: Any = None) -> dict[str, Any]:
+        """Read an exceloutput config through the run's cache, see :func:`read_config` for ``type``."""
+        return self.configs.get(config_name, type=type)
+
+    def with_languages(self, languages: Iterable[str]) -> BuildContext:
+        """A context for a subset of the languages sharing the config cache, the store stays owned by this one."""
+        lang_assets = {language: self.lang_assets[language] for language in languages}
+        return BuildContext(lang_assets, configs=self.configs)
+
+    def close(self) -> None:
+        # The textmap views are no longer usable after this.
+        if self.store is not None:
+            self.store.close()
+            self.store = None
@@ -0,0 +1,280 @@
+from __future__ import annotations
+
+import mmap
+import struct
+from array import array
+from bisect import bisect_left
+from collections.abc import Iterable, Iterator, Mapping, Sequence
+from pathlib import Path
+from typing import Any
+
+import orjson
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+__all__ = (
+    "TextMapStore",
+    "TextMapView",
+    "build_textmap_store",
+)
+
+# File layout (little-endian):
+#   header | metadata (JSON) | pad to 8 | keys int64[rows] | offsets int64[rows * langs]
+#   | lengths int32[rows * langs] | UTF-8 blob
+# Each row is a single textmap hash, each column a language. A length of -1 means the
+# language does not have the hash at all, which is different from an empty string.
+# The metadata holds the languages in column order and how many hashes each of them has.
+_MAGIC = b"QQTM"
+_VERSION = 2
+_HEADER = struct.Struct("<4sHHQQQ")  # magic, version, languages, rows, metadata size, blob size
+_MISSING = -1
+
+
+def _align(position: int, size: int = 8) -> int:
+    return (position + size - 1) // size * size
+
+
+def _intern_text(blob: bytearray, blob_index: dict[int, int], data: bytes) -> int:
+    # A lot of strings are shared between languages (names, numbers, placeholders), store them once.
+    digest = hash(data)
+    offset = blob_index.get(digest)
+    if offset is not None and blob[offset : offset + len(data)] == data:
+        return offset
+    offset = len(blob)
+    blob.extend(data)
+    blob_index.setdefault(digest, offset)
+    return offset
+
+
+def build_textmap_store(sources: dict[str, Path], output: Path, *, metadata: dict[str, Any] | None = None) -> None:
+    """Build a memory-mappable textmap store from the ``TextMap*.json`` files.
+
+    Each language file is parsed one at a time, so the peak memory while building
+    is a single textmap plus the compact arrays collected so far.
+    """
+
+    languages = list(sources.keys())
+    blob = bytearray()
+    blob_index: dict[int, int] = {}
+    columns: list[tuple[array[int], array[int], array[int]]] = []
+    for language in languages:
+        with sources[language].open("rb") as fp:
+            textmap: dict[str, str] = orjson.loads(fp.read())
+        keys, offsets, lengths = array("q"), array("q"), array("i")
+        for key, text in textmap.items():
+            try:
+                keys.append(int(key))
+            except (ValueError, OverflowError):
+                continue
+            data = text.encode("utf-8")
+            offsets.append(_intern_text(blob, blob_index, data))
+            lengths.append(len(data))
+        del textmap
+        columns.append((keys, offsets, lengths))
+    del blob_index
+
+    all_keys = array("q", sorted({key for keys, _, _ in columns for key in keys}))
+    row_of = {key: row for row, key in enumerate(all_keys)}
+    total_lang = len(languages)
+    total_rows = len(all_keys)
+    row_offsets = array("q", bytes(8 * total_rows * total_lang))
+    row_lengths = array("i", [_MISSING]) * (total_rows * total_lang)
+    counts: dict[str, int] = {}
+    for column, (keys, offsets, lengths) in enumerate(columns):
+        count = 0
+        for key, offset, length in zip(keys, offsets, lengths, strict=True):
+            cell = row_of[key] * total_lang + column
+            count += row_lengths[cell] == _MISSING
+            row_offsets[cell] = offset
+            row_lengths[cell] = length
+        counts[languages[column]] = count
+    del row_of, columns
+
+    meta = orjson.dumps({**(metadata or {}), "languages": languages, "counts": counts})
+    header = _HEADER.pack(_MAGIC, _VERSION, total_lang, total_rows, len(meta), len(blob))
+    padding = _align(len(header) + len(meta)) - len(header) - len(meta)
+
+    output.parent.mkdir(parents=True, exist_ok=True)
+    temp_output = output.with_name(output.name + ".tmp")
+    with temp_output.open("wb") as fp:
+        fp.write(header)
+        fp.write(meta)
+        fp.write(b"\0" * padding)
+        fp.write(all_keys.tobytes())
+        fp.write(row_offsets.tobytes())
+        fp.write(row_lengths.tobytes())
+        fp.write(blob)
+    temp_output.replace(output)
+
+
+class TextMapStore:
+    """A read-only, memory-mapped view of every textmap language.
+
+    Opening a store only maps the file, the strings are decoded on lookup.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        with path.open("rb") as fp:
+            self._mmap = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, version, total_lang, total_rows, meta_size, blob_size = _HEADER.unpack_from(self._mmap, 0)
+        except struct.error as exc:
+            self._mmap.close()
+            raise ValueError(f"{path} is not a textmap store") from exc
+        if magic != _MAGIC or version != _VERSION:
+            self._mmap.close()
+            raise ValueError(f"{path} is not a textmap store (or was built by an older version)")
+
+        position = _HEADER.size
+        self.metadata: dict[str, Any] = orjson.loads(self._mmap[position : position + meta_size])
+        self.languages: list[str] = list(self.metadata["languages"])
+        self.counts: dict[str, int] = dict(self.metadata["counts"])
+        self._total_lang = total_lang
+        self._total_rows = total_rows
+
+        position = _align(position + meta_size)
+        view = memoryview(self._mmap)
+        self._keys = view[position : position + 8 * total_rows].cast("q")
+        position += 8 * total_rows
+        self._offsets = view[position : position + 8 * total_rows * total_lang].cast("q")
+        position += 8 * total_rows * total_lang
+        self._lengths = view[position : position + 4 * total_rows * total_lang].cast("i")
+        position += 4 * total_rows * total_lang
+        self._blob = view[position : position + blob_size]
+
+    def __enter__(self) -> TextMapStore:
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self._total_rows
+
+    def close(self) -> None:
+        for buffer in (self._keys, self._offsets, self._lengths, self._blob):
+            buffer.release()
+        self._mmap.close()
+
+    def find_row(self, key: int) -> int:
+        """Return the row of a hash, or -1 if no language has it."""
+        row = bisect_left(self._keys, key)
+        if row < self._total_rows and self._keys[row] == key:
+            return row
+        return -1
+
+    def find_rows(self, keys: Sequence[int]) -> list[int]:
+        """Return the row of many hashes at once, -1 for the ones no language has.
+
+        Uses a single vectorized ``searchsorted`` when NumPy is available.
+        """
+
+        if np is None or len(keys) < 64:
+            return [self.find_row(key) for key in keys]
+        all_keys = np.frombuffer(self._keys, dtype=np.int64)
+        query = np.array(keys, dtype=np.int64)
+        rows = np.searchsorted(all_keys, query)
+        found = rows < self._total_rows
+        found[found] = all_keys[rows[found]] == query[found]
+        return np.where(found, rows, -1).tolist()
+
+    def get_text(self, row: int, column: int) -> str | None:
+        cell = row * self._total_lang + column
+        length = self._lengths[cell]
+        if length == _MISSING:
+            return None
+        offset = self._offsets[cell]
+        return str(self._blob[offset : offset + length], "utf-8")
+
+    def view(self, language: str) -> TextMapView:
+        return TextMapView(self, language)
+
+    def extract(self, keys: Iterable[str], languages: Iterable[str] | None = None) -> dict[str, dict[str, str]]:
+        """Copy only the given hashes out of the store into plain per-language dicts.
+
+        The rows are resolved once and shared by every language.
+        """
+
+        rows: list[tuple[str, int]] = []
+        for key in keys:
+            try:
+                row = self.find_row(int(key))
+            except ValueError:
+                continue
+            if row >= 0:
+                rows.append((key, row))
+
+        extracted: dict[str, dict[str, str]] = {}
+        for language in languages or self.languages:
+            column = self.languages.index(language)
+            textmap: dict[str, str] = {}
+            for key, row in rows:
+                text = self.get_text(row, column)
+                if text is not None:
+                    textmap[key] = text
+            extracted[language] = textmap
+        return extracted
+
+
+class TextMapView(Mapping[str, str]):
+    """A ``dict[str, str]`` compatible view of a single language in a :class:`TextMapStore`."""
+
+    def __init__(self, store: TextMapStore, language: str) -> None:
+        self.store = store
+        self.language = language
+        self._column = store.languages.index(language)
+
+    def _lookup(self, key: object) -> str | None:
+        try:
+            hash_key = int(key)  # type: ignore
+        except (TypeError, ValueError):
+            return None
+        row = self.store.find_row(hash_key)
+        if row < 0:
+            return None
+        return self.store.get_text(row, self._column)
+
+    def get(self, key: object, default: Any = None) -> Any:
+        text = self._lookup(key)
+        return default if text is None else text
+
+    def get_many(self, keys: Sequence[str]) -> list[str | None]:
+        """Look up many hashes in a single pass over the store."""
+        hash_keys: list[int] = []
+        positions: list[int] = []
+        for position, key in enumerate(keys):
+            try:
+                hash_key = int(key)
+            except ValueError:
+                continue
+            if -(1 << 63) <= hash_key < (1 << 63):
+                hash_keys.append(hash_key)
+                positions.append(position)
+
+        texts: list[str | None] = [None] * len(keys)
+        for position, row in zip(positions, self.store.find_rows(hash_keys), strict=True):
+            if row >= 0:
+                texts[position] = self.store.get_text(row, self._column)
+        return texts
+
+    def __getitem__(self, key: str) -> str:
+        text = self._lookup(key)
+        if text is None:
+            raise KeyError(key)
+        return text
+
+    def __contains__(self, key: object) -> bool:
+        return self._lookup(key) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        store = self.store
+        for row, key in enumerate(store._keys):
+            if store._lengths[row * store._total_lang + self._column] != _MISSING:
+                yield str(key)
+
+    def __len__(self) -> int:
+        return self.store.counts[self.language]
@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+from collections.abc import Callable, Iterator, Mapping
+from typing import Any
+
+import msgspec
+from sr_common import (
+    BASE_INDEX_DIR,
+    Hashable,
+    TextResolver,
+    format_levels_with_params,
+    format_with_params,
+    get_output_layout,
+    save_config,
+    save_config_stream,
+)
+from sr_unity import strip_unity_rich_text
+
+__all__ = (
+    "LocalizedOutput",
+    "ResolvedTexts",
+    "TextBatch",
+    "TextRef",
+    "merge_localized",
+)
+
+
+class TextRef:
+    """A placeholder for a textmap text inside a language-neutral record.
+
+    The text is resolved per language by :meth:`TextBatch.resolve`, then formatted
+    with ``params`` and stripped of its rich text when asked to.
+    """
+
+    __slots__ = ("index", "only_tags", "params", "slot", "strip")
+
+    def __init__(
+        self,
+        index: int,
+        slot: int,
+        *,
+        params: list[int | float] | None = None,
+        strip: bool = False,
+        only_tags: list[str] | None = None,
+    ) -> None:
+        self.index = index
+        self.slot = slot
+        self.params = params
+        self.strip = strip
+        self.only_tags = only_tags
+
+    def __repr__(self) -> str:
+        return f"<TextRef index={self.index} slot={self.slot}>"
+
+    def render(self, text: str) -> str:
+        if self.params is not None:
+            text = format_with_params(text, self.params)
+        return self.finish(text)
+
+    def finish(self, text: str) -> str:
+        """Strip the already formatted text of its rich text, when asked to."""
+        if self.strip:
+            text = strip_unity_rich_text(text, only_tags=self.only_tags)
+        return text
+
+
+class TextBatch:
+    """Collect the text references of the records of a generator, then resolve them all at once per language.
+
+    The records are built once with :class:`TextRef` placeholders, so the per-language work
+    is a single batched hash lookup and the text substitution itself. Every parameter vector
+    a text is formatted with (the levels of a skill, the ranks of a light cone) is rendered in bulk.
+    """
+
+    def __init__(self) -> None:
+        self._refs: list[TextRef] = []
+        self._slots: dict[str, int] = {}
+        # Slot -> the references formatting its text with parameters
+        self._formatted: dict[int, list[TextRef]] = {}
+
+    def __len__(self) -> int:
+        return len(self._refs)
+
+    def ref(
+        self,
+        hash_int_str: int | str | Hashable,
+        *,
+        params: list[int | float] | None = None,
+        strip: bool = False,
+        only_tags: list[str] | None = None,
+    ) -> TextRef:
+        if isinstance(hash_int_str, dict):
+            hash_int_str = hash_int_str["Hash"]
+        key = str(hash_int_str)
+        slot = self._slots.setdefault(key, len(self._slots))
+        text_ref = TextRef(len(self._refs), slot, params=params, strip=strip, only_tags=only_tags)
+        self._refs.append(text_ref)
+        if params is not None:
+            self._formatted.setdefault(slot, []).append(text_ref)
+        return text_ref
+
+    def resolve(self, resolver: TextResolver) -> ResolvedTexts:
+        texts = resolver.resolve_many(list(self._slots.keys()))
+        formatted = [texts[text_ref.slot] for text_ref in self._refs]
+        for slot, text_refs in self._formatted.items():
+            levels = format_levels_with_params(texts[slot], [text_ref.params for text_ref in text_refs])  # type: ignore
+            for text_ref, text in zip(text_refs, levels, strict=True):
+                formatted[text_ref.index] = text
+        return ResolvedTexts(
+            resolver.language, [text_ref.finish(text) for text_ref, text in zip(self._refs, formatted, strict=True)]
+        )
+
+
+class ResolvedTexts:
+    """The texts of a :class:`TextBatch` in one language."""
+
+    def __init__(self, language: str, texts: list[str]) -> None:
+        self.language = language
+        self._texts = texts
+
+    def __getitem__(self, text_ref: TextRef | str) -> str:
+        if isinstance(text_ref, TextRef):
+            return self._texts[text_ref.index]
+        return text_ref
+
+    def default(self, obj: Any) -> Any:
+        """``orjson.dumps`` hook substituting the placeholders while the record is serialized."""
+        if isinstance(obj, TextRef):
+            return self._texts[obj.index]
+        raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def _iter_text_refs(value: Any, path: str) -> Iterator[tuple[str, TextRef]]:
+    if isinstance(value, TextRef):
+        yield path, value
+    elif isinstance(value, msgspec.Struct):
+        for name in value.__struct_fields__:
+            yield from _iter_text_refs(getattr(value, name), f"{path}.{name}" if path else name)
+    elif isinstance(value, dict):
+        for key, item in value.items():
+            yield from _iter_text_refs(item, f"{path}.{key}" if path else str(key))
+    elif isinstance(value, list):
+        for index, item in enumerate(value):
+            yield from _iter_text_refs(item, f"{path}.{index}" if path else str(index))
+
+
+def _neutral_default(obj: Any) -> Any:
+    if isinstance(obj, TextRef):
+        return None
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+class LocalizedOutput:
+    """An output whose records hold :class:`TextRef` placeholders, saved in the current output layout.
+
+    In the merged layout, every ``index/<lang>/<name>.json`` holds the records with the texts
+    of its language. In the split layout the records are saved once, in ``index/base/<name>.json``,
+    with ``null`` in place of the texts, and ``index/<lang>/<name>.text.json`` only maps each record ID
+    to its texts by field path (``"name"``, ``"levels.0.desc"``). :func:`merge_localized` gives the
+    merged records back from the two. The both layout writes all of them.
+
+    With ``stream``, the records files are encoded by :func:`save_config_stream` instead.
+    """
+
+    def __init__(self, config_name: str, data: dict[str, Any], *, stream: bool = False) -> None:
+        self.config_name = config_name.removesuffix(".json")
+        self.data = data
+        self.stream = stream
+        self.layout = get_output_layout()
+        self._text_fields = {key: list(_iter_text_refs(record, "")) for key, record in data.items()}
+        self._base_saved = False
+
+    def save(self, texts: ResolvedTexts) -> None:
+        """Save the outputs of ``texts.language``, the language-neutral one along with the first language."""
+        if self.layout != "split":
+            self._save_records(texts.language, texts.default)
+        if self.layout == "merged":
+            return
+        if not self._base_saved:
+            BASE_INDEX_DIR.mkdir(parents=True, exist_ok=True)
+            self._save_records(BASE_INDEX_DIR.name, _neutral_default)
+            self._base_saved = True
+        overlay = {
+            key: {path: texts[text_ref] for path, text_ref in fields}
+            for key, fields in self._text_fields.items()
+            if fields
+        }
+        save_config(f"{self.config_name}.text", overlay, lang=texts.language)
+
+    def _save_records(self, lang: str, default: Callable[[Any], Any]) -> None:
+        if self.stream:
+            save_config_stream(self.config_name, sorted(self.data.items()), lang=lang, default=default)
+        else:
+            save_config(self.config_name, self.data, lang=lang, default=default)
+
+
+def merge_localized(base: dict[str, Any], overlay: Mapping[str, Mapping[str, str]]) -> dict[str, Any]:
+    """Merge the decoded ``index/base/<name>.json`` and ``index/<lang>/<name>.text.json`` back, in place."""
+    for key, fields in overlay.items():
+        for path, text in fields.items():
+            *parents, name = path.split(".")
+            target: Any = base[key]
+            for part in parents:
+                target = target[int(part)] if isinstance(target, list) else target[part]
+            if isinstance(target, list):
+                target[int(name)] = text
+            else:
+                target[name] = text
+    return base
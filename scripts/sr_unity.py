@@ -1,20 +1,85 @@
 from __future__ import annotations
 
+import functools
 import re
 
 __all__ = ("strip_unity_rich_text",)
 
-_UNITY_RT_SIZE = re.compile(r"<size=(?:\d+)>(.+?)</size>")
-_UNITY_RT_COLOR = re.compile(r"<color=(?:[#]?[\w\d]+)>(.+?)</color>")
-_UNITY_RT_MAT = re.compile(r"<material=(?:[\d+])>(.+?)</material>")
+_BASIC_TAGS = ("b", "i", "unbreak", "s", "u", "lowercase", "uppercase", "smallcaps", "nobr", "sup")
+# The tags with an attribute are only stripped when both the opening and closing tag are there.
+_UNITY_RT_PAIRED = re.compile(
+    r"<(?:(?P<size>size)=\d+|(?P<color>color)=#?[\w\d]+|(?P<material>material)=[\d+])>"
+    r"|</(?P<close>size|color|material)>|(?P<newline>\n)"
+)
+# The reference behaviour, one non-greedy pass per tag: kept for the texts the single pass cannot mirror.
+_UNITY_RT_PAIRED_PASSES = (
+    re.compile(r"<size=(?:\d+)>(.+?)</size>"),
+    re.compile(r"<color=(?:[#]?[\w\d]+)>(.+?)</color>"),
+    re.compile(r"<material=(?:[\d+])>(.+?)</material>"),
+)
 
 
-def strip_unity_rich_text(text: str, *, only_tags: list[str] | None = None) -> str:
-    basic_format = only_tags or ["b", "i", "unbreak", "s", "u", "lowercase", "uppercase", "smallcaps", "nobr", "sup"]
-    for tag in basic_format:
-        text = text.replace(f"<{tag}>", "").replace(f"</{tag}>", "")
+@functools.lru_cache(maxsize=32)
+def _compile_basic_tags(tags: tuple[str, ...]) -> re.Pattern[str]:
+    return re.compile("</?(?:{})>".format("|".join(re.escape(tag) for tag in tags)))
+
+
+def _strip_paired_tags_by_pass(text: str) -> str:
+    for pattern in _UNITY_RT_PAIRED_PASSES:
+        text = pattern.sub(r"\1", text)
+    return text
+
+
+def _strip_paired_tags(text: str) -> str:
+    # The single pass matches the per tag passes when every tag is closed on the same line, by the
+    # next closing tag of its kind, around some actual text. Anything else (an empty pair, a nested
+    # or unbalanced tag of the same kind) goes through the per tag passes.
+    parts: list[str] = []
+    opened: dict[str, int] = {}
+    text_runs = 0
+    last = 0
+    for match in _UNITY_RT_PAIRED.finditer(text):
+        kind = match.lastgroup
+        if kind == "newline":
+            if opened:
+                return _strip_paired_tags_by_pass(text)
+            continue
+        if match.start() > last:
+            parts.append(text[last : match.start()])
+            text_runs += 1
+        last = match.end()
+        if kind == "close":
+            if opened.pop(match.group("close"), text_runs) == text_runs:
+                return _strip_paired_tags_by_pass(text)
+        elif kind in opened:
+            return _strip_paired_tags_by_pass(text)
+        else:
+            opened[kind] = text_runs  # type: ignore
+    if opened:
+        return _strip_paired_tags_by_pass(text)
+    parts.append(text[last:])
+    stripped = "".join(parts)
+    # Stripping the tags joined the text around them into a new tag, which a later pass would have stripped.
+    if any(match.lastgroup != "newline" for match in _UNITY_RT_PAIRED.finditer(stripped)):
+        return _strip_paired_tags_by_pass(text)
+    return stripped
+
 
-    complex_formats = [_UNITY_RT_SIZE, _UNITY_RT_COLOR, _UNITY_RT_MAT]
-    for tag in complex_formats:
-        text = tag.sub(r"\1", text)
+@functools.lru_cache(maxsize=1 << 14)
+def _strip_rich_text(text: str, tags: tuple[str, ...]) -> str:
+    if "<" in text:
+        text = _compile_basic_tags(tags).sub("", text)
+        if "=" in text:
+            text = _strip_paired_tags(text)
     return text.replace("\\n", "\n")
+
+
+def strip_unity_rich_text(text: str, *, only_tags: list[str] | None = None) -> str:
+    """Strip the Unity rich text tags from ``text``.
+
+    The ``only_tags`` (or basic formatting tags) are always removed, the ``size``, ``color``
+    and ``material`` tags only when closed on the same line around some text, in a single pass
+    for the well-formed texts. The escaped ``\\n`` are turned into actual line breaks.
+    """
+
+    return _strip_rich_text(text, tuple(only_tags) if only_tags else _BASIC_TAGS)
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import sys
+
+from sr_assets import AssetEntry, build_asset_manifest, load_asset_manifest
+
+from xdedupe_assets import asset_family, group_duplicates
+
+# Byte-identical images under several families, as found in icon/.
+SAMPLE_KEYS = {
+    "icon/character/None.png": "none",
+    "icon/consumable/None.png": "none",
+    "icon/element/None.png": "none",
+    "icon/path/None.png": "none",
+    "icon/item/71000.png": "relic",
+    "icon/relic/IconRelic_101_1.png": "relic",
+    "icon/relic/IconRelic_101_1_copy.png": "relic",
+    "icon/avatar/1001.png": "march",
+    "icon/character/1001.png": "march",
+}
+
+
+def sample_assets() -> dict[str, AssetEntry]:
+    return {
+        key: AssetEntry(size=1, digest=digest, width=1, height=1, mode="RGBA")
+        for key, digest in SAMPLE_KEYS.items()
+    }
+
+
+def check_groups(name: str, assets: dict[str, AssetEntry]) -> int:
+    groups = group_duplicates(assets)
+    mismatches = 0
+    for keys in groups:
+        families = {asset_family(key) for key in keys}
+        if len(families) > 1:
+            mismatches += 1
+            print(f"  Group spanning {', '.join(sorted(families))}: {keys}")
+    print(f" {name}: {len(groups)} groups, {mismatches} spanning families")
+    return mismatches
+
+
+def main() -> int:
+    print("Grouping the duplicated assets...")
+    mismatches = check_groups("samples", sample_assets())
+    assets, _, _ = build_asset_manifest(load_asset_manifest())
+    mismatches += check_groups("assets", assets)
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import re
+import sys
+import timeit
+from argparse import ArgumentParser, Namespace
+
+from sr_common import format_levels_with_params, format_with_params, get_available_languages, open_textmap_store
+
+# The placeholder kinds and their corner cases: mixed kinds on the same position, [fX] with
+# different decimals, positions without a parameter, a "#" right before a placeholder.
+SAMPLE_TEXTS = [
+    "Deals DMG equal to #1[i]% of ATK and #2[f1]% more for #3[i] turn(s).",
+    "#1[i] #1[i]% #1[f1] #1[f2]%",
+    "#1[f1] then #1[f3] #2[f2]% #2[f2]",
+    "Increases SPD by #4[i] and CRIT Rate by #5[f1]%.",
+    "##1[i][i] #2[i]",
+    "No placeholder at all",
+    "#10[i] is not #1[i]",
+    "<color=#f29e38ff>#1[i]%</color> #2[f1]",
+]
+
+
+def legacy_int_formatter_param(text_data: str, pos: int, param: int | float) -> str:
+    """The position by position replacement format_with_params replaced, kept as the reference for its templates."""
+    i_regex = re.compile(rf"#{pos}\[i\]")
+    ip_regex = re.compile(rf"#{pos}\[i\]%")
+    f_regex = re.compile(rf"#{pos}\[f(\d+)\]")
+    fp_regex = re.compile(rf"#{pos}\[f(\d+)\]%")
+
+    if ip_regex.search(text_data):
+        return ip_regex.sub(f"{round(param * 100)}%", text_data)
+    if i_regex.search(text_data):
+        return i_regex.sub(str(round(param)), text_data)
+    if (fp_res := fp_regex.search(text_data)) is not None:
+        return fp_regex.sub(f"{round(param * 100, int(fp_res.group(1)))}%", text_data)
+    if (f_res := f_regex.search(text_data)) is not None:
+        return f_regex.sub(f"{round(param, int(f_res.group(1)))}", text_data)
+    return text_data
+
+
+def legacy_format_with_params(text_data: str, parameters: list[int | float]) -> str:
+    if not parameters:
+        return text_data
+    for pos, param in enumerate(parameters, 1):
+        text_data = legacy_int_formatter_param(text_data, pos, param)
+    return text_data
+
+
+def collect_texts() -> list[str]:
+    texts = list(SAMPLE_TEXTS)
+    if not get_available_languages():
+        return texts
+    with open_textmap_store() as store:
+        textmap = store.view(store.languages[0])
+        texts.extend(text for text in textmap.values() if "#" in text)
+    return texts
+
+
+def make_levels(seed: int, count: int) -> list[list[int | float]]:
+    """Level vectors of 0 to 8 parameters, mixing ints, negatives and floats that round differently."""
+    values: tuple[int | float, ...] = (0, 1, -2, 0.5, 0.125, 0.15, 12.3456, 1234.5, 0.0005)
+    return [
+        [values[(seed + level * 7 + pos * 5) % len(values)] for pos in range((seed + level) % 9)]
+        for level in range(count)
+    ]
+
+
+def run_benchmark() -> None:
+    text = "Deals #1[i]% ATK, #2[f1]% DEF, #3[i] turns, #4[f2] SPD, #5[i]% and #6[f1]% Break Effect."
+    parameters: list[int | float] = [0.5, 0.125, 2, 12.3456, 0.3, 0.15]
+    levels = [[param * level for param in parameters] for level in range(1, 16)]
+    for name, legacy, current in (
+        ("6 params", lambda: legacy_format_with_params(text, parameters), lambda: format_with_params(text, parameters)),
+        (
+            "15 levels",
+            lambda: [legacy_format_with_params(text, level) for level in levels],
+            lambda: format_levels_with_params(text, levels),
+        ),
+    ):
+        legacy_time = min(timeit.repeat(legacy, number=2000, repeat=5)) / 2000
+        current_time = min(timeit.repeat(current, number=2000, repeat=5)) / 2000
+        print(f" {name}: {legacy_time * 1e6:.1f}us -> {current_time * 1e6:.1f}us per call")
+
+
+def argparser() -> Namespace:
+    parser = ArgumentParser("test_format_params")
+    parser.add_argument("-b", "--bench", action="store_true", help="Also time the legacy and the compiled formatters")
+    return parser.parse_args()
+
+
+def main(args: Namespace) -> int:
+    texts = collect_texts()
+    print(f"Comparing {len(texts)} texts against the legacy formatter...")
+    mismatches = 0
+    for seed, text in enumerate(texts):
+        levels = make_levels(seed, 25)
+        expected = [legacy_format_with_params(text, parameters) for parameters in levels]
+        single = [format_with_params(text, parameters) for parameters in levels]
+        bulk = format_levels_with_params(text, levels)
+        if single != expected or bulk != expected:
+            mismatches += 1
+            print(f"  Mismatch for {text!r} {levels}: {single!r} / {bulk!r} != {expected!r}")
+    print(f" {mismatches} mismatches")
+    if args.bench:
+        run_benchmark()
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(argparser()))
@@ -1,168 +1,116 @@
 from __future__ import annotations
 
+import functools
+import re
+import sys
+import time
+from argparse import ArgumentParser, Namespace
+from collections.abc import Iterable, Iterator
 from pathlib import Path
-from typing import Any, Set
+from typing import Any
 
 import orjson
-from sr_common import ROOT_DIR
-
-INDEX_DIR = ROOT_DIR / "index" / "en"
-
-
-def read_json(path: Path) -> dict[str, Any]:
-    with path.open("rb") as fp:
-        return orjson.loads(fp.read())
-
-
-def process_avatars():
-    print("Processing avatars...")
-    avatars = INDEX_DIR / "avatars.json"
-    avatars_data = read_json(avatars)
-
-    for avatar in avatars_data.values():
-        assets_path = ROOT_DIR / str(avatar["icon"])
-        if not assets_path.exists():
-            print(f" Missing {assets_path}")
-
-
-def process_character_ranks():
-    print(" Processing character ranks/eidolons...")
-    chara_path = INDEX_DIR / "character_ranks.json"
-    chara_data = read_json(chara_path)
-
-    for chara in chara_data.values():
-        assets_path = ROOT_DIR / str(chara["icon"])
-        if not assets_path.exists():
-            print(f"  Missing {assets_path}")
-
-
-def process_character_skills():
-    print(" Processing character skills...")
-    chara_path = INDEX_DIR / "character_skills.json"
-    chara_data = read_json(chara_path)
-
-    for chara in chara_data.values():
-        assets_path = ROOT_DIR / str(chara["icon"])
-        if not assets_path.exists():
-            print(f"  Missing {assets_path}")
-
-    print(" Processing character skill trees...")
-    chara_path = INDEX_DIR / "character_skill_trees.json"
-    chara_data = read_json(chara_path)
-
-    for chara in chara_data.values():
-        assets_path = ROOT_DIR / str(chara["icon"])
-        if not assets_path.exists():
-            print(f"  Missing {assets_path}")
-
-
-def process_characters():
-    print("Processing characters...")
-    chara_path = INDEX_DIR / "characters.json"
-    chara_data = read_json(chara_path)
-
-    for chara in chara_data.values():
-        icon_path = ROOT_DIR / str(chara["icon"])
-        preview_path = ROOT_DIR / str(chara["preview"])
-        portrait_path = ROOT_DIR / str(chara["portrait"])
-        if not icon_path.exists():
-            print(f" Missing {icon_path}")
-        if not preview_path.exists():
-            print(f" Missing {preview_path}")
-        if not portrait_path.exists():
-            print(f" Missing {portrait_path}")
-
-    process_character_skills()
-    process_character_ranks()
-
-
-def process_inventory_items():
-    print("Processing items...")
-    chara_path = INDEX_DIR / "items.json"
-    chara_data = read_json(chara_path)
-
-    missing_icons: Set[Path] = set()
-    for chara in chara_data.values():
-        icon_path = ROOT_DIR / str(chara["icon"])
-        if not icon_path.exists():
-            missing_icons.add(icon_path)
-    sorted_icons: list[Path] = sorted(list(missing_icons), key=lambda x: int(x.stem))
-    for icon_path in sorted_icons:
-        print(f" Missing {icon_path}")
-
-
-def process_light_cones():
-    print("Processing light cones...")
-    lc_path = INDEX_DIR / "light_cones.json"
-    lc_data = read_json(lc_path)
-
-    for chara in lc_data.values():
-        icon_path = ROOT_DIR / str(chara["icon"])
-        preview_path = ROOT_DIR / str(chara["preview"])
-        portrait_path = ROOT_DIR / str(chara["portrait"])
-        if not icon_path.exists():
-            print(f" Missing {icon_path}")
-        if not preview_path.exists():
-            print(f" Missing {preview_path}")
-        if not portrait_path.exists():
-            print(f" Missing {portrait_path}")
-
-
-def process_rogue_blessings():
-    print(" Processing rogue blessings...")
-    simu_path = INDEX_DIR / "rogue_blessings.json"
-    simu_data = read_json(simu_path)
-
-    for simu in simu_data.values():
-        icon_path = ROOT_DIR / str(simu["icon"])
-        if not icon_path.exists():
-            print(f"  Missing {icon_path}")
-
-
-def process_rogue_curios():
-    print(" Processing rogue curios...")
-    simu_path = INDEX_DIR / "rogue_curios.json"
-    simu_data = read_json(simu_path)
-
-    for simu in simu_data.values():
-        icon_path = ROOT_DIR / str(simu["icon"])
-        if not icon_path.exists():
-            print(f"  Missing {icon_path}")
-
-
-def process_rogues():
-    print("Processing rogues...")
-    simu_path = INDEX_DIR / "rogue.json"
-    simu_data = read_json(simu_path)
-
-    for simu in simu_data.values():
-        icon_path = ROOT_DIR / str(simu["icon"])
-        if not icon_path.exists():
-            print(f"  Missing {icon_path}")
-
-    process_rogue_blessings()
-    process_rogue_curios()
-
-
-def process_relics():
-    print("Processing relics...")
-    relic_path = INDEX_DIR / "relics.json"
-    relic_data = read_json(relic_path)
-
-    for relic in relic_data.values():
-        icon_path = ROOT_DIR / str(relic["icon"])
-        if not icon_path.exists():
-            print(f"  Missing {icon_path}")
-
-
-def main():
-    process_avatars()
-    process_characters()
-    process_inventory_items()
-    process_light_cones()
-    process_rogues()
-    process_relics()
+from sr_assets import ASSET_ROOTS, scan_assets
+from sr_common import INDEX_DIR, ROOT_DIR
+
+GENERATED_DIR = ROOT_DIR / "generated"
+# The xgenerate_messages outputs
+GENERATED_PATTERNS = ("message_contacts.json", "messages.json", "messages/*.json")
+
+
+@functools.cache
+def _asset_ref_patterns(asset_roots: tuple[str, ...]) -> list[re.Pattern[bytes]]:
+    # One pattern per root so each starts with a literal the regex engine can search for quickly.
+    return [re.compile(rb'"(' + re.escape(asset_root.encode()) + rb'/[^"\\]*)"') for asset_root in asset_roots]
+
+
+def find_asset_refs(raw: bytes, asset_roots: tuple[str, ...] = ASSET_ROOTS) -> set[str]:
+    """Find the asset paths in a JSON document without parsing it.
+
+    The asset paths never need escaping, so they are plain string tokens starting with an
+    asset root, scanning the bytes for those is an order of magnitude faster than walking
+    the parsed document.
+    """
+    refs: set[str] = set()
+    for pattern in _asset_ref_patterns(asset_roots):
+        for match in pattern.finditer(raw):
+            # Skip an escaped quote inside a longer text.
+            if match.start() == 0 or raw[match.start() - 1] != 0x5C:
+                refs.add(match.group(1).decode("utf-8"))
+    return refs
+
+
+def iter_reference_files(languages: list[str] | None = None) -> Iterator[Path]:
+    for lang_dir in sorted(INDEX_DIR.iterdir()):
+        if lang_dir.is_dir() and (languages is None or lang_dir.name in languages):
+            yield from sorted(lang_dir.glob("*.json"))
+    for pattern in GENERATED_PATTERNS:
+        yield from sorted(GENERATED_DIR.glob(pattern))
+
+
+def collect_references(files: Iterable[Path]) -> dict[str, set[str]]:
+    """Map every referenced asset to the files referencing it."""
+    references: dict[str, set[str]] = {}
+    # The language-neutral index files are hard links of each other, only parse them once.
+    parsed: dict[tuple[int, int], set[str]] = {}
+    for path in files:
+        stat = path.stat()
+        inode = (stat.st_dev, stat.st_ino)
+        refs = parsed.get(inode)
+        if refs is None:
+            refs = parsed[inode] = find_asset_refs(path.read_bytes())
+        source = path.relative_to(ROOT_DIR).as_posix()
+        for ref in refs:
+            references.setdefault(ref, set()).add(source)
+    return references
+
+
+def validate(languages: list[str] | None = None) -> dict[str, Any]:
+    start = time.perf_counter()
+    assets = scan_assets()
+    references = collect_references(iter_reference_files(languages))
+    missing = {ref: sorted(sources) for ref, sources in sorted(references.items()) if ref not in assets}
+    orphans = sorted(assets.difference(references))
+    return {
+        "assets": len(assets),
+        "references": len(references),
+        "missing": missing,
+        "orphans": orphans,
+        "elapsed": round(time.perf_counter() - start, 3),
+    }
+
+
+def print_report(report: dict[str, Any]) -> None:
+    print(f"Checked {report['references']} referenced assets against {report['assets']} files")
+    if report["missing"]:
+        print(f"Missing {len(report['missing'])} assets:")
+        for ref, sources in report["missing"].items():
+            print(f" Missing {ref} (in {', '.join(sources[:3])}{', ...' if len(sources) > 3 else ''})")
+    if report["orphans"]:
+        print(f"Found {len(report['orphans'])} orphaned assets:")
+        for orphan in report["orphans"]:
+            print(f" Orphan {orphan}")
+    print(f"Done in {report['elapsed']}s")
+
+
+def argparser() -> Namespace:
+    parser = ArgumentParser("test_image_path")
+    parser.add_argument("-l", "--lang", nargs="+", default=None, help="Only check these languages")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    parser.add_argument("--strict", action="store_true", help="Also fail when there are orphaned assets")
+    return parser.parse_args()
+
+
+def main(args: Namespace) -> int:
+    report = validate(args.lang)
+    if args.json:
+        sys.stdout.buffer.write(orjson.dumps(report, option=orjson.OPT_INDENT_2) + b"\n")
+    else:
+        print_report(report)
+    if report["missing"] or (args.strict and report["orphans"]):
+        return 1
+    return 0
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main(argparser()))
@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import sys
+from collections.abc import Iterator
+from typing import Any
+
+import orjson
+from sr_common import (
+    CONFIG_DIR,
+    canonical_asset,
+    pop_unhandled_paths,
+    remap_icon_or_image,
+    remap_path_name,
+    remap_skill_name,
+)
+
+# Every way the generators call remap_icon_or_image.
+CALL_OPTIONS: list[dict[str, str]] = [{}, {"force_initial": "rogue/curios"}, {"item_id": "100"}]
+
+
+def legacy_remap_icon_or_image(path: str, *, force_initial: str | None = None, item_id: str | None = None):
+    """The if/elif chain remap_icon_or_image replaced, kept as the reference for its rule table."""
+    if not path:
+        return path
+    # Simulated Universe
+    if path.startswith("SpriteOutput/Rogue/Buff/"):
+        return path.replace("SpriteOutput/Rogue/Buff/", "icon/rogue/blessings/")
+    if path.startswith("SpriteOutput/ItemIcon/"):
+        if force_initial is not None:
+            return path.replace("SpriteOutput/ItemIcon/", f"icon/{force_initial}/")
+        return path.replace("SpriteOutput/ItemIcon/", "icon/item/")
+    if path.startswith("SpriteOutput/AvatarProfessionTattoo/Profession/"):
+        path = path.replace(
+            "SpriteOutput/AvatarProfessionTattoo/Profession/BgPathsn", "icon/rogue/blessings/RogueIntervene"
+        )
+        path = path.replace(
+            "SpriteOutput/AvatarProfessionTattoo/Profession/BgPaths", "icon/rogue/blessings/RogueIntervene"
+        )
+        return path
+    if path.startswith("SpriteOutput/ProfessionIconMiddle/IconProfession"):
+        path = path.replace("SpriteOutput/ProfessionIconMiddle/IconProfession", "icon/path/")
+        path = path.replace("Middle", "")
+        return remap_path_name(path)
+    if path.startswith("SpriteOutput/Rogue/MiracleIcon/"):
+        return path.replace("SpriteOutput/Rogue/MiracleIcon/", "icon/rogue/curios/")
+    if path.startswith("SpriteOutput/Rogue/Map/"):
+        path = path.replace("SpriteOutput/Rogue/Map/", "icon/rogue/room/")
+        if "RandomIcon" in path and "RogueDlc" in path:
+            path = path.replace("RandomIcon", "RandomSwarmIcon")
+        if "BossIcon" in path and "RogueDlc" in path:
+            path = path.replace("BossIcon", "BossSwarmIcon")
+        return path.replace("/RogueDlc", "/").replace("/Rogue", "/")
+
+    # Messages
+    if path.startswith("SpriteOutput/AvatarRoundIcon/UI_Message_Contacts"):
+        path = path.split("UI_Message_Contacts")[1][1:]
+        return f"icon/avatar/{path}"
+    if path.startswith("SpriteOutput/AvatarRoundIcon/Series/"):
+        return path.replace("SpriteOutput/AvatarRoundIcon/Series/", "icon/avatar/")
+    if path.startswith("SpriteOutput/AvatarRoundIcon"):
+        path = path.split("AvatarRoundIcon")[1][1:]
+        path = path.replace("UI_Message_Group_", "Group")
+        if path.startswith("UI_Message_"):
+            path = path.split("UI_Message_")[1]
+        return f"icon/avatar/{path}"
+    if path.startswith("SpriteOutput/MonsterRoundIcon/"):
+        return path.replace("SpriteOutput/MonsterRoundIcon/", "icon/avatar/")
+    if path.startswith("SpriteOutput/Emoji/"):
+        if path.startswith("SpriteOutput/Emoji/Mission/"):
+            if item_id is not None:
+                return f"icon/emoji/{item_id}.png"
+            return path.replace("SpriteOutput/Emoji/Mission/", "icon/emoji/Mission")
+        return path.replace("SpriteOutput/Emoji/", "icon/emoji/")
+    if path.startswith("SpriteOutput/PhoneMessagePic/"):
+        path = path.replace("SpriteOutput/PhoneMessagePic/PhoneMessagePic_", "image/messages/")
+        return path.replace("SpriteOutput/PhoneMessagePic/PhoneMessagePic", "image/messages/E")
+    if path.startswith("SpriteOutput/PhoneMessageChallenge/PhoneMessageChallenge_"):
+        return path.replace("SpriteOutput/PhoneMessageChallenge/PhoneMessageChallenge_", "image/messages/Raid")
+    if path.startswith("SpriteOutput/Quest/GuessTheSilhouette/"):
+        return path.replace("SpriteOutput/Quest/GuessTheSilhouette/", "image/messages/March")
+    if path.startswith("SpriteOutput/Quest/Heliobus/PhoneMessageHeliobus"):
+        return path.replace("SpriteOutput/Quest/Heliobus/PhoneMessageHeliobus/", "image/messages/Link_")
+
+    # Characters
+    if path.startswith("SpriteOutput/SkillIcons/"):
+        path = path.split("/")[-1].replace("SkillIcon_", "").lower()
+        return f"icon/skill/{remap_skill_name(path)}"
+
+    # Properties
+    if path.startswith("SpriteOutput/UI/Avatar/Icon/"):
+        return path.replace("SpriteOutput/UI/Avatar/Icon/", "icon/property/")
+
+    # Aetherium Wars
+    if path.startswith("SpriteOutput/Quest/AetherDivide"):
+        return path.replace(
+            "SpriteOutput/Quest/AetherDivide/AssembleSkill/Icon/IconAetherDivideAssembleSkill",
+            "icon/aether/assemble_skills/AssembleSkill",
+        )
+    return path
+
+
+def walk_strings(data: Any) -> Iterator[str]:
+    if isinstance(data, str):
+        yield data
+    elif isinstance(data, dict):
+        for value in data.values():
+            yield from walk_strings(value)
+    elif isinstance(data, list):
+        for value in data:
+            yield from walk_strings(value)
+
+
+def collect_paths() -> set[str]:
+    paths: set[str] = set()
+    for config_path in sorted(CONFIG_DIR.glob("*.json")):
+        with config_path.open("rb") as fp:
+            data = orjson.loads(fp.read())
+        paths.update(text for text in walk_strings(data) if "/" in text)
+    return paths
+
+
+def main() -> int:
+    print("Collecting the paths in exceloutput...")
+    paths = collect_paths()
+    print(f" Comparing {len(paths)} paths against the legacy remapper...")
+    mismatches = 0
+    for path in sorted(paths):
+        for options in CALL_OPTIONS:
+            # The remapped path then goes through the asset aliases, if any.
+            expected = canonical_asset(legacy_remap_icon_or_image(path, **options))
+            actual = remap_icon_or_image(path, **options)
+            if actual != expected:
+                mismatches += 1
+                print(f"  Mismatch for {path} {options}: {actual!r} != {expected!r}")
+    unhandled = pop_unhandled_paths()
+    print(f" {mismatches} mismatches, {len(unhandled)} unhandled paths")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import itertools
+import re
+import sys
+from argparse import ArgumentParser, Namespace
+
+from sr_common import get_available_languages, open_textmap_store
+from sr_unity import strip_unity_rich_text
+
+# Every way the generators call strip_unity_rich_text.
+CALL_OPTIONS: list[list[str] | None] = [None, ["unbreak"]]
+# The pieces the generated texts are made of: openers, closers, text, line breaks and the
+# halves of a tag that only forms once the tags between them are stripped.
+TOKENS = (
+    "<color=#a>",
+    "<color=#b>",
+    "</color>",
+    "<size=20>",
+    "</size>",
+    "<material=1>",
+    "</material>",
+    "<unbreak>",
+    "</unbreak>",
+    "x",
+    "\n",
+    "<color=#c",
+    ">",
+)
+SAMPLE_TEXTS = [
+    "<color=#f29e38ff></color>",
+    "<color=#a>x<color=#b>y</color>",
+    "<color=#a>x<color=#b>y</color>z</color>",
+    "<size=1>z<color=#a></size></color>",
+    "<unbreak><color=#f29e38ff>#1[i]%</color></unbreak>\\nNext line",
+    "<color=#a>x\n</color>",
+]
+
+_LEGACY_RT_SIZE = re.compile(r"<size=(?:\d+)>(.+?)</size>")
+_LEGACY_RT_COLOR = re.compile(r"<color=(?:[#]?[\w\d]+)>(.+?)</color>")
+_LEGACY_RT_MAT = re.compile(r"<material=(?:[\d+])>(.+?)</material>")
+
+
+def legacy_strip_unity_rich_text(text: str, *, only_tags: list[str] | None = None) -> str:
+    """The regex passes strip_unity_rich_text replaced, kept as the reference for its scanner."""
+    basic_format = only_tags or ["b", "i", "unbreak", "s", "u", "lowercase", "uppercase", "smallcaps", "nobr", "sup"]
+    for tag in basic_format:
+        text = text.replace(f"<{tag}>", "").replace(f"</{tag}>", "")
+
+    for tag in (_LEGACY_RT_SIZE, _LEGACY_RT_COLOR, _LEGACY_RT_MAT):
+        text = tag.sub(r"\1", text)
+    return text.replace("\\n", "\n")
+
+
+def collect_texts(length: int) -> list[str]:
+    texts = list(SAMPLE_TEXTS)
+    for size in range(1, length + 1):
+        texts.extend("".join(tokens) for tokens in itertools.product(TOKENS, repeat=size))
+    if get_available_languages():
+        with open_textmap_store() as store:
+            textmap = store.view(store.languages[0])
+            texts.extend(text for text in textmap.values() if "<" in text)
+    return texts
+
+
+def argparser() -> Namespace:
+    parser = ArgumentParser("test_strip_rich_text")
+    parser.add_argument("-l", "--length", type=int, default=4, help="Compare every text of up to N tokens")
+    return parser.parse_args()
+
+
+def main(args: Namespace) -> int:
+    texts = collect_texts(args.length)
+    print(f"Comparing {len(texts)} texts against the legacy regex passes...")
+    mismatches = 0
+    for text in texts:
+        for only_tags in CALL_OPTIONS:
+            expected = legacy_strip_unity_rich_text(text, only_tags=only_tags)
+            actual = strip_unity_rich_text(text, only_tags=only_tags)
+            if actual != expected:
+                mismatches += 1
+                print(f"  Mismatch for {text!r} {only_tags}: {actual!r} != {expected!r}")
+    print(f" {mismatches} mismatches")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(argparser()))
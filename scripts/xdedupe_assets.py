@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import os
+import time
+from argparse import ArgumentParser, Namespace
+
+from sr_assets import AssetEntry, build_asset_manifest, load_asset_manifest, save_asset_manifest, write_manifest
+from sr_common import ASSET_ALIASES_PATH, ROOT_DIR
+
+# Bump this whenever the alias map layout changes.
+_ALIASES_VERSION = 1
+
+
+def asset_family(key: str) -> str:
+    """The folder of an asset, ``icon/relic`` for ``icon/relic/IconRelic_101_1.png``."""
+    return key.rpartition("/")[0]
+
+
+def group_duplicates(assets: dict[str, AssetEntry]) -> list[list[str]]:
+    """Group the byte-identical assets of each family, the canonical path (the first in sort order) first.
+
+    The same image in two families is kept under both names: the atlases and the icon bundle are
+    keyed by the paths of their own families, which an alias into another family would break.
+    """
+    by_digest: dict[tuple[str, str], list[str]] = {}
+    for key, asset in assets.items():
+        by_digest.setdefault((asset_family(key), asset.digest), []).append(key)
+    return sorted(sorted(keys) for keys in by_digest.values() if len(keys) > 1)
+
+
+def link_duplicate(canonical: str, alias: str) -> bool:
+    """Replace ``alias`` with a hard link to ``canonical``, return whether it was not one already."""
+    canonical_path, alias_path = ROOT_DIR / canonical, ROOT_DIR / alias
+    if alias_path.samefile(canonical_path):
+        return False
+    temp_path = alias_path.with_name(f"{alias_path.name}.tmp")
+    temp_path.unlink(missing_ok=True)
+    os.link(canonical_path, temp_path)
+    temp_path.replace(alias_path)
+    return True
+
+
+def argparser() -> Namespace:
+    parser = ArgumentParser("xdedupe_assets")
+    parser.add_argument("--link", action="store_true", help="Also hard link the duplicates to their canonical file")
+    parser.add_argument("--dry-run", action="store_true", help="Only report the duplicates")
+    return parser.parse_args()
+
+
+def main(args: Namespace) -> None:
+    start = time.perf_counter()
+    print("Scanning assets...")
+    assets, stamps, _ = build_asset_manifest(load_asset_manifest())
+    save_asset_manifest(assets, stamps)
+
+    groups = group_duplicates(assets)
+    aliases = {alias: keys[0] for keys in groups for alias in keys[1:]}
+    duplicate_size = sum(assets[alias].size for alias in aliases)
+    distinct = len({asset.digest for asset in assets.values()})
+    print(f"{len(assets)} assets, {distinct} distinct images")
+    print(f"{len(aliases)} duplicates in {len(groups)} groups, {duplicate_size / 1024 / 1024:.2f} MiB reclaimable")
+    for keys in groups:
+        print(f" {keys[0]} <- {', '.join(keys[1:])}")
+    if args.dry_run:
+        return
+
+    write_manifest(ASSET_ALIASES_PATH, {"version": _ALIASES_VERSION, "aliases": aliases})
+    print(f"Saved {ASSET_ALIASES_PATH.name}, the generators now emit the canonical paths")
+    if args.link:
+        linked = [alias for alias, canonical in aliases.items() if link_duplicate(canonical, alias)]
+        reclaimed = sum(assets[alias].size for alias in linked)
+        print(f"Linked {len(linked)} duplicates, reclaimed {reclaimed / 1024 / 1024:.2f} MiB")
+    print(f"Done in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main(argparser())
@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+import time
+from argparse import ArgumentParser, Namespace
+
+from sr_assets import ASSETS_MANIFEST_PATH, build_asset_manifest, load_asset_manifest, save_asset_manifest
+
+
+def argparser() -> Namespace:
+    parser = ArgumentParser("xgenerate_asset_manifest")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="Number of threads reading the assets")
+    parser.add_argument("--force", action="store_true", help="Read every asset again, even the unchanged ones")
+    return parser.parse_args()
+
+
+def main(args: Namespace) -> None:
+    start = time.perf_counter()
+    previous = {} if args.force else load_asset_manifest()
+    print("Scanning assets...")
+    assets, stamps, read = build_asset_manifest(previous, workers=args.jobs)
+    removed = len(previous.keys() - assets.keys())
+    save_asset_manifest(assets, stamps)
+    total_size = sum(asset.size for asset in assets.values())
+    print(f"Described {len(assets)} assets ({total_size / 1024 / 1024:.1f} MiB): {read} read, {removed} removed")
+    print(f"Saved {ASSETS_MANIFEST_PATH.name} in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main(argparser())
@@ -0,0 +1,253 @@
+from __future__ import annotations
+
+import time
+from argparse import ArgumentParser, Namespace
+from dataclasses import dataclass, field
+
+from PIL import Image
+from sr_assets import (
+    AssetEntry,
+    build_asset_manifest,
+    digest_assets,
+    load_asset_manifest,
+    read_manifest,
+    save_asset_manifest,
+    write_manifest,
+)
+from sr_common import INDEX_DIR, ROOT_DIR
+
+# The small icon families a profile card pulls dozens of.
+ATLAS_FAMILIES = (
+    "icon/element",
+    "icon/path",
+    "icon/property",
+    "icon/skill",
+    "icon/rogue/blessings",
+    "icon/relic",
+)
+ATLAS_DIR = ROOT_DIR / "atlas"
+ATLAS_INDEX_PATH = INDEX_DIR / "atlas_index.json"
+DEFAULT_MAX_SIZE = 2048
+# Transparent gap around every sprite so filtering never bleeds a neighbour in.
+DEFAULT_PADDING = 2
+
+
+@dataclass
+class SpriteRect:
+    atlas: str
+    x: int
+    y: int
+    width: int
+    height: int
+
+
+@dataclass
+class AtlasInfo:
+    family: str
+    width: int
+    height: int
+
+
+@dataclass
+class AtlasFamily:
+    digest: str
+    atlases: list[str] = field(default_factory=list)
+
+
+@dataclass
+class AtlasIndex:
+    families: dict[str, AtlasFamily] = field(default_factory=dict)
+    atlases: dict[str, AtlasInfo] = field(default_factory=dict)
+    sprites: dict[str, SpriteRect] = field(default_factory=dict)
+
+
+def _contains(outer: tuple[int, int, int, int], inner: tuple[int, int, int, int]) -> bool:
+    outer_x, outer_y, outer_width, outer_height = outer
+    x, y, width, height = inner
+    return x >= outer_x and y >= outer_y and x + width <= outer_x + outer_width and y + height <= outer_y + outer_height
+
+
+class MaxRectsBin:
+    """A MaxRects bin packer, placing each rectangle by best short side fit."""
+
+    def __init__(self, width: int, height: int) -> None:
+        self.width = width
+        self.height = height
+        self.used_width = 0
+        self.used_height = 0
+        # x, y, width, height
+        self._free: list[tuple[int, int, int, int]] = [(0, 0, width, height)]
+
+    def insert(self, width: int, height: int) -> tuple[int, int] | None:
+        best: tuple[int, int] | None = None
+        best_fit = (self.width + 1, self.height + 1)
+        for free_x, free_y, free_width, free_height in self._free:
+            if width <= free_width and height <= free_height:
+                left_x, left_y = free_width - width, free_height - height
+                fit = (min(left_x, left_y), max(left_x, left_y))
+                if fit < best_fit:
+                    best, best_fit = (free_x, free_y), fit
+        if best is None:
+            return None
+        self._place((*best, width, height))
+        self.used_width = max(self.used_width, best[0] + width)
+        self.used_height = max(self.used_height, best[1] + height)
+        return best
+
+    def _place(self, used: tuple[int, int, int, int]) -> None:
+        used_x, used_y, used_width, used_height = used
+        free_rects: list[tuple[int, int, int, int]] = []
+        for free in self._free:
+            free_x, free_y, free_width, free_height = free
+            if (
+                used_x >= free_x + free_width
+                or used_x + used_width <= free_x
+                or used_y >= free_y + free_height
+                or used_y + used_height <= free_y
+            ):
+                free_rects.append(free)
+                continue
+            # Split what is left of the free rectangle around the used one.
+            if used_x > free_x:
+                free_rects.append((free_x, free_y, used_x - free_x, free_height))
+            if used_x + used_width < free_x + free_width:
+                right = used_x + used_width
+                free_rects.append((right, free_y, free_x + free_width - right, free_height))
+            if used_y > free_y:
+                free_rects.append((free_x, free_y, free_width, used_y - free_y))
+            if used_y + used_height < free_y + free_height:
+                bottom = used_y + used_height
+                free_rects.append((free_x, bottom, free_width, free_y + free_height - bottom))
+        self._free = self._prune(free_rects)
+
+    @staticmethod
+    def _prune(rects: list[tuple[int, int, int, int]]) -> list[tuple[int, int, int, int]]:
+        # Drop the free rectangles fully inside another one.
+        rects = sorted(set(rects), key=lambda rect: rect[2] * rect[3], reverse=True)
+        kept: list[tuple[int, int, int, int]] = []
+        for rect in rects:
+            if not any(_contains(outer, rect) for outer in kept):
+                kept.append(rect)
+        return kept
+
+
+def _insert(bins: list[MaxRectsBin], width: int, height: int, max_size: int) -> tuple[int, int, int]:
+    # First bin with room for it, or a new one.
+    for index, atlas_bin in enumerate(bins):
+        position = atlas_bin.insert(width, height)
+        if position is not None:
+            return index, *position
+    bins.append(MaxRectsBin(max_size, max_size))
+    # The sprite always fits in an empty bin, larger ones are skipped beforehand.
+    return len(bins) - 1, *bins[-1].insert(width, height)  # type: ignore
+
+
+def pack_family(
+    family: str, members: dict[str, AssetEntry], *, max_size: int, padding: int
+) -> tuple[dict[str, AtlasInfo], dict[str, SpriteRect], list[str]]:
+    """Pack the members of a family into as few atlases as needed, return the atlases, sprites and skipped members."""
+    # Largest first, the usual ordering for MaxRects.
+    order = sorted(members, key=lambda key: (max(members[key].width or 0, members[key].height or 0), key), reverse=True)
+    bins: list[MaxRectsBin] = []
+    placements: dict[str, tuple[int, int, int]] = {}
+    skipped: list[str] = []
+    for key in order:
+        width, height = members[key].width, members[key].height
+        if width is None or height is None or width + padding > max_size or height + padding > max_size:
+            skipped.append(key)
+            continue
+        placements[key] = _insert(bins, width + padding, height + padding, max_size)
+
+    name = family.replace("/", "_")
+    atlas_names = [f"{ATLAS_DIR.name}/{name}_{index}.png" for index in range(len(bins))]
+    atlases = {
+        atlas_name: AtlasInfo(family=family, width=atlas_bin.used_width, height=atlas_bin.used_height)
+        for atlas_name, atlas_bin in zip(atlas_names, bins, strict=True)
+    }
+    sprites = {
+        key: SpriteRect(atlas_names[index], x, y, members[key].width, members[key].height)  # type: ignore
+        for key, (index, x, y) in sorted(placements.items())
+    }
+    return atlases, sprites, skipped
+
+
+def render_atlases(atlases: dict[str, AtlasInfo], sprites: dict[str, SpriteRect]) -> None:
+    images = {name: Image.new("RGBA", (info.width, info.height)) for name, info in atlases.items()}
+    for key, sprite in sprites.items():
+        with Image.open(ROOT_DIR / key) as image:
+            images[sprite.atlas].paste(image.convert("RGBA"), (sprite.x, sprite.y))
+    for name, image in images.items():
+        target = ROOT_DIR / name
+        target.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = target.with_name(f"{target.name}.tmp")
+        image.save(temp_path, format="PNG")
+        temp_path.replace(target)
+
+
+def argparser() -> Namespace:
+    parser = ArgumentParser("xgenerate_atlases")
+    parser.add_argument("-f", "--families", nargs="+", default=list(ATLAS_FAMILIES), help="Icon folders to pack")
+    parser.add_argument("--max-size", type=int, default=DEFAULT_MAX_SIZE, help="Largest atlas width and height")
+    parser.add_argument("--padding", type=int, default=DEFAULT_PADDING, help="Gap between the sprites")
+    parser.add_argument("--force", action="store_true", help="Pack every family again")
+    return parser.parse_args()
+
+
+def main(args: Namespace) -> None:
+    start = time.perf_counter()
+    print("Scanning assets...")
+    assets, stamps, _ = build_asset_manifest(load_asset_manifest())
+    save_asset_manifest(assets, stamps)
+
+    previous = read_manifest(ATLAS_INDEX_PATH, AtlasIndex) or AtlasIndex()
+    index = AtlasIndex()
+    for family in args.families:
+        family = family.rstrip("/")
+        # Only the direct members, icon/rogue is not icon/rogue/blessings
+        members = {
+            key: asset
+            for key, asset in assets.items()
+            if key.startswith(f"{family}/") and "/" not in key[len(family) + 1 :] and key.endswith(".png")
+        }
+        digest = digest_assets(members, family, args.max_size, args.padding)
+        known = previous.families.get(family)
+        if (
+            not args.force
+            and known is not None
+            and known.digest == digest
+            and all((ROOT_DIR / name).exists() for name in known.atlases)
+        ):
+            index.families[family] = known
+            index.atlases.update((name, previous.atlases[name]) for name in known.atlases)
+            index.sprites.update((key, sprite) for key, sprite in previous.sprites.items() if key in members)
+            print(f"{family}: up to date")
+            continue
+
+        atlases, sprites, skipped = pack_family(family, members, max_size=args.max_size, padding=args.padding)
+        render_atlases(atlases, sprites)
+        if known is not None:
+            for name in set(known.atlases) - atlases.keys():
+                (ROOT_DIR / name).unlink(missing_ok=True)
+        index.families[family] = AtlasFamily(digest=digest, atlases=list(atlases))
+        index.atlases.update(atlases)
+        index.sprites.update(sprites)
+        print(f"{family}: packed {len(sprites)} icons into {len(atlases)} atlases")
+        for key in skipped:
+            print(f" Skipped {key}, larger than {args.max_size}px")
+
+    # Keep the families not selected this time.
+    for family, known in previous.families.items():
+        if family not in index.families:
+            index.families[family] = known
+            index.atlases.update((name, previous.atlases[name]) for name in known.atlases)
+            index.sprites.update(
+                (key, sprite) for key, sprite in previous.sprites.items() if sprite.atlas in known.atlases
+            )
+
+    index.sprites = dict(sorted(index.sprites.items()))
+    write_manifest(ATLAS_INDEX_PATH, index)
+    print(f"Indexed {len(index.sprites)} icons in {len(index.atlases)} atlases in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main(argparser())
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import time
+from argparse import ArgumentParser, Namespace
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+
+from PIL import Image
+from sr_assets import build_asset_manifest, load_asset_manifest, read_manifest, save_asset_manifest, write_manifest
+from sr_common import INDEX_DIR, ROOT_DIR
+
+# The images the generators emit as preview/portrait, see SRIndexCharacterBase and SRIndexLightCones.
+DERIVATIVE_SOURCES = (
+    "image/character_portrait",
+    "image/character_preview",
+    "image/light_cone_portrait",
+    "image/light_cone_preview",
+)
+DERIVED_DIR = ROOT_DIR / "derived"
+DERIVATIVES_MANIFEST_PATH = INDEX_DIR / "derivatives_manifest.json"
+DEFAULT_WIDTHS = (256, 512, 1024)
+DEFAULT_FORMATS = ("webp", "avif")
+# Pillow save options per format
+_FORMAT_OPTIONS: dict[str, dict[str, int]] = {
+    "webp": {"quality": 85, "method": 4},
+    "avif": {"quality": 60, "speed": 6},
+    "png": {"optimize": 1},
+}
+
+
+@dataclass
+class ImageVariant:
+    path: str
+    width: int
+    height: int
+    format: str
+    size: int
+
+
+@dataclass
+class DerivedImage:
+    digest: str
+    settings: str
+    variants: list[ImageVariant] = field(default_factory=list)
+
+
+def derived_path(source: str, width: int, format: str) -> str:
+    # image/character_portrait/1001.png -> derived/image/character_portrait/1001/512.webp
+    return f"{DERIVED_DIR.name}/{source.rsplit('.', 1)[0]}/{width}.{format}"
+
+
+def _render_variants(source: str, digest: str, settings: str, widths: list[int], formats: list[str]) -> DerivedImage:
+    derived = DerivedImage(digest=digest, settings=settings)
+    with Image.open(ROOT_DIR / source) as image:
+        image.load()
+        # Never upscale, the source itself is the largest step of the ladder.
+        for width in sorted({min(width, image.width) for width in widths}, reverse=True):
+            height = max(1, round(image.height * width / image.width))
+            resized = image
+            if width != image.width:
+                resized = image.resize((width, height), Image.Resampling.LANCZOS, reducing_gap=2.0)
+            for format in formats:
+                variant_path = derived_path(source, width, format)
+                target = ROOT_DIR / variant_path
+                target.parent.mkdir(parents=True, exist_ok=True)
+                temp_path = target.with_name(f"{target.name}.tmp")
+                resized.save(temp_path, format=format.upper(), **_FORMAT_OPTIONS.get(format, {}))
+                temp_path.replace(target)
+                derived.variants.append(ImageVariant(variant_path, width, height, format, target.stat().st_size))
+    return derived
+
+
+def _is_fresh(derived: DerivedImage | None, digest: str, settings: str) -> bool:
+    if derived is None or derived.digest != digest or derived.settings != settings:
+        return False
+    return all((ROOT_DIR / variant.path).exists() for variant in derived.variants)
+
+
+def _remove_stale_variants(previous: DerivedImage | None, derived: DerivedImage | None) -> None:
+    if previous is None:
+        return
+    kept = {variant.path for variant in derived.variants} if derived is not None else set()
+    for variant in previous.variants:
+        if variant.path not in kept:
+            (ROOT_DIR / variant.path).unlink(missing_ok=True)
+
+
+def argparser() -> Namespace:
+    parser = ArgumentParser("xgenerate_derivatives")
+    parser.add_argument("-w", "--widths", type=int, nargs="+", default=list(DEFAULT_WIDTHS), help="Size ladder")
+    parser.add_argument("-f", "--formats", nargs="+", default=list(DEFAULT_FORMATS), choices=sorted(_FORMAT_OPTIONS))
+    parser.add_argument("-s", "--sources", nargs="+", default=list(DERIVATIVE_SOURCES), help="Source folders")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="Number of encoding processes")
+    parser.add_argument("--force", action="store_true", help="Render every variant again")
+    return parser.parse_args()
+
+
+def main(args: Namespace) -> None:
+    start = time.perf_counter()
+    print("Scanning assets...")
+    assets, stamps, _ = build_asset_manifest(load_asset_manifest())
+    save_asset_manifest(assets, stamps)
+
+    previous = read_manifest(DERIVATIVES_MANIFEST_PATH, dict[str, DerivedImage]) or {}
+    # Any change to the ladder or the encoder options renders every variant again.
+    settings = f"{sorted(set(args.widths))}|{[(format, _FORMAT_OPTIONS[format]) for format in args.formats]}"
+    prefixes = tuple(f"{source.rstrip('/')}/" for source in args.sources)
+    sources = {key: asset.digest for key, asset in assets.items() if key.startswith(prefixes)}
+
+    # Keep what was rendered for the folders not selected this time.
+    manifest = {key: derived for key, derived in previous.items() if key in assets and not key.startswith(prefixes)}
+    pending: list[str] = []
+    for source, digest in sources.items():
+        derived = previous.get(source)
+        if not args.force and _is_fresh(derived, digest, settings):
+            manifest[source] = derived  # type: ignore
+        else:
+            pending.append(source)
+
+    print(f"Rendering the variants of {len(pending)} images ({len(sources) - len(pending)} up to date)...")
+    with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+        futures = {
+            executor.submit(_render_variants, source, sources[source], settings, args.widths, args.formats): source
+            for source in pending
+        }
+        for done, future in enumerate(as_completed(futures), 1):
+            source = futures[future]
+            manifest[source] = future.result()
+            _remove_stale_variants(previous.get(source), manifest[source])
+            print(f" [{done}/{len(pending)}] {source}")
+
+    # The variants of a deleted source go with its manifest entry.
+    for source, derived in previous.items():
+        if source not in assets:
+            _remove_stale_variants(derived, None)
+
+    write_manifest(DERIVATIVES_MANIFEST_PATH, dict(sorted(manifest.items())))
+    source_size = sum(assets[source].size for source in manifest)
+    variant_size = sum(variant.size for derived in manifest.values() for variant in derived.variants)
+    print(f"Sources: {source_size / 1024 / 1024:.1f} MiB, variants: {variant_size / 1024 / 1024:.1f} MiB")
+    print(f"Done in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main(argparser())
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import time
+from argparse import ArgumentParser, Namespace
+from collections.abc import Iterator
+
+from PIL import Image
+from sr_assets import AssetEntry, build_asset_manifest, digest_assets, load_asset_manifest, save_asset_manifest
+from sr_bundle import ICON_BUNDLE_PATH, IconBundle, write_icon_bundle
+from sr_common import ROOT_DIR
+
+# The icons the card renderer composes over and over.
+BUNDLE_FAMILIES = (
+    "icon/element",
+    "icon/path",
+    "icon/property",
+    "icon/relic",
+)
+# Render sizes, an icon is scaled to fit a square of each.
+DEFAULT_SIZES = (64, 128)
+
+
+def decode_icon(key: str, sizes: list[int]) -> Iterator[tuple[str, int, int, int, bytes]]:
+    with Image.open(ROOT_DIR / key) as image:
+        # Premultiply first, so the resampling does not bleed the color of transparent pixels.
+        premultiplied = image.convert("RGBA").convert("RGBa")
+    for size in sizes:
+        scale = size / max(premultiplied.width, premultiplied.height)
+        width = max(1, round(premultiplied.width * scale))
+        height = max(1, round(premultiplied.height * scale))
+        resized = premultiplied.resize((width, height), Image.Resampling.LANCZOS)
+        yield key, size, width, height, resized.tobytes()
+
+
+def _bundle_digest() -> str | None:
+    try:
+        with IconBundle() as bundle:
+            return bundle.source_digest
+    except (OSError, ValueError):
+        return None
+
+
+def argparser() -> Namespace:
+    parser = ArgumentParser("xgenerate_icon_bundle")
+    parser.add_argument("-f", "--families", nargs="+", default=list(BUNDLE_FAMILIES), help="Icon folders to bundle")
+    parser.add_argument("-s", "--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="Render sizes")
+    parser.add_argument("--force", action="store_true", help="Build the bundle even if its icons did not change")
+    return parser.parse_args()
+
+
+def main(args: Namespace) -> None:
+    start = time.perf_counter()
+    print("Scanning assets...")
+    assets, stamps, _ = build_asset_manifest(load_asset_manifest())
+    save_asset_manifest(assets, stamps)
+
+    prefixes = tuple(f"{family.rstrip('/')}/" for family in args.families)
+    members: dict[str, AssetEntry] = {
+        key: asset for key, asset in assets.items() if key.startswith(prefixes) and asset.width is not None
+    }
+    sizes = sorted(set(args.sizes))
+    digest = digest_assets(members, sizes)
+    if not args.force and _bundle_digest() == digest:
+        print(f"{ICON_BUNDLE_PATH.name}: up to date")
+        return
+
+    print(f"Decoding {len(members)} icons at {', '.join(f'{size}px' for size in sizes)}...")
+    write_icon_bundle(
+        (image for key in sorted(members) for image in decode_icon(key, sizes)), source_digest=digest
+    )
+    bundle_size = ICON_BUNDLE_PATH.stat().st_size
+    print(f"Saved {ICON_BUNDLE_PATH.name} ({bundle_size / 1024 / 1024:.1f} MiB) in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main(argparser())
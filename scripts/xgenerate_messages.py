@@ -2,7 +2,7 @@ from __future__ import annotations
 
 import functools
 from enum import Enum
-from typing import Any, Literal, TypedDict, cast
+from typing import Any, Literal, TypedDict
 
 import msgspec
 import orjson
@@ -14,6 +14,7 @@ from sr_common import (
     load_all_languages,
     read_config,
     remap_icon_or_image,
+    report_unhandled_paths,
 )
 
 DISABLED_CONTACTS = []
@@ -30,7 +31,7 @@ class _MessageSectionConfig(_MessageSectionConfigOptional):
     StartMessageItemIDList: list[int]
 
 
-class _MessageItemConfig(TypedDict):
+class _MessageItemConfig(Struct):
     ID: int
     Sender: Literal["Player", "PlayerAuto", "NPC", "System"]
     ItemType: Literal["Text", "Image", "Sticker", "Raid", "Link", "Video"]
@@ -39,8 +40,8 @@ class _MessageItemConfig(TypedDict):
     NextItemIDList: list[int]
     SectionID: int
     """Message section/group"""
-    ContactsID: int
     ItemContentID: int
+    ContactsID: int | None = None
 
 
 class _MessageGroupConfig(TypedDict):
@@ -197,23 +198,22 @@ class Text(Struct, tag=True):
     def from_config(
         cls: type[Text], config: _MessageItemConfig, contact_id: int, lang: str = SELECTED_LANGUAGE
     ) -> Text:
-        option_str: str | None = get_hash_content_with(config["OptionText"], lang)
+        option_str: str | None = get_hash_content_with(config.OptionText, lang)
         if not option_str:
             option_str = None
 
-        if "ContactsID" not in config and config["Sender"] == "NPC":
-            config["ContactsID"] = contact_id
-        elif "ContactsID" not in config:
-            config["ContactsID"] = None
+        sender_id = config.ContactsID
+        if sender_id is None and config.Sender == "NPC":
+            sender_id = contact_id
 
         return cls(
-            id=config["ID"],
-            section_id=config["SectionID"],
-            sender_id=config["ContactsID"],
-            text=get_hash_content_with(config["MainText"], lang),
+            id=config.ID,
+            section_id=config.SectionID,
+            sender_id=sender_id,
+            text=get_hash_content_with(config.MainText, lang),
             option=option_str,
-            next_ids=config["NextItemIDList"],
-            kind=MessageSender(config["Sender"]),
+            next_ids=config.NextItemIDList,
+            kind=MessageSender(config.Sender),
         )
 
 
@@ -234,14 +234,13 @@ class Image(Text, tag=True):
     def from_config(
         cls: type[Image], config: _MessageItemConfig, contact_id: int, image: ImageInfo, lang: str = SELECTED_LANGUAGE
     ) -> Image:
-        option_str: str | None = get_hash_content_with(config["OptionText"], lang)
+        option_str: str | None = get_hash_content_with(config.OptionText, lang)
         if not option_str:
             option_str = None
 
-        if "ContactsID" not in config and config["Sender"] == "NPC":
-            config["ContactsID"] = contact_id
-        elif "ContactsID" not in config:
-            config["ContactsID"] = None
+        sender_id = config.ContactsID
+        if sender_id is None and config.Sender == "NPC":
+            sender_id = contact_id
 
         image.m_path = remap_icon_or_image(image.m_path)
         image.f_path = remap_icon_or_image(image.f_path)
@@ -253,13 +252,13 @@ class Image(Text, tag=True):
             raise ValueError("Image path is missing...")
 
         return cls(
-            id=config["ID"],
-            section_id=config["SectionID"],
-            sender_id=config["ContactsID"],
-            text=get_hash_content_with(config["MainText"], lang),
+            id=config.ID,
+            section_id=config.SectionID,
+            sender_id=sender_id,
+            text=get_hash_content_with(config.MainText, lang),
             option=option_str,
-            next_ids=config["NextItemIDList"],
-            kind=MessageSender(config["Sender"]),
+            next_ids=config.NextItemIDList,
+            kind=MessageSender(config.Sender),
             image=image,
         )
 
@@ -281,25 +280,24 @@ class Video(Text, tag=True):
     def from_config(
         cls: type[Video], config: _MessageItemConfig, contact_id: int, video: VideoInfo, lang: str = SELECTED_LANGUAGE
     ) -> Video:
-        option_str: str | None = get_hash_content_with(config["OptionText"], lang)
+        option_str: str | None = get_hash_content_with(config.OptionText, lang)
         if not option_str:
             option_str = None
 
-        if "ContactsID" not in config and config["Sender"] == "NPC":
-            config["ContactsID"] = contact_id
-        elif "ContactsID" not in config:
-            config["ContactsID"] = None
+        sender_id = config.ContactsID
+        if sender_id is None and config.Sender == "NPC":
+            sender_id = contact_id
 
         video.path = remap_icon_or_image(video.path)
 
         return cls(
-            id=config["ID"],
-            section_id=config["SectionID"],
-            sender_id=config["ContactsID"],
-            text=get_hash_content_with(config["MainText"], lang),
+            id=config.ID,
+            section_id=config.SectionID,
+            sender_id=sender_id,
+            text=get_hash_content_with(config.MainText, lang),
             option=option_str,
-            next_ids=config["NextItemIDList"],
-            kind=MessageSender(config["Sender"]),
+            next_ids=config.NextItemIDList,
+            kind=MessageSender(config.Sender),
             video=video,
         )
 
@@ -333,23 +331,22 @@ class Sticker(Text, tag=True):
         sticker: StickerInfo,
         lang: str = SELECTED_LANGUAGE,
     ) -> Sticker:
-        option_str: str | None = get_hash_content_with(config["OptionText"], lang)
+        option_str: str | None = get_hash_content_with(config.OptionText, lang)
         if not option_str:
             option_str = None
 
-        if "ContactsID" not in config and config["Sender"] == "NPC":
-            config["ContactsID"] = contact_id
-        elif "ContactsID" not in config:
-            config["ContactsID"] = None
+        sender_id = config.ContactsID
+        if sender_id is None and config.Sender == "NPC":
+            sender_id = contact_id
 
         return cls(
-            id=config["ID"],
-            section_id=config["SectionID"],
-            sender_id=config["ContactsID"],
-            text=get_hash_content_with(config["MainText"], lang),
+            id=config.ID,
+            section_id=config.SectionID,
+            sender_id=sender_id,
+            text=get_hash_content_with(config.MainText, lang),
             option=option_str,
-            next_ids=config["NextItemIDList"],
-            kind=MessageSender(config["Sender"]),
+            next_ids=config.NextItemIDList,
+            kind=MessageSender(config.Sender),
             sticker=sticker,
         )
 
@@ -373,25 +370,24 @@ class Raid(Text, tag=True):
     def from_config(
         cls: type[Raid], config: _MessageItemConfig, contact_id: int, raid: RaidInfo, lang: str = SELECTED_LANGUAGE
     ) -> Raid:
-        option_str: str | None = get_hash_content_with(config["OptionText"], lang)
+        option_str: str | None = get_hash_content_with(config.OptionText, lang)
         if not option_str:
             option_str = None
 
-        if "ContactsID" not in config and config["Sender"] == "NPC":
-            config["ContactsID"] = contact_id
-        elif "ContactsID" not in config:
-            config["ContactsID"] = None
+        sender_id = config.ContactsID
+        if sender_id is None and config.Sender == "NPC":
+            sender_id = contact_id
 
         raid.image = remap_icon_or_image(raid.image)
 
         return cls(
-            id=config["ID"],
-            section_id=config["SectionID"],
-            sender_id=config["ContactsID"],
-            text=get_hash_content_with(config["MainText"], lang),
+            id=config.ID,
+            section_id=config.SectionID,
+            sender_id=sender_id,
+            text=get_hash_content_with(config.MainText, lang),
             option=option_str,
-            next_ids=config["NextItemIDList"],
-            kind=MessageSender(config["Sender"]),
+            next_ids=config.NextItemIDList,
+            kind=MessageSender(config.Sender),
             raid=raid,
         )
 
@@ -415,25 +411,24 @@ class Link(Text, tag=True):
     def from_config(
         cls: type[Link], config: _MessageItemConfig, contact_id: int, link: LinkInfo, lang: str = SELECTED_LANGUAGE
     ) -> Link:
-        option_str: str | None = get_hash_content_with(config["OptionText"], lang)
+        option_str: str | None = get_hash_content_with(config.OptionText, lang)
         if not option_str:
             option_str = None
 
-        if "ContactsID" not in config and config["Sender"] == "NPC":
-            config["ContactsID"] = contact_id
-        elif "ContactsID" not in config:
-            config["ContactsID"] = None
+        sender_id = config.ContactsID
+        if sender_id is None and config.Sender == "NPC":
+            sender_id = contact_id
 
         link.image = remap_icon_or_image(link.image)
 
         return cls(
-            id=config["ID"],
-            section_id=config["SectionID"],
-            sender_id=config["ContactsID"],
-            text=get_hash_content_with(config["MainText"], lang),
+            id=config.ID,
+            section_id=config.SectionID,
+            sender_id=sender_id,
+            text=get_hash_content_with(config.MainText, lang),
             option=option_str,
-            next_ids=config["NextItemIDList"],
-            kind=MessageSender(config["Sender"]),
+            next_ids=config.NextItemIDList,
+            kind=MessageSender(config.Sender),
             link=link,
         )
 
@@ -553,15 +548,15 @@ def process_message_chains(
     item_videos_config: dict[str, _MessageItemVideoConfig],
     emoji_configs: dict[str, _SimpleEmojiConfig],
     message_raid_configs: dict[str, _MessageItemRaidEntranceConfig],
-    raid_configs: dict[str, dict[Literal["0"], _SimpleRaidConfig]],
+    raid_configs: dict[str, dict[str, _SimpleRaidConfig]],
     link_configs: dict[str, _MessageItemLinkConfig],
 ):
     message_info = messages_configs[str(start_id)]
-    match message_info["ItemType"]:
+    match message_info.ItemType:
         case "Text":
             msg = Text.from_config(message_info, contact_id)
         case "Image":
-            img_raw = item_images_config[str(message_info["ItemContentID"])]
+            img_raw = item_images_config[str(message_info.ItemContentID)]
             img_inf = ImageInfo(
                 id=img_raw["ID"],
                 m_path=img_raw["ImagePath"],
@@ -569,11 +564,11 @@ def process_message_chains(
             )
             msg = Image.from_config(message_info, contact_id, img_inf)
         case "Sticker":
-            stick_raw = emoji_configs[str(message_info["ItemContentID"])]
+            stick_raw = emoji_configs[str(message_info.ItemContentID)]
             stick_inf = StickerInfo.from_config(stick_raw)
             msg = Sticker.from_config(message_info, contact_id, stick_inf)
         case "Raid":
-            msg_raid_raw = message_raid_configs[str(message_info["ID"])]
+            msg_raid_raw = message_raid_configs[str(message_info.ID)]
             raid_raw = raid_configs[str(msg_raid_raw["RaidID"])]["0"]
             raid_inf = RaidInfo(
                 id=raid_raw["RaidID"],
@@ -583,7 +578,7 @@ def process_message_chains(
             )
             msg = Raid.from_config(message_info, contact_id, raid_inf)
         case "Link":
-            msg_link_raw = link_configs[str(message_info["ItemContentID"])]
+            msg_link_raw = link_configs[str(message_info.ItemContentID)]
             msg_link_inf = LinkInfo(
                 id=msg_link_raw["ID"],
                 name=get_hash_content_with(msg_link_raw["Title"]),
@@ -592,7 +587,7 @@ def process_message_chains(
             )
             msg = Link.from_config(message_info, contact_id, msg_link_inf)
         case "Video":
-            msg_video_raw = item_videos_config[str(message_info["ItemContentID"])]
+            msg_video_raw = item_videos_config[str(message_info.ItemContentID)]
             msg_video_inf = VideoInfo(
                 id=msg_video_raw["ID"],
                 path=msg_video_raw["ImagePath"],
@@ -600,7 +595,7 @@ def process_message_chains(
             )
             msg = Video.from_config(message_info, contact_id, msg_video_inf)
         case _:
-            raise ValueError(f"Unknown message type: {message_info['ItemType']} ()")
+            raise ValueError(f"Unknown message type: {message_info.ItemType} ()")
     all_messages[str(msg.id)] = msg
     if not msg.next_ids:
         return all_messages
@@ -624,9 +619,8 @@ def main_loader():
     print("Getting configs...")
     emoji_configs = read_config("EmojiConfig", type=_SimpleEmojiConfig)
     message_raid_configs = read_config("MessageItemRaidEntrance", type=_MessageItemRaidEntranceConfig)
-    raid_configs = cast(
-        dict[str, dict[Literal["0"], _SimpleRaidConfig]], read_config("RaidConfig", type=_SimpleRaidConfig)
-    )
+    # Keyed by raid ID, then by level.
+    raid_configs = read_config("RaidConfig", type=dict[str, _SimpleRaidConfig])
     mission_configs = read_config("MainMission", type=_SimpleMainMissionConfig)
     item_images_config: dict[str, _MessageItemImageConfig] = read_config(
         "MessageItemImage", type=_MessageItemImageConfig
@@ -740,3 +734,4 @@ if __name__ == "__main__":
     LANG_ASSETS = load_all_languages([SELECTED_LANGUAGE])
     get_hash_content_with = functools.partial(get_hash_content, lang_assets=LANG_ASSETS)
     main_loader()
+    report_unhandled_paths()
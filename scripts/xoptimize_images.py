@@ -0,0 +1,267 @@
+from __future__ import annotations
+
+import io
+import struct
+import time
+import zlib
+from argparse import ArgumentParser, Namespace
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+
+import numpy as np
+from PIL import Image
+from sr_assets import build_asset_manifest, load_asset_manifest, read_manifest, save_asset_manifest, write_manifest
+from sr_cache import file_digest
+from sr_common import CACHE_DIR, ROOT_DIR
+
+# digest of every file that went through the optimizer, whether it could be shrunk or not
+OPTIMIZE_LEDGER_PATH = CACHE_DIR / "png_ledger.json"
+# Bump this whenever the strategies change, every file is tried again once.
+_LEDGER_VERSION = 1
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+# The chunks describing how to display the colors, kept as they are.
+_COLOR_CHUNKS = (b"iCCP", b"sRGB", b"gAMA", b"cHRM")
+# PNG color types
+_GRAY, _RGB, _PALETTE, _GRAY_ALPHA, _RGBA = 0, 2, 3, 4, 6
+_FILTERS = ("none", "sub", "up", "average", "paeth")
+
+
+@dataclass
+class OptimizeLedger:
+    version: int = _LEDGER_VERSION
+    optimized: dict[str, int] = field(default_factory=dict)
+
+
+@dataclass
+class OptimizeResult:
+    key: str
+    before: int
+    after: int
+    digest: str
+    strategy: str
+
+
+def _chunk(chunk_type: bytes, data: bytes) -> bytes:
+    return struct.pack(">I", len(data)) + chunk_type + data + struct.pack(">I", zlib.crc32(chunk_type + data))
+
+
+def _read_chunks(data: bytes) -> list[tuple[bytes, bytes]]:
+    chunks: list[tuple[bytes, bytes]] = []
+    position = len(_PNG_SIGNATURE)
+    while position + 8 <= len(data):
+        length, chunk_type = struct.unpack_from(">I4s", data, position)
+        chunks.append((chunk_type, data[position + 8 : position + 8 + length]))
+        position += 12 + length
+    return chunks
+
+
+def _pack_bits(indices: np.ndarray, bit_depth: int) -> np.ndarray:
+    """Pack the rows of 8-bit values into ``bit_depth`` bits per value, first value in the high bits."""
+    if bit_depth == 8:
+        return indices
+    per_byte = 8 // bit_depth
+    height, width = indices.shape
+    padded = np.zeros((height, -(-width // per_byte) * per_byte), dtype=np.uint8)
+    padded[:, :width] = indices
+    grouped = padded.reshape(height, -1, per_byte)
+    packed = np.zeros(grouped.shape[:2], dtype=np.uint8)
+    for position in range(per_byte):
+        packed |= grouped[:, :, position] << (8 - bit_depth * (position + 1))
+    return packed
+
+
+def _filter_candidates(raw: np.ndarray, bpp: int) -> list[np.ndarray]:
+    """Every scanline filtered with each of the five PNG filters, vectorized over the whole image."""
+    left = np.zeros_like(raw)
+    left[:, bpp:] = raw[:, :-bpp]
+    up = np.zeros_like(raw)
+    up[1:] = raw[:-1]
+    up_left = np.zeros_like(raw)
+    up_left[1:, bpp:] = raw[:-1, :-bpp]
+
+    average = ((left.astype(np.uint16) + up) >> 1).astype(np.uint8)
+    estimate = left.astype(np.int16) + up - up_left
+    distance_left = np.abs(estimate - left)
+    distance_up = np.abs(estimate - up)
+    distance_up_left = np.abs(estimate - up_left)
+    paeth = np.where(
+        (distance_left <= distance_up) & (distance_left <= distance_up_left),
+        left,
+        np.where(distance_up <= distance_up_left, up, up_left),
+    ).astype(np.uint8)
+    return [raw, raw - left, raw - up, raw - average, raw - paeth]
+
+
+def _encode_scanlines(raw: np.ndarray, bpp: int, level: int, quick: bool) -> tuple[bytes, str]:
+    """Compress the image data with the filter strategy giving the smallest stream."""
+    candidates = _filter_candidates(raw, bpp)
+    # Adaptive: the filter with the smallest sum of absolute (signed) values, row by row.
+    scores = np.stack([np.abs(candidate.view(np.int8).astype(np.int32)).sum(axis=1) for candidate in candidates])
+    choice = scores.argmin(axis=0)
+    adaptive = np.stack(candidates)[choice, np.arange(raw.shape[0])]
+    strategies: list[tuple[str, np.ndarray, np.ndarray]] = [("adaptive", choice.astype(np.uint8), adaptive)]
+    if not quick:
+        for filter_type, candidate in enumerate(candidates):
+            strategies.append((_FILTERS[filter_type], np.full(raw.shape[0], filter_type, dtype=np.uint8), candidate))
+
+    best: tuple[bytes, str] | None = None
+    for name, filter_types, filtered in strategies:
+        scanlines = np.concatenate([filter_types[:, None], filtered], axis=1).tobytes()
+        for strategy in (zlib.Z_DEFAULT_STRATEGY, zlib.Z_FILTERED):
+            compressor = zlib.compressobj(level, zlib.DEFLATED, 15, 9, strategy)
+            compressed = compressor.compress(scanlines) + compressor.flush()
+            if best is None or len(compressed) < len(best[0]):
+                best = compressed, f"{name}/{'filtered' if strategy == zlib.Z_FILTERED else 'default'}"
+    return best  # type: ignore
+
+
+def _representations(rgba: np.ndarray) -> list[tuple[int, int, np.ndarray, bytes, bytes, str]]:
+    """The lossless ways to store the pixels: (color type, bit depth, raw rows, PLTE, tRNS, name)."""
+    height, width, _ = rgba.shape
+    opaque = bool((rgba[:, :, 3] == 255).all())
+    gray = bool(((rgba[:, :, 0] == rgba[:, :, 1]) & (rgba[:, :, 1] == rgba[:, :, 2])).all())
+    if gray:
+        channels = rgba[:, :, [0]] if opaque else rgba[:, :, [0, 3]]
+        color_type = _GRAY if opaque else _GRAY_ALPHA
+    else:
+        channels = rgba[:, :, :3] if opaque else rgba
+        color_type = _RGB if opaque else _RGBA
+    direct = (color_type, 8, channels.reshape(height, -1), b"", b"", "gray" if gray else "truecolor")
+    options = [direct]
+
+    packed = rgba.view(np.uint32).reshape(height, width)
+    colors, inverse, counts = np.unique(packed, return_inverse=True, return_counts=True)
+    if len(colors) <= 256:
+        palette = colors.view(np.uint8).reshape(-1, 4)
+        # Opaque entries last so the tRNS chunk can stop early, the most used colors first.
+        order = np.lexsort((-counts, palette[:, 3] == 255))
+        remap = np.empty(len(order), dtype=np.uint8)
+        remap[order] = np.arange(len(order), dtype=np.uint8)
+        palette = palette[order]
+        indices = remap[inverse.reshape(height, width)]
+        bit_depth = next(depth for depth in (1, 2, 4, 8) if len(colors) <= 1 << depth)
+        transparent = int((palette[:, 3] != 255).sum())
+        options.append(
+            (
+                _PALETTE,
+                bit_depth,
+                _pack_bits(indices, bit_depth),
+                palette[:, :3].tobytes(),
+                palette[:transparent, 3].tobytes(),
+                f"palette{bit_depth}",
+            )
+        )
+    return options
+
+
+def optimize_png(data: bytes, *, level: int = 9, quick: bool = False) -> tuple[bytes, str] | None:
+    """Return a smaller, pixel-identical encoding of a PNG, or ``None`` if none was found."""
+    if not data.startswith(_PNG_SIGNATURE):
+        return None
+    chunks = _read_chunks(data)
+    # Pillow decodes 16-bit channels to 8 bits, those can not be compared losslessly.
+    if not chunks or chunks[0][0] != b"IHDR" or chunks[0][1][8] == 16:
+        return None
+    with Image.open(io.BytesIO(data)) as image:
+        if image.mode not in ("1", "L", "LA", "P", "RGB", "RGBA"):
+            return None
+        rgba = np.asarray(image.convert("RGBA"))
+    color_chunks = [(chunk_type, body) for chunk_type, body in chunks if chunk_type in _COLOR_CHUNKS]
+
+    best: tuple[bytes, str] | None = None
+    for color_type, bit_depth, raw, plte, trns, name in _representations(rgba):
+        channels = {_GRAY: 1, _RGB: 3, _PALETTE: 1, _GRAY_ALPHA: 2, _RGBA: 4}[color_type]
+        compressed, strategy = _encode_scanlines(raw, max(1, channels * bit_depth // 8), level, quick)
+        ihdr = struct.pack(">IIBBBBB", rgba.shape[1], rgba.shape[0], bit_depth, color_type, 0, 0, 0)
+        output = [_chunk(b"IHDR", ihdr)]
+        output.extend(_chunk(chunk_type, body) for chunk_type, body in color_chunks)
+        if plte:
+            output.append(_chunk(b"PLTE", plte))
+        if trns:
+            output.append(_chunk(b"tRNS", trns))
+        output.extend((_chunk(b"IDAT", compressed), _chunk(b"IEND", b"")))
+        encoded = _PNG_SIGNATURE + b"".join(output)
+        if best is None or len(encoded) < len(best[0]):
+            best = encoded, f"{name}/{strategy}"
+
+    if best is None or len(best[0]) >= len(data):
+        return None
+    # Never trust the encoder blindly, the result must decode to exactly the same pixels.
+    with Image.open(io.BytesIO(best[0])) as optimized:
+        if np.asarray(optimized.convert("RGBA")).tobytes() != rgba.tobytes():
+            return None
+    return best
+
+
+def _optimize_file(key: str, level: int, quick: bool, dry_run: bool) -> OptimizeResult:
+    path = ROOT_DIR / key
+    data = path.read_bytes()
+    result = optimize_png(data, level=level, quick=quick)
+    if result is None:
+        return OptimizeResult(key, len(data), len(data), file_digest(path), "kept")
+    optimized, strategy = result
+    if not dry_run:
+        temp_path = path.with_name(f"{path.name}.tmp")
+        temp_path.write_bytes(optimized)
+        temp_path.replace(path)
+    return OptimizeResult(key, len(data), len(optimized), file_digest(path), strategy)
+
+
+def _load_ledger() -> OptimizeLedger:
+    ledger = read_manifest(OPTIMIZE_LEDGER_PATH, OptimizeLedger)
+    if ledger is None or ledger.version != _LEDGER_VERSION:
+        return OptimizeLedger()
+    return ledger
+
+
+def argparser() -> Namespace:
+    parser = ArgumentParser("xoptimize_images")
+    parser.add_argument("-p", "--prefix", nargs="+", default=["icon/", "image/"], help="Only optimize these folders")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="Number of optimizing processes")
+    parser.add_argument("-l", "--level", type=int, default=9, help="zlib compression level")
+    parser.add_argument("--quick", action="store_true", help="Only try the adaptive filter per scanline")
+    parser.add_argument("--dry-run", action="store_true", help="Report the savings without writing anything")
+    parser.add_argument("--force", action="store_true", help="Try the files the ledger knows about again")
+    return parser.parse_args()
+
+
+def main(args: Namespace) -> None:
+    start = time.perf_counter()
+    print("Scanning assets...")
+    assets, stamps, _ = build_asset_manifest(load_asset_manifest())
+    save_asset_manifest(assets, stamps)
+    ledger = OptimizeLedger() if args.force else _load_ledger()
+    pending = [
+        key
+        for key, asset in assets.items()
+        if key.startswith(tuple(args.prefix)) and key.endswith(".png") and asset.digest not in ledger.optimized
+    ]
+    print(f"Optimizing {len(pending)} images ({len(assets) - len(pending)} already done or skipped)...")
+
+    saved: dict[str, list[int]] = defaultdict(lambda: [0, 0])
+    with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+        futures = [executor.submit(_optimize_file, key, args.level, args.quick, args.dry_run) for key in pending]
+        for done, future in enumerate(as_completed(futures), 1):
+            result = future.result()
+            if result.after < result.before:
+                directory = result.key.rsplit("/", 1)[0]
+                saved[directory][0] += 1
+                saved[directory][1] += result.before - result.after
+                print(f" [{done}/{len(pending)}] {result.key}: {result.before} -> {result.after} ({result.strategy})")
+            if not args.dry_run:
+                ledger.optimized[result.digest] = result.after
+
+    if not args.dry_run:
+        write_manifest(OPTIMIZE_LEDGER_PATH, ledger)
+        # The optimized files changed, describe them again.
+        assets, stamps, _ = build_asset_manifest(assets)
+        save_asset_manifest(assets, stamps)
+    for directory, (count, saved_bytes) in sorted(saved.items()):
+        print(f"{directory}: {count} files, saved {saved_bytes / 1024:.1f} KiB")
+    total = sum(saved_bytes for _, saved_bytes in saved.values())
+    print(f"Saved {total / 1024 / 1024:.2f} MiB in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main(argparser())